@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from backend.core.admission import admission
+from backend.core.profiling import profiling
+
+router = APIRouter()
+
+
+def _store():
+    if not profiling.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    return profiling.store
+
+
+@router.get("/profiles")
+async def list_profiles(limit: int = 100):
+    """Saved request profiles, newest first."""
+    return {"profiles": _store().list(limit)}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """Metadata and per-await timings of one profile."""
+    profile = _store().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return profile
+
+
+@router.get("/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+async def get_collapsed_stacks(profile_id: str):
+    """Folded stacks for flamegraph.pl or speedscope."""
+    collapsed = _store().collapsed(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return collapsed
+
+
+@router.get("/admission")
+async def get_admission_stats():
+    """Queue depth, queue wait percentiles and rejections per traffic class."""
+    return admission.report()
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Depends, Query
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional
+from backend.core.graph_layout import build_subgraph_view, layout_cache
 from backend.services.neo4j_service import Neo4jService
-from backend.config import settings
+from backend.services.search_service import SEARCH_TYPES, SearchService
+from backend.startup import get_neo4j_service as get_shared_neo4j_service
+import asyncio
 import traceback
 import logging 
 
@@ -9,16 +13,24 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# item type -> (label, key property) of the subgraph center
+SUBGRAPH_CENTERS = {
+    "concept": ("Concept", "name"),
+    "question": ("Question", "text"),
+    "technique": ("Technique", "name"),
+}
+
+# Most items a single batch lookup may ask for, across all categories
+MAX_BATCH_ITEMS = 500
+
+class BatchLookupRequest(BaseModel):
+    concepts: List[str] = Field(default_factory=list)
+    questions: List[str] = Field(default_factory=list)
+    techniques: List[str] = Field(default_factory=list)
+
 async def get_neo4j_service():
-    service = Neo4jService(
-        uri=settings.NEO4J_URI,
-        user=settings.NEO4J_USER,
-        password=settings.NEO4J_PASSWORD
-    )
-    try:
-        yield service
-    finally:
-        await service.close()
+    # Shared for the life of the app so requests reuse warm pooled connections
+    return get_shared_neo4j_service()
 
 @router.get("/concepts")
 async def get_all_concepts(neo4j: Neo4jService = Depends(get_neo4j_service)):
@@ -118,3 +130,92 @@ async def get_prerequisites_technique(
     except Exception as e:
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch")
+async def batch_lookup(
+    request: BatchLookupRequest,
+    neo4j: Neo4jService = Depends(get_neo4j_service)
+):
+    """
+    Get related items, prerequisites, difficulty and alternatives for many concepts,
+    questions and techniques at once: one query per category instead of two requests per item.
+    Items missing from the graph come back with found = false.
+    """
+    categories = {
+        category: list(dict.fromkeys(getattr(request, category)))
+        for category in ("concepts", "questions", "techniques")
+    }
+    if sum(len(keys) for keys in categories.values()) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+    try:
+        results = await asyncio.gather(*[
+            neo4j.get_neighborhoods(category, keys) for category, keys in categories.items()
+        ])
+        return dict(zip(categories, results))
+    except Exception as e:
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/central-concepts")
+async def get_central_concepts(
+    domain: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
+    neo4j: Neo4jService = Depends(get_neo4j_service)
+):
+    """
+    Get the most central concepts per domain, as last computed by the offline
+    graph analytics job (scripts/graph_analytics.py).
+    """
+    try:
+        return await neo4j.get_central_concepts(domain=domain, limit=limit)
+    except Exception as e:
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search")
+async def search(
+    q: str = Query("", max_length=200),
+    types: str = Query(",".join(SEARCH_TYPES)),
+    limit: int = Query(10, ge=1, le=50),
+    neo4j: Neo4jService = Depends(get_neo4j_service)
+):
+    """Autocomplete questions, concepts and techniques by prefix, best matches first."""
+    try:
+        wanted = [t for t in types.split(",") if t in SEARCH_TYPES]
+        return await SearchService(neo4j).autocomplete(q, types=wanted, limit=limit)
+    except Exception as e:
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/subgraph")
+async def get_subgraph(
+    item: str,
+    item_type: str = Query("concept", pattern="^(concept|question|technique)$"),
+    hops: int = Query(2, ge=1, le=3),
+    max_nodes: int = Query(150, ge=2, le=500),
+    max_edges: int = Query(400, ge=1, le=2000),
+    neo4j: Neo4jService = Depends(get_neo4j_service)
+):
+    """Get the deduplicated neighbourhood of an item with precomputed layout positions."""
+    try:
+        label, key = SUBGRAPH_CENTERS[item_type]
+        subgraph = await neo4j.get_subgraph(label, key, item, hops=hops)
+        if subgraph is None:
+            raise HTTPException(status_code=404, detail=f"{item_type} not found: {item}")
+        nodes = {node["id"]: node for node in subgraph["nodes"]}
+        edges = [(e["source"], e["target"], e["type"], e["weight"]) for e in subgraph["edges"]]
+        # The layout is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(
+            build_subgraph_view, subgraph["center"], nodes, edges,
+            max_nodes=max_nodes, max_edges=max_edges, complete=subgraph["complete"]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/subgraph/stats")
+async def get_subgraph_stats():
+    """Get layout cache statistics."""
+    return {"layout_cache": layout_cache.stats()}
@@ -1,38 +1,158 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, List, Optional
 from pydantic import BaseModel
-import os
-from backend.core.question_analyzer import QuestionAnalyzer
-from backend.services.neo4j_service import Neo4jService
-from dotenv import load_dotenv
-import pytesseract
-from PIL import Image
+import json
+from backend.core.document_ingest import DocumentReport, UnsupportedDocumentError, extract_document_questions
+from backend.core.question_analyzer import QuestionAnalyzer, analysis_flight
+from backend.core.near_duplicate import NearDuplicateIndex
+from backend.core.related_questions import RelatedQuestionIndex
+from backend.core.write_behind import WriteBehind, WriteJournal
+from backend.services.concept_normalization_service import normalization_flight
+from backend.services.llm_providers import LLMProvider, build_provider
+from backend.services.llm_service import CircuitBreaker, LLMService, LLMUnavailableError
+from backend.services.model_router import ModelRouter, ModelTier
+from backend.config import get_settings
+from backend.startup import get_neo4j_service
+from concurrent.futures import ProcessPoolExecutor
 import io
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+import traceback
 import logging 
 
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
 router = APIRouter()
 
-# Dependency for services
-async def get_analyzer():
-    neo4j_service = Neo4jService(
-        uri=os.getenv("NEO4J_URI"),
-        user=os.getenv("NEO4J_USER"),
-        password=os.getenv("NEO4J_PASSWORD")
+_llm_breaker: Optional[CircuitBreaker] = None
+_near_duplicate_index: Optional[NearDuplicateIndex] = None
+_related_question_index: Optional[RelatedQuestionIndex] = None
+_llm_provider: Optional[LLMProvider] = None
+_model_router: Optional[ModelRouter] = None
+_ocr_executor: Optional[ProcessPoolExecutor] = None
+_write_behind: Optional[WriteBehind] = None
+
+# Upload chunk size when spooling documents
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+def get_llm_breaker() -> CircuitBreaker:
+    """One breaker per process so every request sees the provider's health."""
+    global _llm_breaker
+    if _llm_breaker is None:
+        settings = get_settings()
+        _llm_breaker = CircuitBreaker(
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_BREAKER_RESET_SECONDS
+        )
+    return _llm_breaker
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """Shared by every request so the index is built from the graph once per process."""
+    global _near_duplicate_index
+    if _near_duplicate_index is None:
+        _near_duplicate_index = NearDuplicateIndex(threshold=get_settings().NEAR_DUPLICATE_THRESHOLD)
+    return _near_duplicate_index
+
+def get_related_question_index() -> RelatedQuestionIndex:
+    """Shared so every ingest updates the same top-k lists."""
+    global _related_question_index
+    if _related_question_index is None:
+        settings = get_settings()
+        _related_question_index = RelatedQuestionIndex(
+            top_k=settings.RELATED_QUESTIONS_TOP_K,
+            min_similarity=settings.RELATED_QUESTIONS_MIN_SIMILARITY
+        )
+    return _related_question_index
+
+def get_write_behind() -> Optional[WriteBehind]:
+    """The process-wide write-behind journal and flusher, or None when analyses are stored inline."""
+    global _write_behind
+    settings = get_settings()
+    if _write_behind is None and settings.WRITE_BEHIND_ENABLED:
+        _write_behind = WriteBehind(
+            WriteJournal(settings.WRITE_BEHIND_JOURNAL, fsync=settings.WRITE_BEHIND_FSYNC),
+            batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+            interval=settings.WRITE_BEHIND_INTERVAL_SECONDS,
+            max_attempts=settings.WRITE_BEHIND_MAX_ATTEMPTS
+        )
+    return _write_behind
+
+def get_llm_provider() -> LLMProvider:
+    """One provider per process, so HTTP connection pools are reused across requests."""
+    global _llm_provider
+    if _llm_provider is None:
+        settings = get_settings()
+        _llm_provider = build_provider(
+            settings.LLM_PROVIDER,
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            record_mode=settings.LLM_RECORD_MODE,
+            cassette_dir=settings.LLM_CASSETTE_DIR,
+            timeout=settings.LLM_TIMEOUT_SECONDS
+        )
+    return _llm_provider
+
+def get_model_router() -> Optional[ModelRouter]:
+    """Shared so routing history and per-tier stats cover every request; None without a small model."""
+    global _model_router
+    settings = get_settings()
+    if _model_router is None and settings.LLM_SMALL_MODEL:
+        _model_router = ModelRouter(
+            small=ModelTier("small", settings.LLM_SMALL_MODEL, *settings.LLM_SMALL_MODEL_COSTS),
+            strong=ModelTier("strong", settings.LLM_MODEL, *settings.LLM_MODEL_COSTS),
+            threshold=settings.LLM_ROUTING_THRESHOLD
+        )
+    return _model_router
+
+def get_ocr_executor() -> ProcessPoolExecutor:
+    """One OCR pool per process; tesseract is CPU-bound, so pages run in parallel processes."""
+    global _ocr_executor
+    if _ocr_executor is None:
+        workers = get_settings().DOCUMENT_OCR_WORKERS or os.cpu_count() or 1
+        # spawn: forking a process that runs an event loop and driver threads is unsafe
+        _ocr_executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _ocr_executor
+
+def shutdown_ocr_executor():
+    global _ocr_executor
+    if _ocr_executor is not None:
+        _ocr_executor.shutdown(wait=False, cancel_futures=True)
+        _ocr_executor = None
+
+def create_llm_service() -> LLMService:
+    settings = get_settings()
+    router = get_model_router()
+    return LLMService(
+        get_llm_provider(),
+        model=settings.LLM_MODEL,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+        max_retries=settings.LLM_MAX_RETRIES,
+        hedge=settings.LLM_HEDGE_ENABLED,
+        breaker=get_llm_breaker(),
+        on_completion=router.record_usage if router is not None else None
     )
-    logger.info(f"instantiate neo4j_service {neo4j_service}")
+
+def create_analyzer() -> QuestionAnalyzer:
+    settings = get_settings()
     analyzer = QuestionAnalyzer(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        neo4j_service=neo4j_service
+        api_key=settings.OPENAI_API_KEY,
+        neo4j_service=get_neo4j_service(),
+        llm_service=create_llm_service(),
+        near_duplicates=get_near_duplicate_index() if settings.NEAR_DUPLICATE_ENABLED else None,
+        router=get_model_router(),
+        related_questions=get_related_question_index() if settings.RELATED_QUESTIONS_ENABLED else None,
+        write_behind=get_write_behind()
     )
-    logger.info(f"analyser instantizted {analyzer}")
-    try:
-        yield analyzer
-    finally:
-        await neo4j_service.close()
+    return analyzer
+
+# Dependency for services
+async def get_analyzer():
+    # The Neo4j service is shared for the life of the app, so nothing to close here
+    return create_analyzer()
 
 class QuestionAnalysis(BaseModel):
     concepts: list[str]
@@ -40,6 +160,33 @@ class QuestionAnalysis(BaseModel):
     techniques: list[str]
     extensions: list[str]
 
+class BatchAnalysisRequest(BaseModel):
+    questions: List[str]
+    batch_size: Optional[int] = None
+
+async def extract_question_text(text: Optional[str], image: Optional[UploadFile]) -> str:
+    """Return the question text, running OCR when an image is uploaded."""
+    if text is None and image is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Either text or image must be provided"
+        )
+
+    if image:
+        # Process image using OCR
+        import pytesseract
+        from PIL import Image
+        contents = await image.read()
+        img = Image.open(io.BytesIO(contents))
+        text = pytesseract.image_to_string(img)
+
+        if not text.strip():
+            raise HTTPException(
+                status_code=400,
+                detail="Could not extract text from image"
+            )
+    return text
+
 @router.post("/", response_model=QuestionAnalysis)
 async def analyze_question(
     text: Optional[str] = None,
@@ -48,29 +195,178 @@ async def analyze_question(
 ):
     logger.info(f"received text {text}")
     try:
-        if text is None and image is None:
-            raise HTTPException(
-                status_code=400,
-                detail="Either text or image must be provided"
-            )
-        
-        if image:
-            # Process image using OCR
-            contents = await image.read()
-            img = Image.open(io.BytesIO(contents))
-            text = pytesseract.image_to_string(img)
-            
-            if not text.strip():
-                raise HTTPException(
-                    status_code=400,
-                    detail="Could not extract text from image"
-                )
+        text = await extract_question_text(text, image)
         logger.info(f"send text to analyzer {text}")
         analysis = await analyzer.analyze_question(text)
         return analysis
     
+    except LLMUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=str(e)
-        )
\ No newline at end of file
+        )
+
+@router.post("/batch", response_model=List[QuestionAnalysis])
+async def analyze_questions_batch(
+    request: BatchAnalysisRequest,
+    analyzer: QuestionAnalyzer = Depends(get_analyzer)
+):
+    """Analyze many questions for bulk loads, packing several into each LLM request."""
+    logger.info(f"received batch of {len(request.questions)} questions")
+    try:
+        return await analyzer.analyze_questions(
+            request.questions,
+            batch_size=request.batch_size or get_settings().ANALYSIS_BATCH_SIZE,
+            concurrency=get_settings().ANALYSIS_BATCH_CONCURRENCY
+        )
+
+    except LLMUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+    except Exception as e:
+        logger.error(traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+async def spool_upload(upload: UploadFile, max_bytes: int, spool_bytes: int) -> tempfile.SpooledTemporaryFile:
+    """Copy an upload in chunks to a temp file that stays in memory up to spool_bytes."""
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+    size = 0
+    while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+        size += len(chunk)
+        if size > max_bytes:
+            spool.close()
+            raise HTTPException(status_code=413, detail=f"Document larger than {max_bytes} bytes")
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+@router.post("/document")
+async def analyze_document(
+    file: UploadFile = File(...),
+    analyzer: QuestionAnalyzer = Depends(get_analyzer)
+):
+    """
+    Analyze every question on a multi-page worksheet (PDF or multi-page image).
+    Pages are OCR'd in parallel worker processes, the text is split into
+    questions on their numbering and the questions are analyzed concurrently.
+    """
+    settings = get_settings()
+    started = time.monotonic()
+    report = DocumentReport()
+    spool = await spool_upload(file, settings.DOCUMENT_MAX_BYTES, settings.DOCUMENT_SPOOL_BYTES)
+    try:
+        with spool:
+            questions = await extract_document_questions(
+                spool,
+                get_ocr_executor(),
+                report,
+                dpi=settings.DOCUMENT_DPI,
+                max_pages=settings.DOCUMENT_MAX_PAGES,
+                window=2 * (settings.DOCUMENT_OCR_WORKERS or os.cpu_count() or 1)
+            )
+        if not questions:
+            raise HTTPException(status_code=400, detail="Could not extract any questions from document")
+
+        analysis_started = time.monotonic()
+        analyses = await analyzer.analyze_questions(
+            [text for _, text in questions],
+            batch_size=settings.ANALYSIS_BATCH_SIZE,
+            concurrency=settings.ANALYSIS_BATCH_CONCURRENCY
+        )
+        report.analysis_seconds = round(time.monotonic() - analysis_started, 3)
+        report.seconds = round(time.monotonic() - started, 3)
+        logger.info(f"Analyzed document {file.filename}: {report.as_dict()}")
+        return {
+            "questions": [
+                {"number": number, "text": text, "analysis": analysis}
+                for (number, text), analysis in zip(questions, analyses)
+            ],
+            "report": report.as_dict()
+        }
+
+    except HTTPException:
+        raise
+    except UnsupportedDocumentError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except LLMUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+    except Exception as e:
+        logger.error(traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/stream")
+async def analyze_question_stream(
+    text: Optional[str] = None,
+    image: Optional[UploadFile] = File(None)
+):
+    """
+    Analyze a question and stream progress as server-sent events:
+    raw -> normalized (one per term) -> analysis -> stored.
+    """
+    logger.info(f"received text {text} for streaming analysis")
+    text = await extract_question_text(text, image)
+
+    async def events() -> AsyncIterator[str]:
+        # The analyzer lives as long as the stream rather than the request handler
+        analyzer = create_analyzer()
+        try:
+            async for event, payload in analyzer.analyze_question_stream(text):
+                if isinstance(payload, BaseModel):
+                    payload = payload.model_dump(mode="json")
+                yield format_sse(event, payload)
+        except Exception as e:
+            logger.error(f"Error in streaming analysis: {traceback.format_exc()}")
+            yield format_sse("error", {"detail": f"Error analyzing question: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+async def get_coalescing_stats():
+    """
+    Report LLM calls saved by coalescing and near-duplicate reuse, the LLM circuit
+    state and, when routing is on, latency and cost per model tier.
+    """
+    router = get_model_router()
+    return {
+        "analysis": analysis_flight.stats(),
+        "normalization": normalization_flight.stats(),
+        "llm_circuit": {"state": get_llm_breaker().state, "rejected": get_llm_breaker().rejected},
+        "near_duplicates": get_near_duplicate_index().stats,
+        "related_questions": get_related_question_index().stats,
+        "model_routing": router.report() if router is not None else None
+    }
+
+@router.get("/write-behind")
+async def get_write_behind_stats():
+    """Flush lag of deferred graph writes: pending entries and the age of the oldest."""
+    write_behind = get_write_behind()
+    if write_behind is None:
+        return {"enabled": False}
+    return {"enabled": True, **write_behind.report()}
@@ -1,12 +1,102 @@
+from functools import lru_cache
+from typing import Optional, Tuple
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     OPENAI_API_KEY: str
+    # Point at any OpenAI-compatible server, e.g. scripts/llm_stub_server.py
+    OPENAI_BASE_URL: Optional[str] = None
     NEO4J_URI: str
     NEO4J_USER: str
     NEO4J_PASSWORD: str
 
+    # LLM provider: "openai", or "local" for an OpenAI-compatible server at OPENAI_BASE_URL
+    LLM_PROVIDER: str = "openai"
+    LLM_MODEL: str = "gpt-4o-mini"
+    # Record/replay cassettes: "record", "replay" or "auto"; unset calls the provider directly
+    LLM_RECORD_MODE: Optional[str] = None
+    LLM_CASSETTE_DIR: str = "cassettes"
+    # Route simple questions and concept-match checks to this model; unset sends everything to LLM_MODEL
+    LLM_SMALL_MODEL: Optional[str] = None
+    LLM_ROUTING_THRESHOLD: float = 0.5
+    # USD per 1k prompt/completion tokens, only used to compare tiers in /stats
+    LLM_MODEL_COSTS: Tuple[float, float] = (0.0, 0.0)
+    LLM_SMALL_MODEL_COSTS: Tuple[float, float] = (0.0, 0.0)
+
+    # LLM call resilience
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_MAX_RETRIES: int = 3
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+
+    # Bulk analysis: questions packed per LLM request and requests in flight
+    ANALYSIS_BATCH_SIZE: int = 10
+    ANALYSIS_BATCH_CONCURRENCY: int = 4
+
+    # Reuse the analysis of near-identical questions (numbers masked)
+    NEAR_DUPLICATE_ENABLED: bool = True
+    NEAR_DUPLICATE_THRESHOLD: float = 0.9
+
+    # Related questions: top-k by concept-set similarity, stored as weighted RELATED_TO edges
+    RELATED_QUESTIONS_ENABLED: bool = True
+    RELATED_QUESTIONS_TOP_K: int = 10
+    RELATED_QUESTIONS_MIN_SIMILARITY: float = 0.2
+
+    # Multi-page worksheet uploads: OCR worker processes (0 = one per CPU) and limits
+    DOCUMENT_OCR_WORKERS: int = 0
+    DOCUMENT_DPI: int = 300
+    DOCUMENT_MAX_PAGES: int = 200
+    DOCUMENT_MAX_BYTES: int = 50 * 1024 * 1024
+    DOCUMENT_SPOOL_BYTES: int = 8 * 1024 * 1024
+
+    # Background graph maintenance; 0 disables the in-process schedule
+    MAINTENANCE_INTERVAL_SECONDS: float = 0.0
+    MAINTENANCE_BATCH_SIZE: int = 1000
+
+    # Memory-mapped concept table shared by all uvicorn workers; unset keeps a per-process cache
+    CONCEPT_REGISTRY_PATH: Optional[str] = None
+    CONCEPT_REGISTRY_REFRESH_SECONDS: float = 60.0
+
+    # Request profiling: a sampled fraction of requests, plus any sent with X-Profile: 1
+    PROFILING_ENABLED: bool = False
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_HEADER_ENABLED: bool = True
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_DIR: str = "profiles"
+    PROFILE_KEEP: int = 200
+
+    # Write-behind persistence: analyses return once journaled, graph writes are flushed in the background
+    WRITE_BEHIND_ENABLED: bool = False
+    WRITE_BEHIND_JOURNAL: str = "data/write_behind.jsonl"
+    WRITE_BEHIND_BATCH_SIZE: int = 200
+    WRITE_BEHIND_INTERVAL_SECONDS: float = 0.5
+    WRITE_BEHIND_FSYNC: bool = True
+    # Failed attempts before an entry is moved to the journal's .dead file
+    WRITE_BEHIND_MAX_ATTEMPTS: int = 10
+
+    # Admission control: per-client token buckets (requests/second, burst), concurrency
+    # limits and bounded queues per traffic class; queued requests past the deadline get 429
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_MAX_CONCURRENCY: int = 64
+    ADMISSION_READ_CONCURRENCY: int = 64
+    ADMISSION_READ_QUEUE: int = 256
+    ADMISSION_READ_DEADLINE_SECONDS: float = 2.0
+    ADMISSION_READ_RATE: float = 50.0
+    ADMISSION_READ_BURST: float = 100.0
+    ADMISSION_ANALYSIS_CONCURRENCY: int = 8
+    ADMISSION_ANALYSIS_QUEUE: int = 64
+    ADMISSION_ANALYSIS_DEADLINE_SECONDS: float = 30.0
+    ADMISSION_ANALYSIS_RATE: float = 1.0
+    ADMISSION_ANALYSIS_BURST: float = 10.0
+    # Rate limits are keyed on the peer address (run uvicorn with --proxy-headers behind a proxy).
+    # Set to a header such as X-Client-Id only if a trusted gateway sets it after authenticating
+    ADMISSION_CLIENT_HEADER: Optional[str] = None
+
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+@lru_cache()
+def get_settings() -> Settings:
+    """Load settings on first use, so importing the app does not require the environment."""
+    return Settings()
@@ -0,0 +1,299 @@
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Traffic classes in priority order: reads are admitted before queued analyses
+READ = "read"
+ANALYSIS = "analysis"
+PRIORITY = (READ, ANALYSIS)
+
+# Never queued or rate limited: probes, debugging and the metrics themselves
+EXEMPT_PREFIXES = ("/healthz", "/readyz", "/debug/", "/docs", "/openapi.json")
+
+
+def classify(scope) -> Optional[str]:
+    """Traffic class of a request, or None if it bypasses admission control."""
+    path = scope["path"]
+    if path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.startswith("/api/v1/questions") and scope["method"] == "POST":
+        return ANALYSIS
+    return READ
+
+
+def client_id(scope, trusted_header: Optional[bytes] = None) -> str:
+    """
+    Key for the per-client rate limits: the peer address, or `trusted_header` when
+    a proxy in front of the app sets it. Identity headers sent by clients are not
+    trusted by default, as rotating them would give every request a fresh bucket.
+    """
+    if trusted_header is not None:
+        for name, value in scope.get("headers", []):
+            if name == trusted_header and value:
+                return value.decode("latin-1")
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class Rejected(Exception):
+    """A request turned away with 429; `reason` is rate_limited, queue_full or deadline."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.clock = clock
+        self.updated = clock()
+
+    def take(self) -> float:
+        """Take a token; returns 0 on success, else the seconds until one is available."""
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ClientLimiter:
+    """Token buckets per client, keeping the most recently seen `max_clients`."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def take(self, client: str) -> float:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket.take()
+
+
+class TrafficClass:
+    """Concurrency limit, bounded wait queue and metrics for one class of requests."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        deadline: float,
+        rate: float,
+        burst: float,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.limiter = ClientLimiter(rate, burst) if rate > 0 else None
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.waits: Deque[float] = deque(maxlen=2000)
+        self.service_seconds = 0.0  # moving average, for Retry-After estimates
+        self.counts = {"admitted": 0, "queued": 0, "rate_limited": 0, "queue_full": 0, "deadline": 0}
+        self.max_depth = 0
+
+    def retry_after(self) -> float:
+        """Rough time for the current queue to drain."""
+        per_slot = self.service_seconds or self.deadline
+        return max(1.0, (len(self.waiters) + 1) * per_slot / self.max_concurrency)
+
+    def report(self) -> Dict:
+        waits = sorted(self.waits)
+
+        def percentile(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[max(0, math.ceil(p * len(waits)) - 1)] * 1000, 1)
+
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": len(self.waiters),
+            "max_queue_depth": self.max_depth,
+            "wait_p50_ms": percentile(0.5),
+            "wait_p95_ms": percentile(0.95),
+            "wait_p99_ms": percentile(0.99),
+            "service_ms": round(self.service_seconds * 1000, 1),
+            **self.counts,
+        }
+
+
+class AdmissionController:
+    """
+    Process-wide admission control, configured by the app lifespan. Off until enabled.
+
+    Each traffic class has a per-client token bucket, a concurrency limit and a
+    bounded FIFO queue. All requests also share `max_concurrency` slots; a freed
+    slot goes to a waiting read before a waiting analysis, and analyses can never
+    take more than their own limit, so reads keep flowing behind an upload burst.
+    A request still queued after its class deadline is shed with 429.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.max_concurrency = 0
+        self.classes: Dict[str, TrafficClass] = {}
+        self.client_header: Optional[bytes] = None
+
+    def enable(self, max_concurrency: int, classes: List[TrafficClass], client_header: Optional[str] = None):
+        self.max_concurrency = max_concurrency
+        self.classes = {traffic.name: traffic for traffic in classes}
+        # ASGI header names are lowercase bytes
+        self.client_header = client_header.lower().encode("latin-1") if client_header else None
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    @property
+    def in_flight(self) -> int:
+        return sum(traffic.in_flight for traffic in self.classes.values())
+
+    def _can_start(self, traffic: TrafficClass) -> bool:
+        return self.in_flight < self.max_concurrency and traffic.in_flight < traffic.max_concurrency
+
+    def _ahead_of(self, traffic: TrafficClass) -> bool:
+        """Whether queued requests should go first: earlier ones of the same class, or higher-priority ones that could start."""
+        for name in PRIORITY:
+            other = self.classes[name]
+            if name == traffic.name:
+                return bool(other.waiters)
+            if other.waiters and self._can_start(other):
+                return True
+        return False
+
+    def _dispatch(self):
+        for name in PRIORITY:
+            traffic = self.classes[name]
+            while traffic.waiters and self._can_start(traffic):
+                waiter = traffic.waiters.popleft()
+                if not waiter.done():
+                    traffic.in_flight += 1
+                    waiter.set_result(None)
+
+    async def acquire(self, name: str, client: str) -> float:
+        """Wait for a slot in the class; returns the queue wait in seconds or raises Rejected."""
+        traffic = self.classes[name]
+        if traffic.limiter is not None:
+            wait = traffic.limiter.take(client)
+            if wait:
+                traffic.counts["rate_limited"] += 1
+                raise Rejected("rate_limited", wait)
+
+        if self._can_start(traffic) and not self._ahead_of(traffic):
+            traffic.in_flight += 1
+            traffic.counts["admitted"] += 1
+            traffic.waits.append(0.0)
+            return 0.0
+
+        if len(traffic.waiters) >= traffic.max_queue:
+            traffic.counts["queue_full"] += 1
+            raise Rejected("queue_full", traffic.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        traffic.waiters.append(waiter)
+        traffic.counts["queued"] += 1
+        traffic.max_depth = max(traffic.max_depth, len(traffic.waiters))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, traffic.deadline)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(name, 0.0)
+            self._forget(traffic, waiter)
+            traffic.counts["deadline"] += 1
+            raise Rejected("deadline", traffic.retry_after())
+        except asyncio.CancelledError:
+            # Client went away while queued; give back a slot granted in the meantime
+            if waiter.done() and not waiter.cancelled():
+                self.release(name, 0.0)
+            self._forget(traffic, waiter)
+            raise
+        waited = time.monotonic() - started
+        traffic.counts["admitted"] += 1
+        traffic.waits.append(waited)
+        return waited
+
+    @staticmethod
+    def _forget(traffic: TrafficClass, waiter: asyncio.Future):
+        try:
+            traffic.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, name: str, service_seconds: float):
+        traffic = self.classes[name]
+        traffic.in_flight -= 1
+        if service_seconds:
+            traffic.service_seconds = 0.9 * traffic.service_seconds + 0.1 * service_seconds \
+                if traffic.service_seconds else service_seconds
+        self._dispatch()
+
+    def report(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "classes": {name: traffic.report() for name, traffic in self.classes.items()},
+        }
+
+
+admission = AdmissionController()
+
+
+class AdmissionMiddleware:
+    """Applies admission control to HTTP requests; passes everything through while disabled."""
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        name = classify(scope) if scope["type"] == "http" and self.controller.enabled else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(name, client_id(scope, self.controller.client_header))
+        except Rejected as e:
+            await self._reject(send, e)
+            return
+
+        started = time.monotonic()
+        try:
+            # The slot is held until the body is sent, so streamed analyses count too
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name, time.monotonic() - started)
+
+    @staticmethod
+    async def _reject(send, rejected: Rejected):
+        body = json.dumps({"detail": f"Server busy ({rejected.reason}), retry later"}).encode()
+        headers: List[Tuple[bytes, bytes]] = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(math.ceil(rejected.retry_after)).encode()),
+        ]
+        await send({"type": "http.response.start", "status": 429, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,104 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Set
+
+
+@dataclass
+class StoredStep:
+    description: Optional[str]
+    concepts_used: FrozenSet[str] = frozenset()
+
+
+@dataclass
+class StoredAnalysis:
+    """The edges of a question as stored in the graph."""
+    concepts: Set[str] = field(default_factory=set)
+    prerequisites: Dict[str, int] = field(default_factory=dict)  # name -> order
+    steps: Dict[int, StoredStep] = field(default_factory=dict)   # step number -> step
+    duplicate_steps: int = 0  # extra SolutionStep nodes sharing a step number
+
+
+@dataclass
+class AnalysisDiff:
+    """The edge changes needed to bring a stored question in line with a new analysis."""
+    add_concepts: List[str] = field(default_factory=list)
+    remove_concepts: List[str] = field(default_factory=list)
+    set_prerequisites: List[Dict[str, Any]] = field(default_factory=list)  # {name, index}
+    remove_prerequisites: List[str] = field(default_factory=list)
+    upsert_steps: List[Dict[str, Any]] = field(default_factory=list)  # {step, description}
+    remove_steps: List[int] = field(default_factory=list)
+    add_step_concepts: List[Dict[str, Any]] = field(default_factory=list)  # {step, concept}
+    remove_step_concepts: List[Dict[str, Any]] = field(default_factory=list)
+    dedupe_steps: bool = False
+
+    def is_empty(self) -> bool:
+        return not (
+            self.add_concepts or self.remove_concepts
+            or self.set_prerequisites or self.remove_prerequisites
+            or self.upsert_steps or self.remove_steps
+            or self.add_step_concepts or self.remove_step_concepts
+            or self.dedupe_steps
+        )
+
+
+def stored_from_analysis(concepts: List[str], prerequisites: List[str], solution_steps: List[Dict]) -> StoredAnalysis:
+    """What the graph holds for a question once an analysis is fully written."""
+    steps = {}
+    for index, step in enumerate(solution_steps):
+        steps[step.get("step", index + 1)] = StoredStep(
+            description=step.get("description"),
+            concepts_used=frozenset(step.get("concepts_used") or [])
+        )
+    return StoredAnalysis(
+        concepts=set(concepts),
+        # A prerequisite listed twice keeps its first position
+        prerequisites={name: index for index, name in reversed(list(enumerate(prerequisites)))},
+        steps=steps
+    )
+
+
+def stored_from_graph(record: Dict[str, Any]) -> StoredAnalysis:
+    """Build a StoredAnalysis from a STORED_ANALYSIS_QUERY record."""
+    steps: Dict[int, StoredStep] = {}
+    duplicate_steps = 0
+    for step in record["steps"]:
+        number = step["number"]
+        if number in steps:
+            duplicate_steps += 1
+            used = steps[number].concepts_used | frozenset(step["concepts_used"])
+            steps[number] = StoredStep(steps[number].description, used)
+        else:
+            steps[number] = StoredStep(step["description"], frozenset(step["concepts_used"]))
+    return StoredAnalysis(
+        concepts=set(record["concepts"]),
+        prerequisites={p["name"]: p["order"] for p in record["prerequisites"]},
+        steps=steps,
+        duplicate_steps=duplicate_steps
+    )
+
+
+def diff_analysis(stored: StoredAnalysis, target: StoredAnalysis) -> AnalysisDiff:
+    # Once duplicate steps are collapsed we cannot tell which copy survived,
+    # so every target step is rewritten in full
+    rewrite_steps = stored.duplicate_steps > 0
+    diff = AnalysisDiff(
+        add_concepts=sorted(target.concepts - stored.concepts),
+        remove_concepts=sorted(stored.concepts - target.concepts),
+        set_prerequisites=[
+            {"name": name, "index": index}
+            for name, index in sorted(target.prerequisites.items())
+            if stored.prerequisites.get(name) != index
+        ],
+        remove_prerequisites=sorted(set(stored.prerequisites) - set(target.prerequisites)),
+        remove_steps=sorted(set(stored.steps) - set(target.steps)),
+        dedupe_steps=stored.duplicate_steps > 0
+    )
+    for number, step in sorted(target.steps.items()):
+        current = stored.steps.get(number)
+        if rewrite_steps or current is None or current.description != step.description:
+            diff.upsert_steps.append({"step": number, "description": step.description})
+        used = current.concepts_used if current else frozenset()
+        added = step.concepts_used if rewrite_steps else step.concepts_used - used
+        diff.add_step_concepts += [{"step": number, "concept": c} for c in sorted(added)]
+        diff.remove_step_concepts += [{"step": number, "concept": c} for c in sorted(used - step.concepts_used)]
+    return diff
+
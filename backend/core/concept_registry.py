@@ -0,0 +1,180 @@
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+from typing import Dict, FrozenSet, Iterable, Iterator, Mapping, Optional, Set
+
+import numpy as np
+
+MAGIC = b"CREG"
+VERSION = 1
+# magic, version, generation, strings, concepts, alternative refs, lookup forms
+HEADER = struct.Struct("<4sIQIIII")
+U32 = np.dtype("<u4")
+
+
+def _form_key(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def write_registry(path: str, concepts: Mapping[str, Iterable[str]], generation: int) -> int:
+    """
+    Write a concept -> alternative forms table as a read-only registry file and
+    publish it atomically. Returns the file size in bytes.
+
+    Layout after the header, all little-endian uint32 arrays followed by the
+    UTF-8 string blob:
+      string_offsets[n_strings + 1]   sorted, interned strings
+      concept_ids[n_concepts]         string id of each concept name, sorted
+      alt_offsets[n_concepts + 1]     slice of alt_ids per concept
+      alt_ids[n_alt_refs]             string ids of alternative forms
+      form_keys[n_forms]              string ids of lowercased names and forms, sorted
+      form_concepts[n_forms]          concept index each form resolves to
+    """
+    names = sorted(concepts)
+    alternatives = {name: sorted(set(concepts[name]) - {name}) for name in names}
+
+    # A concept's own name wins over another concept's alternative form
+    forms: Dict[str, int] = {}
+    for index, name in enumerate(names):
+        forms.setdefault(_form_key(name), index)
+    for index, name in enumerate(names):
+        for alternative in alternatives[name]:
+            forms.setdefault(_form_key(alternative), index)
+
+    strings = set(names) | set(forms)
+    for alts in alternatives.values():
+        strings.update(alts)
+    encoded = sorted(s.encode("utf-8") for s in strings)
+    string_id = {s.decode("utf-8"): i for i, s in enumerate(encoded)}
+
+    string_offsets = np.zeros(len(encoded) + 1, dtype=U32)
+    string_offsets[1:] = np.cumsum([len(s) for s in encoded])
+    concept_ids = np.array([string_id[n] for n in names], dtype=U32)
+    alt_offsets = np.zeros(len(names) + 1, dtype=U32)
+    alt_offsets[1:] = np.cumsum([len(alternatives[n]) for n in names])
+    alt_ids = np.array([string_id[a] for n in names for a in alternatives[n]], dtype=U32)
+    form_items = sorted((string_id[form], index) for form, index in forms.items())
+    form_keys = np.array([k for k, _ in form_items], dtype=U32)
+    form_concepts = np.array([c for _, c in form_items], dtype=U32)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, generation, len(encoded), len(names), len(alt_ids), len(form_items)
+    )
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".registry-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            for array in (string_offsets, concept_ids, alt_offsets, alt_ids, form_keys, form_concepts):
+                f.write(array.tobytes())
+            f.write(b"".join(encoded))
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return size
+
+
+class _Strings:
+    """Sequence view of the interned strings as bytes, for bisect."""
+
+    def __init__(self, buffer: mmap.mmap, offsets: np.ndarray, base: int):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._base = base
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> bytes:
+        return self._buffer[self._base + int(self._offsets[index]):self._base + int(self._offsets[index + 1])]
+
+
+class ConceptRegistry(Mapping):
+    """
+    Read-only concept table mapped from a registry file. Every process that
+    opens the same file shares its pages; nothing is copied onto the heap
+    until a string is actually read.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            stat = os.fstat(f.fileno())
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+        magic, version, generation, n_strings, n_concepts, n_alt_refs, n_forms = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} concept registry")
+        self.generation = generation
+
+        offset = HEADER.size
+
+        def take(count: int) -> np.ndarray:
+            nonlocal offset
+            array = np.frombuffer(self._buffer, dtype=U32, count=count, offset=offset)
+            offset += count * U32.itemsize
+            return array
+
+        self._string_offsets = take(n_strings + 1)
+        self._concept_ids = take(n_concepts)
+        self._alt_offsets = take(n_concepts + 1)
+        self._alt_ids = take(n_alt_refs)
+        self._form_keys = take(n_forms)
+        self._form_concepts = take(n_forms)
+        self._strings = _Strings(self._buffer, self._string_offsets, offset)
+        if offset + int(self._string_offsets[-1]) != len(self._buffer):
+            raise ValueError(f"{path} is truncated or corrupt")
+
+    def _string(self, string_id: int) -> str:
+        return self._strings[string_id].decode("utf-8")
+
+    def _string_id(self, text: str) -> Optional[int]:
+        key = text.encode("utf-8")
+        index = bisect.bisect_left(self._strings, key)
+        if index < len(self._strings) and self._strings[index] == key:
+            return index
+        return None
+
+    def _concept_index(self, name: str) -> Optional[int]:
+        string_id = self._string_id(name)
+        if string_id is None:
+            return None
+        index = int(np.searchsorted(self._concept_ids, U32.type(string_id)))  # same dtype: no array copy
+        if index < len(self._concept_ids) and self._concept_ids[index] == string_id:
+            return index
+        return None
+
+    def __len__(self) -> int:
+        return len(self._concept_ids)
+
+    def __iter__(self) -> Iterator[str]:
+        for string_id in self._concept_ids:
+            yield self._string(int(string_id))
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and self._concept_index(name) is not None
+
+    def __getitem__(self, name: str) -> FrozenSet[str]:
+        index = self._concept_index(name)
+        if index is None:
+            raise KeyError(name)
+        start, end = int(self._alt_offsets[index]), int(self._alt_offsets[index + 1])
+        return frozenset([name] + [self._string(int(i)) for i in self._alt_ids[start:end]])
+
+    def lookup(self, form: str) -> Optional[str]:
+        """The concept whose name or alternative form equals `form`, ignoring case and spacing."""
+        string_id = self._string_id(_form_key(form))
+        if string_id is None:
+            return None
+        index = int(np.searchsorted(self._form_keys, U32.type(string_id)))
+        if index < len(self._form_keys) and self._form_keys[index] == string_id:
+            return self._string(int(self._concept_ids[self._form_concepts[index]]))
+        return None
+
+    def to_dict(self) -> Dict[str, Set[str]]:
+        return {name: set(self[name]) for name in self}
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import re
+import time
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A rendered page as sent to OCR workers: PIL mode, (width, height), raw pixels.
+# Raw bytes pickle cheaply; the worker rebuilds the image without decoding.
+RenderedPage = Tuple[str, Tuple[int, int], bytes]
+
+# A question number at the start of a line: "3.", "3)", "(3)", "Q3", "Q3.", "Question 3:"
+QUESTION_NUMBER = re.compile(
+    r"^[ \t]*(?:(?:Q(?:uestion)?[ \t]*)(\d{1,3})[.):]?|\((\d{1,3})\)|(\d{1,3})[.)])(?=\s)",
+    re.IGNORECASE | re.MULTILINE
+)
+
+
+class UnsupportedDocumentError(ValueError):
+    """The upload is not a PDF or image this server can rasterize."""
+
+
+@dataclass
+class DocumentReport:
+    pages: int = 0
+    questions: int = 0
+    ocr_seconds: float = 0.0
+    pages_per_second: float = 0.0
+    analysis_seconds: float = 0.0
+    seconds: float = 0.0
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def split_questions(text: str) -> List[Tuple[int, str]]:
+    """
+    Split worksheet text into (number, question) pairs on numbering at line starts.
+
+    Numbers must run in sequence, so a line inside a question that happens to
+    start with "2)" (a sub-step, an equation) does not start a new question.
+    Text before the first number (titles, name fields) is dropped; text with
+    no numbering at all is returned as a single question.
+    """
+    starts = []
+    expected = None
+    for match in QUESTION_NUMBER.finditer(text):
+        number = int(next(group for group in match.groups() if group))
+        if expected is None or number == expected:
+            starts.append((number, match.start(), match.end()))
+            expected = number + 1
+
+    if not starts:
+        stripped = text.strip()
+        return [(1, stripped)] if stripped else []
+
+    questions = []
+    for i, (number, _, body_start) in enumerate(starts):
+        end = starts[i + 1][1] if i + 1 < len(starts) else len(text)
+        body = " ".join(text[body_start:end].split())
+        if body:
+            questions.append((number, body))
+    return questions
+
+
+def detect_kind(head: bytes) -> str:
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    return "image"
+
+
+def iter_rendered_pages(document: BinaryIO, kind: str, dpi: int = 300, max_pages: Optional[int] = None) -> Iterator[RenderedPage]:
+    """Rasterize each page to grayscale: PDF pages with pypdfium2, image frames (multi-page TIFF) with PIL."""
+    if kind == "pdf":
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            raise UnsupportedDocumentError("PDF uploads require pypdfium2 to be installed")
+        pdf = pdfium.PdfDocument(document)
+        try:
+            for index in range(min(len(pdf), max_pages or len(pdf))):
+                page = pdf[index]
+                image = page.render(scale=dpi / 72, grayscale=True).to_pil().convert("L")
+                page.close()
+                yield image.mode, image.size, image.tobytes()
+        finally:
+            pdf.close()
+        return
+
+    from PIL import Image, ImageSequence, UnidentifiedImageError
+    try:
+        image = Image.open(document)
+    except UnidentifiedImageError:
+        raise UnsupportedDocumentError("Upload is neither a PDF nor a readable image")
+    for index, frame in enumerate(ImageSequence.Iterator(image)):
+        if max_pages is not None and index >= max_pages:
+            break
+        frame = frame.convert("L")
+        yield frame.mode, frame.size, frame.tobytes()
+
+
+def ocr_page(page: RenderedPage) -> str:
+    """OCR one rendered page; runs in a worker process."""
+    import pytesseract
+    from PIL import Image
+    mode, size, data = page
+    return pytesseract.image_to_string(Image.frombytes(mode, size, data))
+
+
+async def ocr_document(
+    document: BinaryIO,
+    executor: Executor,
+    dpi: int = 300,
+    max_pages: Optional[int] = None,
+    window: int = 8,
+    ocr: Callable[[RenderedPage], str] = ocr_page
+) -> List[str]:
+    """
+    OCR every page of a document in parallel, returning page texts in order.
+
+    Pages are rendered one at a time off the event loop and handed to the
+    executor as they are ready, with at most `window` pages in flight so a
+    long document never holds all of its rasters in memory.
+    """
+    head = document.read(8)
+    document.seek(0)
+    pages = iter_rendered_pages(document, detect_kind(head), dpi=dpi, max_pages=max_pages)
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(window)
+    tasks: List[asyncio.Future] = []
+
+    async def run(page: RenderedPage) -> str:
+        try:
+            return await loop.run_in_executor(executor, ocr, page)
+        finally:
+            slots.release()
+
+    try:
+        while True:
+            await slots.acquire()
+            page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                slots.release()
+                break
+            tasks.append(asyncio.ensure_future(run(page)))
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    finally:
+        try:
+            pages.close()
+        except ValueError:
+            # Cancelled while a worker thread was still rendering; it stops on its own
+            pass
+
+
+async def extract_document_questions(
+    document: BinaryIO,
+    executor: Executor,
+    report: DocumentReport,
+    dpi: int = 300,
+    max_pages: Optional[int] = None,
+    window: int = 8,
+    ocr: Callable[[RenderedPage], str] = ocr_page
+) -> List[Tuple[int, str]]:
+    """OCR a document and split it into numbered questions, filling in the OCR part of `report`."""
+    started = time.monotonic()
+    texts = await ocr_document(document, executor, dpi=dpi, max_pages=max_pages, window=window, ocr=ocr)
+    report.pages = len(texts)
+    report.ocr_seconds = round(time.monotonic() - started, 3)
+    report.pages_per_second = round(report.pages / report.ocr_seconds, 2) if report.ocr_seconds else 0.0
+    # Questions may run across page breaks, so split the document as a whole
+    questions = split_questions("\n".join(texts))
+    report.questions = len(questions)
+    logger.info(f"OCR'd {report.pages} pages at {report.pages_per_second} pages/s into {report.questions} questions")
+    return questions
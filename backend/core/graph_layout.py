@@ -0,0 +1,219 @@
+import hashlib
+import heapq
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Edge = (source_id, target_id, type, weight)
+Edge = Tuple[str, str, str, float]
+
+
+def prune_subgraph(center: str, edges: List[Edge], max_nodes: int, max_edges: int) -> List[Edge]:
+    """
+    Level-of-detail pruning: grow a maximum-weight spanning tree out from the
+    center until `max_nodes` nodes are reached, then spend the remaining edge
+    budget on the heaviest edges between nodes already kept. The result is
+    always connected to the center.
+    """
+    adjacency: Dict[str, List[int]] = {}
+    for index, (source, target, _, _) in enumerate(edges):
+        adjacency.setdefault(source, []).append(index)
+        adjacency.setdefault(target, []).append(index)
+
+    kept_nodes = {center}
+    kept_edges = set()
+    frontier = [(-edges[i][3], i) for i in adjacency.get(center, [])]
+    heapq.heapify(frontier)
+    while frontier and len(kept_nodes) < max_nodes and len(kept_edges) < max_edges:
+        _, index = heapq.heappop(frontier)
+        source, target, _, _ = edges[index]
+        new = target if source in kept_nodes else source
+        if new in kept_nodes:
+            continue
+        kept_nodes.add(new)
+        kept_edges.add(index)
+        for neighbour in adjacency[new]:
+            if neighbour not in kept_edges:
+                heapq.heappush(frontier, (-edges[neighbour][3], neighbour))
+
+    extra = sorted(
+        (i for i, (s, t, _, _) in enumerate(edges)
+         if i not in kept_edges and s in kept_nodes and t in kept_nodes),
+        key=lambda i: -edges[i][3]
+    )
+    kept_edges.update(extra[:max(0, max_edges - len(kept_edges))])
+    return [edges[i] for i in sorted(kept_edges)]
+
+
+def force_layout(
+    node_count: int,
+    edge_index: np.ndarray,
+    weights: np.ndarray,
+    iterations: int = 150,
+    pinned: Optional[int] = 0,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Fruchterman-Reingold layout, vectorised over all node pairs. Returns an
+    (n, 2) array of positions in roughly [-1, 1]; `pinned` stays at the origin.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-1.0, 1.0, size=(node_count, 2))
+    if node_count <= 1:
+        return np.zeros((node_count, 2))
+    if pinned is not None:
+        positions[pinned] = 0.0
+
+    k = np.sqrt(4.0 / node_count)  # ideal edge length for a 2x2 canvas
+    temperature = 0.2
+    cooling = temperature / (iterations + 1)
+    weights = weights / max(float(weights.max()), 1e-9) if len(weights) else weights
+
+    for _ in range(iterations):
+        delta = positions[:, None, :] - positions[None, :, :]
+        distance = np.linalg.norm(delta, axis=-1)
+        np.fill_diagonal(distance, 1.0)
+        distance = np.maximum(distance, 1e-3)
+        # Repulsion between every pair
+        displacement = ((k * k / distance ** 2)[:, :, None] * delta).sum(axis=1)
+        # Attraction along edges, stronger for heavier edges
+        if len(edge_index):
+            src, dst = edge_index[:, 0], edge_index[:, 1]
+            edge_delta = positions[src] - positions[dst]
+            edge_distance = np.maximum(np.linalg.norm(edge_delta, axis=-1), 1e-3)
+            pull = (edge_distance / k * (0.5 + weights))[:, None] * edge_delta
+            np.add.at(displacement, src, -pull)
+            np.add.at(displacement, dst, pull)
+
+        length = np.maximum(np.linalg.norm(displacement, axis=-1), 1e-9)
+        positions += displacement / length[:, None] * np.minimum(length, temperature)[:, None]
+        if pinned is not None:
+            positions[pinned] = 0.0
+        temperature -= cooling
+
+    scale = np.abs(positions).max()
+    return positions / scale if scale > 0 else positions
+
+
+def fingerprint(center: str, node_ids: List[str], edges: List[Edge]) -> str:
+    """Identifies one generation of a subgraph: any node or edge change yields a new key."""
+    digest = hashlib.sha1(center.encode("utf-8"))
+    for node_id in node_ids:
+        digest.update(b"\x00n" + node_id.encode("utf-8"))
+    for source, target, rel_type, weight in edges:
+        digest.update(f"\x00e{source}\x01{target}\x01{rel_type}\x01{weight:.4f}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LayoutCache:
+    """LRU of computed positions keyed by subgraph fingerprint. Safe to share across threads."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            positions = self._entries.get(key)
+            if positions is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return positions
+
+    def put(self, key: str, positions: np.ndarray):
+        with self._lock:
+            self._entries[key] = positions
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+layout_cache = LayoutCache()
+
+
+def node_type(labels: List[str]) -> str:
+    for label, kind in (
+        ("Question", "question"),
+        ("SolutionStep", "step"),
+        ("AlternativeForm", "alternative"),
+        ("Technique", "technique"),
+        ("Prerequisite", "prerequisite"),
+        ("Concept", "concept"),
+    ):
+        if label in labels:
+            return kind
+    return "other"
+
+
+def build_subgraph_view(
+    center: str,
+    nodes: Dict[str, Dict],
+    edges: List[Edge],
+    max_nodes: int = 150,
+    max_edges: int = 400,
+    cache: Optional[LayoutCache] = None,
+    scale: float = 300.0,
+    complete: bool = True
+) -> Dict:
+    """
+    Prune a deduplicated neighbourhood and attach node positions.
+    `nodes` maps node id -> {"label", "labels"}; edges may contain duplicates.
+    `complete` is false if the neighbourhood was already capped when fetched,
+    in which case the totals are lower bounds.
+    """
+    cache = cache if cache is not None else layout_cache
+    unique = {}
+    for source, target, rel_type, weight in edges:
+        if source == target or source not in nodes or target not in nodes:
+            continue
+        key = (source, target, rel_type)
+        unique[key] = max(unique.get(key, weight), weight)
+    all_edges = [(s, t, r, w) for (s, t, r), w in sorted(unique.items())]
+
+    kept = prune_subgraph(center, all_edges, max_nodes, max_edges)
+    node_ids = [center] + sorted({n for s, t, _, _ in kept for n in (s, t)} - {center})
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    key = fingerprint(center, node_ids, kept)
+    positions = cache.get(key)
+    if positions is None:
+        edge_index = np.array([(index[s], index[t]) for s, t, _, _ in kept], dtype=np.int64).reshape(-1, 2)
+        weights = np.array([w for _, _, _, w in kept], dtype=np.float64)
+        positions = force_layout(len(node_ids), edge_index, weights, pinned=0)
+        cache.put(key, positions)
+
+    return {
+        "center": center,
+        "nodes": [
+            {
+                "id": node_id,
+                "label": nodes[node_id]["label"],
+                "type": "main" if node_id == center else node_type(nodes[node_id]["labels"]),
+                "x": round(float(positions[i][0]) * scale, 1),
+                "y": round(float(positions[i][1]) * scale, 1),
+            }
+            for i, node_id in enumerate(node_ids)
+        ],
+        "edges": [
+            {"source": s, "target": t, "type": r, "weight": w}
+            for s, t, r, w in kept
+        ],
+        "total_nodes": len({n for s, t, _, _ in all_edges for n in (s, t)} | {center}),
+        "total_edges": len(all_edges),
+        "totals_exact": complete,
+        "truncated": len(kept) < len(all_edges) or not complete,
+        "generation": key[:12],
+    }
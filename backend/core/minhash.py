@@ -0,0 +1,95 @@
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Set
+
+import numpy as np
+
+# Mersenne prime used for the universal hash family
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def char_shingles(text: str, k: int = 4) -> Set[str]:
+    """Overlapping k-character shingles; texts shorter than k form a single shingle."""
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHasher:
+    """MinHash signatures whose agreement rate estimates Jaccard similarity of sets."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        self.num_perm = num_perm
+        rng = np.random.RandomState(seed)
+        # a * x + b stays below 2**64 for 32-bit x, so uint64 arithmetic cannot overflow
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, items: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(item.encode("utf-8")) for item in items),
+            dtype=np.uint64
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return permuted.min(axis=0)
+
+    @staticmethod
+    def similarity(a: np.ndarray, b: np.ndarray) -> float:
+        return float(np.mean(a == b))
+
+
+class LSHIndex:
+    """
+    Banded locality-sensitive hashing over MinHash signatures.
+
+    Signatures are split into `bands` bands; keys sharing any band are candidates.
+    With r = num_perm / bands rows per band, pairs above roughly
+    (1 / bands) ** (1 / r) similarity are likely to collide.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.signatures: Dict[Hashable, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[Hashable]]] = [defaultdict(set) for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.signatures
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def add(self, key: Hashable, signature: np.ndarray):
+        if key in self.signatures:
+            self.remove(key)
+        self.signatures[key] = signature
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band][band_key].add(key)
+
+    def remove(self, key: Hashable):
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, band_key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    def candidates(self, signature: np.ndarray) -> Set[Hashable]:
+        found: Set[Hashable] = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            found |= self._buckets[band].get(band_key, set())
+        return found
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import re
+from typing import Optional, Tuple
+
+from backend.core.minhash import LSHIndex, MinHasher, char_shingles
+
+logger = logging.getLogger(__name__)
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def mask_question_text(text: str) -> str:
+    """
+    Canonical form for near-duplicate matching: lowercased, numbers masked
+    and whitespace removed, so "Solve 2x+5=13" and "Solve 3x + 4 = 19" coincide.
+    """
+    return _WHITESPACE.sub("", _NUMBER.sub("#", text.lower()))
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index over masked question text, kept in step with the
+    Question nodes in the graph. Loaded from Neo4j on first use and
+    updated as questions are stored.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, bands: int = 16, shingle_size: int = 4):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.lsh = LSHIndex(num_perm=num_perm, bands=bands)
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        self.stats = {"lookups": 0, "matches": 0}
+
+    def __contains__(self, question_text: str) -> bool:
+        return question_text in self.lsh
+
+    def _signature(self, question_text: str):
+        return self.hasher.signature(char_shingles(mask_question_text(question_text), self.shingle_size))
+
+    def add(self, question_text: str):
+        self.lsh.add(question_text, self._signature(question_text))
+
+    def remove(self, question_text: str):
+        self.lsh.remove(question_text)
+
+    def find(self, question_text: str) -> Optional[Tuple[str, float]]:
+        """
+        Return the most similar indexed question at or above the threshold, with
+        its estimated similarity. The question itself never matches, so an exact
+        resubmission is still re-analyzed.
+        """
+        self.stats["lookups"] += 1
+        signature = self._signature(question_text)
+        best: Optional[Tuple[str, float]] = None
+        for candidate in self.lsh.candidates(signature):
+            if candidate == question_text:
+                continue
+            similarity = self.hasher.similarity(signature, self.lsh.signatures[candidate])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        if best is not None:
+            self.stats["matches"] += 1
+        return best
+
+    async def ensure_loaded(self, neo4j_service):
+        """Build the index from the Question nodes in the graph, once per process."""
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if self.loaded:
+                return
+            questions = await neo4j_service.get_all_questions()
+            for question in questions:
+                if question["text"]:
+                    self.add(question["text"])
+            self.loaded = True
+            logger.info(f"Near-duplicate index loaded with {len(self.lsh)} questions")
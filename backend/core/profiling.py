@@ -0,0 +1,333 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import sysconfig
+import threading
+import time
+import types
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+_PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+_LIBRARY_ROOTS = ("site-packages" + os.sep, "dist-packages" + os.sep)
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+
+
+def _short_path(filename: str) -> str:
+    for root in _LIBRARY_ROOTS:
+        if root in filename:
+            return filename.split(root, 1)[1]
+    cwd = os.getcwd() + os.sep
+    if filename.startswith(cwd):
+        return filename[len(cwd):]
+    return os.path.basename(filename)
+
+
+def _is_library(filename: str) -> bool:
+    return filename.startswith(_STDLIB) or any(root in filename for root in _LIBRARY_ROOTS)
+
+
+def _frame_label(code: types.CodeType) -> str:
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _describe(frame: types.FrameType) -> str:
+    return f"{frame.f_code.co_name} ({_short_path(frame.f_code.co_filename)}:{frame.f_lineno})"
+
+
+def _is_idle_worker(frame: types.FrameType) -> bool:
+    # A thread pool worker waiting for work; sampling it only adds noise
+    code = frame.f_code
+    return code.co_name == "_worker" and code.co_filename.endswith(os.path.join("futures", "thread.py"))
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of every thread from a background thread at a
+    fixed interval, counting collapsed stacks ("outer;...;inner"). The event
+    loop thread is labelled so time it spends blocked in sync code stands out
+    from time spent in worker threads.
+    """
+
+    def __init__(self, interval: float = 0.005, loop_thread_id: Optional[int] = None):
+        self.interval = interval
+        self.loop_thread_id = loop_thread_id if loop_thread_id is not None else threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or _is_idle_worker(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                thread = "event-loop" if thread_id == self.loop_thread_id else names.get(thread_id, str(thread_id))
+                stack.append(thread)
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Folded stacks, the input format of flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class AwaitTimings:
+    """Time a coroutine spent running versus suspended, per suspension point."""
+
+    def __init__(self):
+        self.points: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "wait_s": 0.0, "run_s": 0.0})
+        self.run_s = 0.0
+        self.wait_s = 0.0
+
+    def record(self, where: str, run: float, wait: float):
+        point = self.points[where]
+        point["count"] += 1
+        point["run_s"] += run
+        point["wait_s"] += wait
+        self.run_s += run
+        self.wait_s += wait
+
+    def report(self, top: int = 50) -> List[Dict]:
+        ranked = sorted(self.points.items(), key=lambda item: item[1]["wait_s"], reverse=True)[:top]
+        return [
+            {"at": where, "count": p["count"], "wait_ms": round(p["wait_s"] * 1000, 3), "run_ms": round(p["run_s"] * 1000, 3)}
+            for where, p in ranked
+        ]
+
+
+def _suspension_point(coro) -> str:
+    """
+    Describe where a suspended coroutine is waiting: the innermost frame of
+    application code, followed by the innermost frame overall when that is in a library.
+    """
+    own = leaf = None
+    awaitable = coro
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is not None:
+            leaf = frame
+            if not _is_library(frame.f_code.co_filename):
+                own = frame
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    if leaf is None:
+        return "<unknown>"
+    if own is None or own is leaf:
+        return _describe(leaf)
+    return f"{_describe(own)} -> {_describe(leaf)}"
+
+
+@types.coroutine
+def trace_awaits(coro, timings: AwaitTimings):
+    """
+    Drive `coro` step by step, recording how long each step ran on the event
+    loop and how long it then stayed suspended, keyed by where it suspended.
+    Yielded futures pass through untouched, so the running task behaves as usual.
+    """
+    value, error = None, None
+    while True:
+        started = time.perf_counter()
+        try:
+            yielded = coro.throw(error) if error is not None else coro.send(value)
+        except StopIteration as stop:
+            timings.record("<return>", time.perf_counter() - started, 0.0)
+            return stop.value
+        except BaseException:
+            timings.record("<raise>", time.perf_counter() - started, 0.0)
+            raise
+        run = time.perf_counter() - started
+        where = _suspension_point(coro)
+        suspended = time.perf_counter()
+        try:
+            value, error = (yield yielded), None
+        except GeneratorExit:
+            coro.close()
+            raise
+        except BaseException as e:
+            value, error = None, e
+        timings.record(where, run, time.perf_counter() - suspended)
+
+
+class ProfileStore:
+    """Profiles saved as <id>.json (metadata and await timings) plus <id>.collapsed, oldest pruned first."""
+
+    def __init__(self, directory: str, keep: int = 200):
+        self.directory = directory
+        self.keep = keep
+
+    def new_id(self) -> str:
+        return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        if not _PROFILE_ID.match(profile_id):
+            raise KeyError(profile_id)
+        return os.path.join(self.directory, f"{profile_id}{suffix}")
+
+    def save(self, profile_id: str, meta: Dict, collapsed: str):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(profile_id, ".collapsed"), "w", encoding="utf-8") as f:
+            f.write(collapsed)
+        # The JSON is written last and atomically, so listed profiles are always complete
+        tmp_path = self._path(profile_id, ".json") + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
+        os.replace(tmp_path, self._path(profile_id, ".json"))
+        self._prune()
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        ids = (name[:-5] for name in names if name.endswith(".json"))
+        return sorted((profile_id for profile_id in ids if _PROFILE_ID.match(profile_id)), reverse=True)
+
+    def _prune(self):
+        for profile_id in self._ids()[self.keep:]:
+            for suffix in (".json", ".collapsed"):
+                try:
+                    os.unlink(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list(self, limit: int = 100) -> List[Dict]:
+        summaries = []
+        for profile_id in self._ids()[:limit]:
+            meta = self.get(profile_id)
+            if meta is not None:
+                summaries.append({key: meta[key] for key in ("id", "method", "path", "status", "duration_ms", "samples")})
+        return summaries
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        try:
+            with open(self._path(profile_id, ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (KeyError, FileNotFoundError):
+            return None
+
+    def collapsed(self, profile_id: str) -> Optional[str]:
+        try:
+            with open(self._path(profile_id, ".collapsed"), encoding="utf-8") as f:
+                return f.read()
+        except (KeyError, FileNotFoundError):
+            return None
+
+
+class ProfilingConfig:
+    """Process-wide profiling switch, set from settings by the app lifespan. Off until enabled."""
+
+    def __init__(self):
+        self.store: Optional[ProfileStore] = None
+        self.sample_rate = 0.0
+        self.interval = 0.005
+        self.allow_header = True
+        self.in_flight = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None
+
+    def enable(self, store: ProfileStore, sample_rate: float = 0.0, interval: float = 0.005,
+               allow_header: bool = True):
+        self.store = store
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.allow_header = allow_header
+
+    def disable(self):
+        self.store = None
+
+    def wants_profile(self, scope) -> bool:
+        if not self.enabled or scope["type"] != "http" or scope["path"].startswith("/debug/"):
+            return False
+        if self.allow_header:
+            for name, value in scope.get("headers", []):
+                if name == PROFILE_HEADER.encode() and value in (b"1", b"true"):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+
+profiling = ProfilingConfig()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a sample of HTTP requests: a random `sample_rate` fraction, plus any
+    request sent with an `X-Profile: 1` header. Other requests pass straight through.
+
+    A profiled request gets a stack sampler over all threads and per-await timings
+    of its own coroutine. Concurrent requests share the event loop, so its stacks
+    may include their work too; `in_flight` in the saved metadata says how many there were.
+    """
+
+    def __init__(self, app, config: ProfilingConfig = profiling):
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope, receive, send):
+        if not self.config.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        store = self.config.store
+        profile_id = store.new_id()
+        status = {"code": None}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        timings = AwaitTimings()
+        sampler = StackSampler(self.config.interval)
+        self.config.in_flight += 1
+        in_flight = self.config.in_flight
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await trace_awaits(self.app(scope, receive, send_with_id), timings)
+        finally:
+            sampler.stop()
+            duration = time.perf_counter() - started
+            self.config.in_flight -= 1
+            meta = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status["code"],
+                "duration_ms": round(duration * 1000, 3),
+                "loop_run_ms": round(timings.run_s * 1000, 3),
+                "awaiting_ms": round(timings.wait_s * 1000, 3),
+                "samples": sampler.samples,
+                "interval_ms": self.config.interval * 1000,
+                "in_flight": in_flight,
+                "awaits": timings.report(),
+            }
+            try:
+                await asyncio.to_thread(store.save, profile_id, meta, sampler.collapsed())
+            except OSError as e:
+                logger.warning(f"Could not save profile {profile_id}: {e}")
+            logger.info(f"Profiled {scope['method']} {scope['path']} in {duration * 1000:.0f}ms as {profile_id}")
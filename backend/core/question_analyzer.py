@@ -1,8 +1,16 @@
-from typing import Any, Dict, List, Optional
-from pydantic import BaseModel
-import openai
-from backend.services.concept_normalization_service import ConceptNormalizerService
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import BaseModel, ValidationError
+from backend.services.concept_normalization_service import ConceptMatch, ConceptNormalizerService
 from backend.services.neo4j_service import Neo4jService
+from backend.services.llm_service import LLMService, LLMUnavailableError
+from backend.services.llm_providers import OpenAIProvider
+from backend.services.model_router import ModelRouter
+from backend.core.analysis_diff import stored_from_analysis
+from backend.core.near_duplicate import NearDuplicateIndex
+from backend.core.related_questions import RelatedQuestionIndex
+from backend.core.singleflight import SingleFlight, normalize_question_text
+from backend.core.write_behind import WriteBehind
+import asyncio
 import json
 import traceback
 import logging
@@ -10,65 +18,14 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-class AnalysisResult(BaseModel):
-    concepts: List[str]
-    prerequisites: List[str]
-    techniques: List[str]
-    extensions: List[str]
-    difficulty_level: float
-    solution_steps: List[Dict[Any, Any]]
-    domain: str
-    timestamp: datetime
+# Shared across analyzer instances so concurrent requests for the same
+# question run a single analysis
+analysis_flight = SingleFlight("analyze_question")
 
-class QuestionAnalyzer:
-    def __init__(self, api_key: str, neo4j_service: Neo4jService):
-        self.client = openai.OpenAI(api_key=api_key)
-        self.neo4j_service = neo4j_service
-        self.concept_normalizer = ConceptNormalizerService(neo4j_service, self.client)
-        
-    async def analyze_question(self, question_text: str) -> AnalysisResult:
-        """Enhanced question analysis with concept normalization and additional features."""
-        logger.info(f"Starting enhanced analysis for question: {question_text}")
-        
-        try:
-            # Get initial analysis from LLM
-            raw_analysis = await self._get_llm_analysis(question_text)
-            logger.info(f"raw_analysis\n{raw_analysis}")
-            # Normalize all concept types
-            normalized_concepts = await self.concept_normalizer.normalize_concepts(raw_analysis["concepts"])
-            normalized_prereqs = await self.concept_normalizer.normalize_concepts(raw_analysis["prerequisites"])
-            normalized_techniques = await self.concept_normalizer.normalize_concepts(raw_analysis["techniques"])
-            
-            # Store new concepts and relationships
-            for matches in [normalized_concepts, normalized_prereqs, normalized_techniques]:
-                for match in matches.values():
-                    await self.concept_normalizer.store_new_concept(match)
-            
-            # Create final analysis result
-            result = AnalysisResult(
-                concepts=[m.matched_concept or m.input_concept for m in normalized_concepts.values()],
-                prerequisites=[m.matched_concept or m.input_concept for m in normalized_prereqs.values()],
-                techniques=[m.matched_concept or m.input_concept for m in normalized_techniques.values()],
-                extensions=raw_analysis["extensions"],
-                difficulty_level=raw_analysis["difficulty_level"],
-                solution_steps=raw_analysis["solution_steps"],
-                domain=raw_analysis["domain"],
-                timestamp=datetime.now()
-            )
-            
-            # Store enhanced analysis in graph
-            await self._store_enhanced_analysis(question_text, result)
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error in enhanced analysis: {traceback.format_exc()}")
-            raise Exception(f"Error analyzing question: {str(e)}")
+# Analysis fields whose terms are normalized against the knowledge graph
+NORMALIZED_KINDS = ("concepts", "prerequisites", "techniques")
 
-    async def _get_llm_analysis(self, question_text: str) -> Dict:
-        """Get enhanced analysis from LLM."""
-        prompt = """
-        Analyze the following math question and provide a detailed JSON response with:
+ANALYSIS_FIELDS = """
         - concepts: Main mathematical concepts being tested
         - prerequisites: Knowledge required to solve this
         - techniques: Problem-solving techniques that could be used
@@ -76,7 +33,10 @@ class QuestionAnalyzer:
         - difficulty_level: A score from 0-1 indicating question difficulty
         - solution_steps: Array of step-by-step solution guidance
         - domain: Primary mathematical domain (e.g., Algebra, Geometry, Calculus)
+"""
 
+ANALYSIS_PROMPT = """
+        Analyze the following math question and provide a detailed JSON response with:""" + ANALYSIS_FIELDS + """
         Math Question: {question}
 
         Provide the response in this exact JSON format:
@@ -94,65 +54,397 @@ class QuestionAnalyzer:
         }}
         """
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt.format(question=question_text)}],
-            response_format={"type": "json_object"}
-        )
-        
-        return json.loads(response.choices[0].message.content)
+# Packs several questions into one request so the instruction block is paid once
+BATCH_ANALYSIS_PROMPT = """
+        Analyze each of the following math questions. Each question is prefixed with
+        its index in square brackets. For every question provide:""" + ANALYSIS_FIELDS + """
+        Math Questions:
+{questions}
 
-    async def _store_enhanced_analysis(self, question_text: str, analysis: AnalysisResult):
-        """Store enhanced analysis in Neo4j with new relationship types and properties."""
-        query = """
-        // Create question node with metadata
-        MERGE (q:Question {text: $text})
-        SET q.difficulty_level = $difficulty_level,
-            q.domain = $domain,
-            q.analyzed_at = $timestamp
-        
-        // Create and link concepts
-        WITH q
-        UNWIND $concepts AS concept
-        MERGE (c:Concept {name: concept})
-        MERGE (q)-[r:TESTS_CONCEPT]->(c)
-        SET r.strength = 1.0
-        
-        // Create and link prerequisites with ordering
-        WITH q
-        UNWIND $prerequisites_with_index AS prereq
-        MERGE (p:Concept {name: prereq.name})
-        MERGE (q)-[r:REQUIRES_PREREQUISITE]->(p)
-        SET r.order = prereq.index
-        
-        // Create solution steps
-        WITH q
-        UNWIND $solution_steps AS step
-        CREATE (s:SolutionStep {
-            step_number: step.step,
-            description: step.description
-        })
-        MERGE (q)-[:HAS_STEP]->(s)
-        WITH s, step
-        UNWIND step.concepts_used AS concept_used
-        MERGE (c:Concept {name: concept_used})
-        MERGE (s)-[:USES_CONCEPT]->(c)
+        Provide the response in this exact JSON format, with one entry per question:
+        {{
+            "analyses": [
+                {{
+                    "index": 0,
+                    "concepts": ["concept1", "concept2"],
+                    "prerequisites": ["prereq1", "prereq2"],
+                    "techniques": ["technique1", "technique2"],
+                    "extensions": ["extension1", "extension2"],
+                    "difficulty_level": 0.7,
+                    "solution_steps": [
+                        {{"step": 1, "description": "First, ...", "concepts_used": ["concept1"]}}
+                    ],
+                    "domain": "Algebra"
+                }}
+            ]
+        }}
         """
+
+class AnalysisResult(BaseModel):
+    concepts: List[str]
+    prerequisites: List[str]
+    techniques: List[str]
+    extensions: List[str]
+    difficulty_level: float
+    solution_steps: List[Dict[Any, Any]]
+    domain: str
+    timestamp: datetime
+
+class QuestionAnalyzer:
+    def __init__(
+        self,
+        api_key: str,
+        neo4j_service: Neo4jService,
+        llm_service: Optional[LLMService] = None,
+        near_duplicates: Optional[NearDuplicateIndex] = None,
+        router: Optional[ModelRouter] = None,
+        related_questions: Optional[RelatedQuestionIndex] = None,
+        write_behind: Optional[WriteBehind] = None
+    ):
+        if llm_service is None:
+            llm_service = LLMService(OpenAIProvider(api_key=api_key))
+        self.llm = llm_service
+        self.neo4j_service = neo4j_service
+        self.near_duplicates = near_duplicates
+        self.router = router
+        self.related_questions = related_questions
+        self.write_behind = write_behind
+        self.concept_normalizer = ConceptNormalizerService(neo4j_service, self.llm, router=router)
         
-        # Prepare prerequisites with order information
-        prerequisites_with_index = [
-            {"name": name, "index": idx}
-            for idx, name in enumerate(analysis.prerequisites)
+    async def analyze_question(self, question_text: str) -> AnalysisResult:
+        """Enhanced question analysis with concept normalization and additional features.
+
+        Concurrent calls for the same (whitespace-normalized) question share one analysis.
+        """
+        key = normalize_question_text(question_text)
+        return await analysis_flight.do(key, lambda: self._analyze_question(question_text))
+
+    async def _analyze_question(self, question_text: str) -> AnalysisResult:
+        try:
+            return await self._result_of(self.analyze_question_stream(question_text))
+
+        except LLMUnavailableError:
+            # Let callers tell a provider outage apart from a failed analysis
+            raise
+        except Exception as e:
+            logger.error(f"Error in enhanced analysis: {traceback.format_exc()}")
+            raise Exception(f"Error analyzing question: {str(e)}")
+
+    async def analyze_question_stream(self, question_text: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Run the analysis stage by stage, yielding (event, payload) pairs as each completes:
+        "raw" with the LLM analysis, one "normalized" per resolved term,
+        "analysis" with the final AnalysisResult and "stored" once the graph write is done.
+        A near-duplicate of an analyzed question emits "near_duplicate" first and skips the LLM.
+        """
+        logger.info(f"Starting enhanced analysis for question: {question_text}")
+
+        duplicate = await self._find_near_duplicate(question_text)
+        if duplicate is not None:
+            async for event in self._reuse_near_duplicate(question_text, *duplicate):
+                yield event
+            return
+
+        # Get initial analysis from LLM
+        raw_analysis = await self._get_llm_analysis(question_text)
+        logger.info(f"raw_analysis\n{raw_analysis}")
+        yield "raw", raw_analysis
+
+        async for event in self._complete_analysis(question_text, raw_analysis):
+            yield event
+
+    async def _complete_analysis(
+        self,
+        question_text: str,
+        raw_analysis: Dict
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Normalize and store a raw LLM analysis, yielding the same events as analyze_question_stream."""
+        # Normalize all concept types, storing new concepts as they resolve
+        normalized = {kind: {} for kind in NORMALIZED_KINDS}
+        terms = [(kind, term) for kind in NORMALIZED_KINDS for term in raw_analysis[kind]]
+        deferred = []
+        async for kind, term, match in self.concept_normalizer.iter_normalized_concepts(terms):
+            if self._write_behind():
+                # Matched by later questions straight away; the graph write waits in the journal
+                self.concept_normalizer.remember_concept(match, persisted=False)
+                if not self.concept_normalizer.is_stored(match):
+                    deferred.append((question_text, "concept", match.model_dump()))
+            else:
+                await self.concept_normalizer.store_new_concept(match)
+            normalized[kind][term] = match
+            yield "normalized", {"kind": kind, **match.model_dump()}
+
+        def resolved(kind: str) -> List[str]:
+            # Keep the order the LLM listed the terms in
+            matches = normalized[kind]
+            return [
+                matches[term].matched_concept or matches[term].input_concept
+                for term in dict.fromkeys(raw_analysis[kind])
+            ]
+
+        # Create final analysis result
+        result = AnalysisResult(
+            concepts=resolved("concepts"),
+            prerequisites=resolved("prerequisites"),
+            techniques=resolved("techniques"),
+            extensions=raw_analysis["extensions"],
+            difficulty_level=raw_analysis["difficulty_level"],
+            solution_steps=raw_analysis["solution_steps"],
+            domain=raw_analysis["domain"],
+            timestamp=datetime.now()
+        )
+        yield "analysis", result
+        if self.router is not None:
+            self.router.observe(question_text, result.difficulty_level)
+
+        # Store enhanced analysis in graph
+        if self._write_behind():
+            await self.write_behind.submit_many(deferred + [(question_text, "analysis", result.model_dump(mode="json"))])
+        else:
+            await self._store_enhanced_analysis(question_text, result)
+        if self.near_duplicates is not None:
+            self.near_duplicates.add(question_text)
+        yield "stored", {"text": question_text, "deferred": self._write_behind()}
+
+    async def _find_near_duplicate(self, question_text: str) -> Optional[Tuple[str, float, Dict]]:
+        """
+        Find an analyzed near-duplicate, returning (original text, similarity, stored analysis).
+        A question that was already analyzed is re-analyzed instead, so resubmitting
+        an original never overwrites it with a copy of its own near-duplicate.
+        """
+        if self.near_duplicates is None:
+            return None
+        await self.near_duplicates.ensure_loaded(self.neo4j_service)
+        if question_text in self.near_duplicates:
+            return None
+        match = self.near_duplicates.find(question_text)
+        if match is None:
+            return None
+        # Another process may have stored it since this index was loaded
+        if await self.neo4j_service.get_question_analysis(question_text) is not None:
+            return None
+        original, similarity = match
+        stored = await self.neo4j_service.get_question_analysis(original)
+        if stored is None:
+            return None
+        return original, similarity, stored
+
+    async def _reuse_near_duplicate(
+        self,
+        question_text: str,
+        original: str,
+        similarity: float,
+        stored: Dict
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Store a question with the structural analysis of its near-duplicate, without calling the LLM."""
+        logger.info(f"Reusing analysis of near-duplicate ({similarity:.2f}): {original}")
+        yield "near_duplicate", {"of": original, "similarity": similarity}
+
+        # Solution steps refer to the original's numbers, so only the structure is reused
+        raw_analysis = {**stored, "solution_steps": []}
+        yield "raw", raw_analysis
+
+        result = AnalysisResult(**raw_analysis, timestamp=datetime.now())
+        yield "analysis", result
+
+        if self._write_behind():
+            await self.write_behind.submit_many([
+                (question_text, "analysis", result.model_dump(mode="json")),
+                (question_text, "near_duplicate", {"original": original, "similarity": similarity}),
+            ])
+        else:
+            await self._store_enhanced_analysis(question_text, result)
+            await self.neo4j_service.link_near_duplicate(question_text, original, similarity)
+        self.near_duplicates.add(question_text)
+        yield "stored", {"text": question_text, "deferred": self._write_behind()}
+
+    def _write_behind(self) -> bool:
+        return self.write_behind is not None and self.write_behind.running
+
+    async def apply_write(self, entry: Dict):
+        """Apply one journaled write to the graph; the write-behind flusher calls this."""
+        kind, question_text, payload = entry["kind"], entry["key"], entry["payload"]
+        if kind == "concept":
+            await self.concept_normalizer.store_new_concept(ConceptMatch(**payload))
+        elif kind == "analysis":
+            await self._store_enhanced_analysis(question_text, AnalysisResult(**payload))
+        elif kind == "near_duplicate":
+            await self.neo4j_service.link_near_duplicate(question_text, payload["original"], payload["similarity"])
+        else:
+            raise ValueError(f"Unknown journaled write: {kind}")
+
+    @staticmethod
+    async def _result_of(events: AsyncIterator[Tuple[str, Any]]) -> AnalysisResult:
+        """Drain an analysis event stream and return its AnalysisResult."""
+        result = None
+        async for event, payload in events:
+            if event == "analysis":
+                result = payload
+        return result
+
+    async def analyze_questions(
+        self,
+        questions: List[str],
+        batch_size: int = 10,
+        concurrency: int = 4
+    ) -> List[AnalysisResult]:
+        """
+        Analyze many questions for bulk loads, packing up to batch_size questions
+        into each LLM request. Near-duplicates of analyzed questions skip the LLM.
+        Results are returned in input order.
+        """
+        duplicates = [await self._find_near_duplicate(question_text) for question_text in questions]
+        to_analyze = [q for q, duplicate in zip(questions, duplicates) if duplicate is None]
+        raw_analyses = dict(zip(to_analyze, await self.get_raw_analyses(to_analyze, batch_size, concurrency)))
+
+        def events(question_text: str, duplicate: Optional[Tuple[str, float, Dict]]):
+            if duplicate is not None:
+                return self._reuse_near_duplicate(question_text, *duplicate)
+            return self._complete_analysis(question_text, raw_analyses[question_text])
+
+        return await asyncio.gather(*[
+            self._result_of(events(question_text, duplicate))
+            for question_text, duplicate in zip(questions, duplicates)
+        ])
+
+    async def get_raw_analyses(
+        self,
+        questions: List[str],
+        batch_size: int = 10,
+        concurrency: int = 4
+    ) -> List[Dict]:
+        """
+        Get raw LLM analyses for many questions, batch_size questions per request
+        and at most `concurrency` requests in flight. Items missing from a batch
+        response or failing AnalysisResult validation are re-submitted individually,
+        as is a whole chunk whose batch request fails for a reason other than an outage.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def single(question_text: str, model: Optional[str] = None) -> Dict:
+            async with semaphore:
+                return await self._get_llm_analysis(question_text, model)
+
+        async def batch(chunk: List[str], model: Optional[str]) -> List[Dict]:
+            if len(chunk) == 1:
+                return [await single(chunk[0], model)]
+
+            try:
+                async with semaphore:
+                    by_index = await self._get_llm_batch_analysis(chunk, model)
+            except LLMUnavailableError:
+                raise
+            except Exception as e:
+                # One unusable packed response must not sink every question in the load
+                logger.warning(f"Batched analysis of {len(chunk)} questions failed ({e!r}), analyzing individually")
+                by_index = {}
+
+            failed = [i for i in range(len(chunk)) if not self._is_valid_analysis(by_index.get(i))]
+            if failed:
+                logger.info(f"Re-submitting {len(failed)} of {len(chunk)} batched analyses individually")
+                retried = await asyncio.gather(*[single(chunk[i], model) for i in failed])
+                by_index.update(zip(failed, retried))
+            return [by_index[i] for i in range(len(chunk))]
+
+        # With routing on, questions are batched within their tier so one hard question
+        # does not pull a whole batch onto the strong model
+        if self.router is not None:
+            groups = [(self.router.tiers[tier].model, indices)
+                      for tier, indices in self.router.group_by_tier(questions).items()]
+        else:
+            groups = [(None, list(range(len(questions))))]
+
+        chunks = [
+            (model, indices[i:i + batch_size])
+            for model, indices in groups
+            for i in range(0, len(indices), batch_size)
         ]
-        
-        params = {
-            "text": question_text,
+        results = await asyncio.gather(*[batch([questions[i] for i in chunk], model) for model, chunk in chunks])
+        by_question = {}
+        for (_, chunk), chunk_results in zip(chunks, results):
+            by_question.update(zip(chunk, chunk_results))
+        return [by_question[i] for i in range(len(questions))]
+
+    @staticmethod
+    def _is_valid_analysis(raw_analysis: Optional[Dict]) -> bool:
+        if not isinstance(raw_analysis, dict):
+            return False
+        try:
+            AnalysisResult(**raw_analysis, timestamp=datetime.now())
+            return True
+        except (ValidationError, TypeError):
+            return False
+
+    async def _get_llm_analysis(self, question_text: str, model: Optional[str] = None) -> Dict:
+        """
+        Get enhanced analysis from LLM. With a router, the model tier follows the
+        question's complexity, and an unusable small-tier answer is retried on the strong tier.
+        """
+        prompt = ANALYSIS_PROMPT.format(question=question_text)
+        if self.router is None:
+            return await self.llm.complete_json(prompt, model)
+
+        model = model or self.router.model_for_question(question_text)
+        raw_analysis = await self.llm.complete_json(prompt, model)
+        if model != self.router.strong_model() and not self._is_valid_analysis(raw_analysis):
+            logger.info(f"Escalating analysis from {model} to {self.router.strong_model()}")
+            self.router.record_escalation()
+            raw_analysis = await self.llm.complete_json(prompt, self.router.strong_model())
+        return raw_analysis
+
+    async def _get_llm_batch_analysis(self, questions: List[str], model: Optional[str] = None) -> Dict[int, Dict]:
+        """Get analyses for several questions from one LLM request, keyed by question index."""
+        packed = "\n".join(f"[{i}] {question}" for i, question in enumerate(questions))
+        response = await self.llm.complete_json(BATCH_ANALYSIS_PROMPT.format(questions=packed), model)
+
+        by_index = {}
+        if not isinstance(response, dict):
+            return by_index
+        analyses = response.get("analyses")
+        for analysis in analyses if isinstance(analyses, list) else []:
+            index = analysis.pop("index", None) if isinstance(analysis, dict) else None
+            if isinstance(index, int) and 0 <= index < len(questions):
+                by_index[index] = analysis
+        return by_index
+
+    async def _store_enhanced_analysis(self, question_text: str, analysis: AnalysisResult):
+        """
+        Store enhanced analysis in Neo4j with new relationship types and properties.
+
+        Re-analysis is idempotent: the new analysis is diffed against the edges already
+        stored for the question and only the differences are written, with solution
+        steps updated in place by step number.
+        """
+        properties = {
             "difficulty_level": analysis.difficulty_level,
             "domain": analysis.domain,
-            "timestamp": analysis.timestamp.isoformat(),
-            "concepts": analysis.concepts,
-            "prerequisites_with_index": prerequisites_with_index,
-            "solution_steps": analysis.solution_steps
+            "techniques": analysis.techniques,
+            "extensions": analysis.extensions,
+            "analyzed_at": analysis.timestamp.isoformat()
         }
-        
-        await self.neo4j_service.execute_query(query, params)
\ No newline at end of file
+        target = stored_from_analysis(analysis.concepts, analysis.prerequisites, analysis.solution_steps)
+
+        # Diffed inside the write transaction, so concurrent analyses cannot interleave
+        diff = await self.neo4j_service.write_analysis(question_text, properties, target)
+        if not diff.is_empty():
+            logger.info(f"Updated stored analysis: {diff}")
+        await self._update_related_questions(question_text, analysis.concepts)
+
+    async def _update_related_questions(self, question_text: str, concepts: List[str]):
+        """Refresh the RELATED_TO edges this question's concepts change."""
+        if self.related_questions is None:
+            return
+        await self.related_questions.ensure_loaded(self.neo4j_service)
+        # Held across the write so edges reach the graph in the order the index changed
+        async with self.related_questions.lock:
+            if not self.related_questions.loaded:
+                # Reset by a failed write; the rebuild backfills this question's edges
+                return
+            changes = self.related_questions.add(question_text, concepts)
+            if not changes.is_empty():
+                try:
+                    await self.neo4j_service.update_related_questions(changes.links, changes.unlinks)
+                except Exception:
+                    # The index is now ahead of the graph, so rebuild it from the graph on next use
+                    self.related_questions.reset()
+                    raise
@@ -0,0 +1,206 @@
+import asyncio
+import heapq
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set, Tuple
+
+from backend.core.minhash import LSHIndex, MinHasher
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RelatedChanges:
+    """RELATED_TO edges to write after an ingest: weights to set and edges to drop."""
+    links: List[Tuple[str, str, float]] = field(default_factory=list)
+    unlinks: List[Tuple[str, str]] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not self.links and not self.unlinks
+
+
+class RelatedQuestionIndex:
+    """
+    Top-k most similar questions per question by the Jaccard similarity of
+    their concept sets, kept up to date as questions are ingested so that
+    related-question reads are a lookup of stored RELATED_TO weights.
+
+    Candidates come from an inverted index of concept -> questions. Concepts
+    tested by more than `max_posting` questions (e.g. "arithmetic") would make
+    every ingest scan most of the graph, so those postings are replaced by
+    MinHash/LSH candidates over the concept sets. Concept sets are a handful of
+    names, so candidates are scored by exact Jaccard similarity.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 10,
+        min_similarity: float = 0.2,
+        max_posting: int = 500,
+        num_perm: int = 64,
+        bands: int = 32,
+    ):
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.max_posting = max_posting
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.lsh = LSHIndex(num_perm=num_perm, bands=bands)
+        self.concepts: Dict[str, Set[str]] = {}
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.neighbours: Dict[str, Dict[str, float]] = {}
+        self.loaded = False
+        self.lock = asyncio.Lock()
+        self.stats = {"ingested": 0, "candidates": 0, "links": 0, "unlinks": 0}
+
+    def __len__(self) -> int:
+        return len(self.concepts)
+
+    def _candidates(self, question: str, concepts: Set[str]) -> Set[str]:
+        found: Set[str] = set()
+        common = False
+        for concept in concepts:
+            posting = self.postings.get(concept, ())
+            if len(posting) > self.max_posting:
+                common = True
+            else:
+                found.update(posting)
+        if common:
+            found |= self.lsh.candidates(self.lsh.signatures[question])
+        found.discard(question)
+        return found
+
+    def _scores(self, question: str, candidates: Iterable[str]) -> Dict[str, float]:
+        concepts = self.concepts[question]
+        scores = {}
+        for candidate in candidates:
+            other = self.concepts[candidate]
+            similarity = len(concepts & other) / len(concepts | other)
+            if similarity >= self.min_similarity:
+                scores[candidate] = round(similarity, 4)
+        return scores
+
+    def _best(self, scores: Dict[str, float]) -> Dict[str, float]:
+        # Ties broken by text so a rebuilt index picks the same neighbours
+        return dict(heapq.nsmallest(self.top_k, scores.items(), key=lambda item: (-item[1], item[0])))
+
+    def _replace(self, question: str, best: Dict[str, float], changes: RelatedChanges):
+        previous = self.neighbours.get(question, {})
+        changes.unlinks.extend((question, other) for other in previous if other not in best)
+        changes.links.extend(
+            (question, other, weight) for other, weight in best.items() if previous.get(other) != weight
+        )
+        self.neighbours[question] = best
+
+    def _index(self, question: str, concepts: Set[str]):
+        self.concepts[question] = concepts
+        for concept in concepts:
+            self.postings[concept].add(question)
+        self.lsh.add(question, self.hasher.signature(concepts))
+
+    def _unindex(self, question: str):
+        for concept in self.concepts.pop(question, ()):
+            posting = self.postings.get(concept)
+            if posting is not None:
+                posting.discard(question)
+                if not posting:
+                    del self.postings[concept]
+        self.lsh.remove(question)
+
+    def add(self, question: str, concepts: Iterable[str]) -> RelatedChanges:
+        """
+        Index a question's concepts and return the RELATED_TO edges that change:
+        its own top-k, plus an edge from every question whose top-k it now enters.
+        Re-adding a question with different concepts also refreshes the questions
+        that listed it before.
+        """
+        concepts = {concept.strip().lower() for concept in concepts if concept and concept.strip()}
+        changes = RelatedChanges()
+        if self.concepts.get(question) == concepts:
+            return changes
+        listed_by = {other for other, best in self.neighbours.items() if question in best} \
+            if question in self.concepts else set()
+        self._unindex(question)
+        if not concepts:
+            self._replace(question, {}, changes)
+            self.neighbours.pop(question, None)
+            for other in listed_by:
+                self._refresh(other, changes)
+            return self._counted(changes)
+
+        self._index(question, concepts)
+        scores = self._scores(question, self._candidates(question, concepts))
+        self.stats["candidates"] += len(scores)
+        self._replace(question, self._best(scores), changes)
+
+        # Similarity is symmetric: the new question may displace the weakest neighbour of others
+        for other, similarity in scores.items():
+            if other not in listed_by:
+                best = self.neighbours.get(other, {})
+                self._replace(other, self._best({**best, question: similarity}), changes)
+        # Its similarity to these may have dropped, letting other candidates back in
+        for other in listed_by:
+            self._refresh(other, changes)
+        return self._counted(changes)
+
+    def _refresh(self, question: str, changes: RelatedChanges):
+        """Recompute a question's top-k from scratch, after one of its neighbours changed."""
+        if question not in self.concepts:
+            return
+        scores = self._scores(question, self._candidates(question, self.concepts[question]))
+        self._replace(question, self._best(scores), changes)
+
+    def _counted(self, changes: RelatedChanges) -> RelatedChanges:
+        self.stats["ingested"] += 1
+        self.stats["links"] += len(changes.links)
+        self.stats["unlinks"] += len(changes.unlinks)
+        return changes
+
+    def reset(self):
+        """
+        Forget every question, e.g. after changes from `add` failed to reach the
+        graph; the next ensure_loaded rebuilds the index from the stored edges.
+        """
+        self.lsh = LSHIndex(num_perm=self.lsh.bands * self.lsh.rows, bands=self.lsh.bands)
+        self.concepts.clear()
+        self.postings.clear()
+        self.neighbours.clear()
+        self.loaded = False
+
+    def related(self, question: str) -> List[Tuple[str, float]]:
+        best = self.neighbours.get(question, {})
+        return sorted(best.items(), key=lambda item: (-item[1], item[0]))
+
+    async def ensure_loaded(self, neo4j_service):
+        """
+        Build the index from the graph, once per process. Stored RELATED_TO edges
+        seed the top-k lists; questions analyzed before the index existed have none,
+        so their edges are computed here and written in one pass.
+        """
+        if self.loaded:
+            return
+        async with self.lock:
+            if self.loaded:
+                return
+            records = await neo4j_service.get_question_concept_sets()
+            for record in records:
+                if record["concepts"]:
+                    self._index(record["text"], {c.strip().lower() for c in record["concepts"] if c})
+                self.neighbours[record["text"]] = {
+                    r["text"]: r["weight"] for r in record["related"] if r["weight"] is not None
+                }
+            changes = RelatedChanges()
+            for record in records:
+                if record["concepts"] and not record["related"]:
+                    self._refresh(record["text"], changes)
+            if not changes.is_empty():
+                try:
+                    await neo4j_service.update_related_questions(changes.links, changes.unlinks)
+                except Exception:
+                    self.reset()
+                    raise
+            self.loaded = True
+            logger.info(
+                f"Related-question index loaded with {len(self)} questions, "
+                f"{len(changes.links)} edges backfilled"
+            )
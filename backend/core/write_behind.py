@@ -0,0 +1,266 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Applies one journal entry to the graph
+Applier = Callable[[Dict], Awaitable[None]]
+
+
+class WriteJournal:
+    """
+    Append-only JSONL journal of pending graph writes, fsynced before an append
+    returns, plus a checkpoint file holding the highest sequence number up to
+    which every entry has been applied. Once everything is applied the journal
+    is truncated. Entries that keep failing are moved to a dead-letter file.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.checkpoint_path = path + ".checkpoint"
+        self.dead_letter_path = path + ".dead"
+        self.fsync = fsync
+        self._file = None
+
+    def open(self) -> List[Dict]:
+        """Open for appending and return the entries not yet applied, in order."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        applied = self.read_checkpoint()
+        pending = []
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-append was never acknowledged
+                        logger.warning(f"Skipping unreadable journal line in {self.path}")
+                        continue
+                    if entry["seq"] > applied:
+                        pending.append(entry)
+        self._file = open(self.path, "ab")
+        return pending
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, entries: List[Dict]):
+        self._file.write(b"".join(json.dumps(entry, default=str).encode() + b"\n" for entry in entries))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def dead_letter(self, entry: Dict, error: str):
+        """Set aside an entry that will not be retried, with the error that gave up on it."""
+        with open(self.dead_letter_path, "ab") as f:
+            f.write(json.dumps({**entry, "error": error, "dead_at": time.time()}, default=str).encode() + b"\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def checkpoint(self, seq: int, truncate: bool = False):
+        """Record that every entry up to `seq` is applied; truncate the journal if nothing is pending."""
+        temp = self.checkpoint_path + ".tmp"
+        with open(temp, "w") as f:
+            f.write(str(seq))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(temp, self.checkpoint_path)
+        if truncate:
+            self._file.truncate(0)
+            self._file.seek(0)
+
+    def size(self) -> int:
+        return self._file.tell() if self._file is not None else 0
+
+
+class WriteBehind:
+    """
+    Defers analysis persistence: writes are journaled durably and the caller
+    continues, while a background task applies them to the graph in batches.
+
+    Entries sharing a key (the question text) are applied strictly in order,
+    and a failed entry holds back the later entries for its key until a retry
+    succeeds. An entry that fails `max_attempts` times in a row is moved to the
+    dead-letter file so it cannot block its key or the journal truncation
+    forever. Different keys are applied concurrently. Entries left in the
+    journal by a crash are replayed when the flusher starts.
+    """
+
+    def __init__(
+        self,
+        journal: WriteJournal,
+        batch_size: int = 200,
+        interval: float = 0.5,
+        concurrency: int = 8,
+        retry_seconds: float = 5.0,
+        max_attempts: int = 10,
+    ):
+        self.journal = journal
+        self.batch_size = batch_size
+        self.interval = interval
+        self.concurrency = concurrency
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self.attempts: Dict[int, int] = {}  # seq -> failed attempts so far
+        self.pending: "OrderedDict[int, Dict]" = OrderedDict()
+        self.next_seq = 1
+        self.applied_seq = 0
+        self.apply: Optional[Applier] = None
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"submitted": 0, "applied": 0, "failed": 0, "replayed": 0, "batches": 0, "dead_lettered": 0}
+        self.last_flush_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, apply: Applier):
+        """Replay the journal, then flush in the background."""
+        self.apply = apply
+        pending = await asyncio.to_thread(self.journal.open)
+        self.applied_seq = self.journal.read_checkpoint()
+        self.next_seq = max([self.applied_seq] + [entry["seq"] for entry in pending]) + 1
+        for entry in pending:
+            self.pending[entry["seq"]] = entry
+        self.stats["replayed"] = len(pending)
+        if pending:
+            logger.info(f"Replaying {len(pending)} journaled graph writes")
+            self._wake.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain_seconds: float = 10.0):
+        """Stop the flusher, first trying to apply what is pending; anything left is replayed on restart."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self.drain(), drain_seconds)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopping with {len(self.pending)} graph writes still journaled")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.journal.close()
+
+    async def submit(self, key: str, kind: str, payload: Dict):
+        await self.submit_many([(key, kind, payload)])
+
+    async def submit_many(self, writes: List[tuple]):
+        """Journal writes durably; they are applied to the graph later, in order per key."""
+        async with self._lock:
+            entries = []
+            for key, kind, payload in writes:
+                entries.append({"seq": self.next_seq, "key": key, "kind": kind, "payload": payload, "at": time.time()})
+                self.next_seq += 1
+            await asyncio.to_thread(self.journal.append, entries)
+            for entry in entries:
+                self.pending[entry["seq"]] = entry
+            self.stats["submitted"] += len(entries)
+        if len(self.pending) >= self.batch_size:
+            self._wake.set()
+
+    async def drain(self):
+        """Wait until everything submitted so far is applied."""
+        target = self.next_seq - 1
+        while self.applied_seq < target:
+            self._wake.set()
+            await asyncio.sleep(0.01)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            while self.pending:
+                progressed = await self.flush_once()
+                if not progressed:
+                    await asyncio.sleep(self.retry_seconds)
+                    break
+
+    async def flush_once(self) -> bool:
+        """Apply up to batch_size pending entries; returns whether any were settled."""
+        batch = list(self.pending.values())[:self.batch_size]
+        if not batch:
+            return False
+        by_key: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        for entry in batch:
+            by_key.setdefault(entry["key"], []).append(entry)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        applied = dead = 0
+
+        async def apply_in_order(entries: List[Dict]):
+            nonlocal applied, dead
+            async with semaphore:
+                for entry in entries:
+                    try:
+                        await self.apply(entry)
+                    except Exception as e:
+                        self.stats["failed"] += 1
+                        self.last_error = f"{entry['kind']} for {entry['key']!r}: {e}"
+                        attempts = self.attempts.get(entry["seq"], 0) + 1
+                        if attempts < self.max_attempts:
+                            self.attempts[entry["seq"]] = attempts
+                            logger.error(f"Journaled write failed, will retry: {self.last_error}")
+                            return
+                        logger.error(f"Journaled write failed {attempts} times, dead-lettering: {self.last_error}")
+                        await asyncio.to_thread(self.journal.dead_letter, entry, repr(e))
+                        dead += 1
+                    else:
+                        applied += 1
+                    self.attempts.pop(entry["seq"], None)
+                    del self.pending[entry["seq"]]
+
+        await asyncio.gather(*[apply_in_order(entries) for entries in by_key.values()])
+        self.stats["applied"] += applied
+        self.stats["dead_lettered"] += dead
+        self.stats["batches"] += 1
+        self.last_flush_at = time.time()
+
+        # Everything below the oldest pending entry is applied or dead-lettered
+        applied_seq = next(iter(self.pending)) - 1 if self.pending else self.next_seq - 1
+        if applied_seq != self.applied_seq:
+            async with self._lock:
+                truncate = not self.pending
+                await asyncio.to_thread(self.journal.checkpoint, applied_seq, truncate)
+            self.applied_seq = applied_seq
+        return applied + dead > 0
+
+    def report(self) -> Dict:
+        now = time.time()
+        oldest = next(iter(self.pending.values()), None)
+        return {
+            "running": self.running,
+            "pending": len(self.pending),
+            "lag_seconds": round(now - oldest["at"], 3) if oldest else 0.0,
+            "applied_seq": self.applied_seq,
+            "last_seq": self.next_seq - 1,
+            "last_flush_seconds_ago": round(now - self.last_flush_at, 3) if self.last_flush_at else None,
+            "journal_bytes": self.journal.size(),
+            "dead_letter_path": self.journal.dead_letter_path,
+            "last_error": self.last_error,
+            **self.stats,
+        }
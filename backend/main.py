@@ -1,8 +1,100 @@
+import time
+
+_import_started = time.monotonic()
+
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.api.v1.endpoints import questions, knowledge_graph
+from fastapi.responses import JSONResponse
+from backend.api.v1.endpoints import debug, questions, knowledge_graph
+from backend.config import get_settings
+from backend.core.admission import ANALYSIS, READ, AdmissionMiddleware, TrafficClass, admission
+from backend.core.profiling import ProfileStore, ProfilingMiddleware, profiling
+from backend.services.concept_normalization_service import ConceptNormalizerService, use_concept_catalog
+from backend.services.concept_registry_service import RegistryCatalog, run_registry_refresher
+from backend.services.graph_maintenance import run_periodically
+from backend.startup import close_neo4j_service, get_neo4j_service, run_warm_up, startup_state
+import logging
+
+logger = logging.getLogger(__name__)
+
+startup_state.import_seconds = round(time.monotonic() - _import_started, 4)
+
+
+async def _cancel(task: asyncio.Task):
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
 
-app = FastAPI(title="Math Question Analyzer")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    neo4j = get_neo4j_service()
+    if settings.PROFILING_ENABLED:
+        profiling.enable(
+            ProfileStore(settings.PROFILE_DIR, keep=settings.PROFILE_KEEP),
+            sample_rate=settings.PROFILE_SAMPLE_RATE,
+            interval=settings.PROFILE_INTERVAL_MS / 1000,
+            allow_header=settings.PROFILE_HEADER_ENABLED
+        )
+    if settings.ADMISSION_ENABLED:
+        admission.enable(settings.ADMISSION_MAX_CONCURRENCY, [
+            TrafficClass(
+                READ,
+                max_concurrency=settings.ADMISSION_READ_CONCURRENCY,
+                max_queue=settings.ADMISSION_READ_QUEUE,
+                deadline=settings.ADMISSION_READ_DEADLINE_SECONDS,
+                rate=settings.ADMISSION_READ_RATE,
+                burst=settings.ADMISSION_READ_BURST
+            ),
+            TrafficClass(
+                ANALYSIS,
+                max_concurrency=settings.ADMISSION_ANALYSIS_CONCURRENCY,
+                max_queue=settings.ADMISSION_ANALYSIS_QUEUE,
+                deadline=settings.ADMISSION_ANALYSIS_DEADLINE_SECONDS,
+                rate=settings.ADMISSION_ANALYSIS_RATE,
+                burst=settings.ADMISSION_ANALYSIS_BURST
+            ),
+        ], client_header=settings.ADMISSION_CLIENT_HEADER)
+    write_behind = questions.get_write_behind()
+    if write_behind is not None:
+        # Replays writes a previous process journaled but never applied
+        await write_behind.start(questions.create_analyzer().apply_write)
+    background = []
+    if settings.CONCEPT_REGISTRY_PATH:
+        catalog = RegistryCatalog(settings.CONCEPT_REGISTRY_PATH)
+        use_concept_catalog(catalog)
+        background.append(asyncio.create_task(run_registry_refresher(
+            catalog,
+            ConceptNormalizerService(neo4j, None).load_existing_concepts,
+            settings.CONCEPT_REGISTRY_REFRESH_SECONDS
+        )))
+    # Warm up in the background so the liveness probe answers immediately
+    background.append(asyncio.create_task(run_warm_up(
+        neo4j,
+        startup_state,
+        near_duplicates=questions.get_near_duplicate_index() if settings.NEAR_DUPLICATE_ENABLED else None,
+        related_questions=questions.get_related_question_index() if settings.RELATED_QUESTIONS_ENABLED else None
+    )))
+    if settings.MAINTENANCE_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(run_periodically(
+            neo4j, settings.MAINTENANCE_INTERVAL_SECONDS, batch_size=settings.MAINTENANCE_BATCH_SIZE
+        )))
+    yield
+    for task in background:
+        await _cancel(task)
+    questions.shutdown_ocr_executor()
+    if write_behind is not None:
+        await write_behind.stop()
+    admission.disable()
+    await close_neo4j_service()
+
+
+app = FastAPI(title="Math Question Analyzer", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,6 +103,24 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Passes requests straight through unless the lifespan enabled profiling
+app.add_middleware(ProfilingMiddleware)
+# Outermost, so shed requests cost nothing further; a pass-through until the lifespan enables it
+app.add_middleware(AdmissionMiddleware)
 
 app.include_router(questions.router, prefix="/api/v1/questions", tags=["questions"])
 app.include_router(knowledge_graph.router, prefix="/api/v1/knowledge-graph", tags=["knowledge-graph"])
+app.include_router(debug.router, prefix="/debug", tags=["debug"])
+
+
+@app.get("/healthz", tags=["health"])
+async def healthz():
+    """Liveness: the process is up and serving."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz", tags=["health"])
+async def readyz():
+    """Readiness: Neo4j is reachable, the schema is in place and caches are warm."""
+    report = startup_state.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
@@ -1,12 +1,92 @@
+import asyncio
 import json
-from typing import List, Dict, Set, Optional
+import time
+from typing import AsyncIterator, List, Dict, Set, Optional, Tuple
 from pydantic import BaseModel
-import openai
-from neo4j import AsyncGraphDatabase
+from backend.core.singleflight import SingleFlight
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared across service instances so concurrent lookups of the same term
+# make a single LLM call
+normalization_flight = SingleFlight("normalize_concept")
+
+def concept_form_key(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+class ConceptCatalog:
+    """
+    Process-wide snapshot of concept names and their alternative forms, so
+    requests share one graph scan instead of each loading it. Reloaded once
+    it is older than `ttl` seconds; local writes are applied immediately.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._concepts: Optional[Dict[str, Set[str]]] = None
+        self._forms: Dict[str, str] = {}  # lowercased name or form -> concept
+        # Local writes still queued for Neo4j, re-applied after every reload
+        self._queued: Set[Tuple[str, Optional[str]]] = set()
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self.loads = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._concepts is not None
+
+    def _fresh(self) -> bool:
+        return self._concepts is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def get(self, loader) -> Dict[str, Set[str]]:
+        if self._fresh():
+            return self._concepts
+        async with self._lock:
+            if not self._fresh():
+                self._concepts = await loader()
+                self._forms = {}
+                for concept in self._concepts:
+                    self._forms.setdefault(concept_form_key(concept), concept)
+                for concept, forms in self._concepts.items():
+                    for form in forms:
+                        self._forms.setdefault(concept_form_key(form), concept)
+                for name, alternative in self._queued:
+                    self._apply(name, alternative)
+                self._loaded_at = time.monotonic()
+                self.loads += 1
+        return self._concepts
+
+    def lookup(self, form: str) -> Optional[str]:
+        """The concept whose name or alternative form equals `form`, ignoring case and spacing."""
+        return self._forms.get(concept_form_key(form))
+
+    def add(self, name: str, alternative: Optional[str] = None, persisted: bool = True):
+        """Record a local write; one not yet `persisted` outlives reloads until added again."""
+        if persisted:
+            self._queued.discard((name, alternative))
+        else:
+            self._queued.add((name, alternative))
+        if self._concepts is not None:
+            self._apply(name, alternative)
+
+    def _apply(self, name: str, alternative: Optional[str]):
+        forms = self._concepts.setdefault(name, {name})
+        self._forms.setdefault(concept_form_key(name), name)
+        if alternative:
+            forms.add(alternative)
+            self._forms.setdefault(concept_form_key(alternative), name)
+
+    def invalidate(self):
+        self._concepts = None
+
+concept_catalog = ConceptCatalog()
+
+def use_concept_catalog(catalog):
+    """Replace the process-wide catalog, e.g. with a shared-memory registry."""
+    global concept_catalog
+    concept_catalog = catalog
+
 class ConceptMatch(BaseModel):
     input_concept: str
     matched_concept: Optional[str]
@@ -14,9 +94,12 @@ class ConceptMatch(BaseModel):
     is_new: bool
 
 class ConceptNormalizerService:
-    def __init__(self, neo4j_service, openai_client):
+    def __init__(self, neo4j_service, llm_service, catalog: Optional[ConceptCatalog] = None, router=None):
         self.neo4j = neo4j_service
-        self.llm = openai_client
+        self.llm = llm_service
+        # Concept matching is a short classification, so a router sends it to the small tier
+        self.router = router
+        self.catalog = catalog if catalog is not None else concept_catalog
         self.concept_cache = {}  # In-memory cache of normalized concepts
         
     async def normalize_concepts(self, new_concepts: List[str]) -> Dict[str, ConceptMatch]:
@@ -30,33 +113,73 @@ class ConceptNormalizerService:
         # Process each new concept
         normalized_concepts = {}
         for concept in new_concepts:
-            if concept.lower() in self.concept_cache:
-                normalized_concepts[concept] = self.concept_cache[concept.lower()]
-            else:
-                match = await self._find_matching_concept(concept, existing_concepts)
-                self.concept_cache[concept.lower()] = match
-                normalized_concepts[concept] = match
+            normalized_concepts[concept] = await self._normalize_concept(concept, existing_concepts)
                 
         return normalized_concepts
 
+    async def iter_normalized_concepts(
+        self,
+        terms: List[Tuple[str, str]]
+    ) -> AsyncIterator[Tuple[str, str, ConceptMatch]]:
+        """
+        Normalize (kind, concept) pairs concurrently, yielding (kind, concept, match)
+        as each one resolves rather than in input order.
+        """
+        existing_concepts = await self._get_existing_concepts()
+
+        async def normalize(kind: str, concept: str):
+            return kind, concept, await self._normalize_concept(concept, existing_concepts)
+
+        tasks = [asyncio.ensure_future(normalize(kind, concept)) for kind, concept in terms]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _normalize_concept(
+        self,
+        concept: str,
+        existing_concepts: Dict[str, Set[str]]
+    ) -> ConceptMatch:
+        if concept.lower() in self.concept_cache:
+            return self.concept_cache[concept.lower()]
+
+        # A known name or alternative form needs no LLM call
+        known = self.catalog.lookup(concept)
+        if known is not None:
+            match = ConceptMatch(input_concept=concept, matched_concept=known, confidence=1.0, is_new=False)
+            self.concept_cache[concept.lower()] = match
+            return match
+
+        # Keyed like the catalog, so spacing and case variants share one call. A
+        # joining caller gets the answer computed against the leader's catalog
+        # snapshot, at most one catalog TTL older than its own; that is accepted
+        # in exchange for one LLM call per term.
+        match = await normalization_flight.do(
+            concept_form_key(concept),
+            lambda: self._find_matching_concept(concept, existing_concepts)
+        )
+        self.concept_cache[concept.lower()] = match
+        return match
+
+    async def preload_concepts(self):
+        """Fill the shared catalog now, e.g. during warm-up, instead of on the first request."""
+        await self._get_existing_concepts()
+
     async def _get_existing_concepts(self) -> Dict[str, Set[str]]:
         """
-        Retrieve existing concepts and their alternative forms from Neo4j.
+        Existing concepts and their alternative forms, from the shared catalog.
         """
-        query = """
-        MATCH (c:Concept)
-        OPTIONAL MATCH (c)-[:ALTERNATIVE_FORM]->(a:AlternativeForm)
-        RETURN c.name as name, collect(a.name) as alternatives
+        return await self.catalog.get(self.load_existing_concepts)
+
+    async def load_existing_concepts(self) -> Dict[str, Set[str]]:
         """
-        async with self.neo4j.driver.session() as session:
-            result = await session.run(query)
-            concepts = {}
-            async for record in result:
-                name = record["name"]
-                alternatives = set(record["alternatives"])
-                alternatives.add(name)
-                concepts[name] = alternatives
-            return concepts
+        Retrieve existing concepts and their alternative forms from Neo4j, bypassing the catalog.
+        """
+        concepts = await self.neo4j.get_concepts_with_alternatives()
+        return {name: set(alternatives) | {name} for name, alternatives in concepts.items()}
 
     async def _find_matching_concept(
         self, 
@@ -95,15 +218,8 @@ class ConceptNormalizerService:
         }}
         """
 
-        response = self.llm.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-        
-        
-        
-        result = json.loads(response.choices[0].message.content)
+        model = self.router.model_for_concept_match() if self.router is not None else None
+        result = await self.llm.complete_json(prompt, model)
         # If match found, verify against alternatives
         if result["is_match"] and result["matched_concept"]:
             # Check if it matches any alternative forms
@@ -128,21 +244,31 @@ class ConceptNormalizerService:
         """
         Store new concept or alternative form in Neo4j.
         """
+        await self.persist_concept(concept_match)
+        self.remember_concept(concept_match)
+
+    @staticmethod
+    def is_stored(concept_match: ConceptMatch) -> bool:
+        """Whether the graph already has the concept under exactly this name."""
+        return not concept_match.is_new and concept_match.matched_concept == concept_match.input_concept
+
+    async def persist_concept(self, concept_match: ConceptMatch):
+        """Write a new concept or alternative form to Neo4j, without touching the catalog."""
+        if self.is_stored(concept_match):
+            return
+        if concept_match.is_new:
+            await self.neo4j.store_concept(concept_match.input_concept)
+        else:
+            await self.neo4j.store_alternative_form(concept_match.matched_concept, concept_match.input_concept)
+
+    def remember_concept(self, concept_match: ConceptMatch, persisted: bool = True):
+        """
+        Add a new concept or alternative form to the catalog used for matching.
+        Pass persisted=False when the graph write is still queued.
+        """
+        if self.is_stored(concept_match):
+            return
         if concept_match.is_new:
-            query = """
-            MERGE (c:Concept {name: $name})
-            """
-            params = {"name": concept_match.input_concept}
+            self.catalog.add(concept_match.input_concept, persisted=persisted)
         else:
-            query = """
-            MATCH (c:Concept {name: $existing_name})
-            MERGE (a:AlternativeForm {name: $new_name})
-            MERGE (c)-[:ALTERNATIVE_FORM]->(a)
-            """
-            params = {
-                "existing_name": concept_match.matched_concept,
-                "new_name": concept_match.input_concept
-            }
-            
-        async with self.neo4j.driver.session() as session:
-            await session.run(query, params)
\ No newline at end of file
+            self.catalog.add(concept_match.matched_concept, concept_match.input_concept, persisted=persisted)
\ No newline at end of file
@@ -0,0 +1,176 @@
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+from backend.core.concept_registry import ConceptRegistry, write_registry
+from backend.services.concept_normalization_service import concept_form_key
+
+logger = logging.getLogger(__name__)
+
+
+class RegistryView(Mapping):
+    """A registry plus the concepts this process wrote since it was built."""
+
+    def __init__(self, registry: Optional[ConceptRegistry], overlay: Dict[str, Set[str]]):
+        self._registry = registry
+        self._overlay = overlay
+
+    def __getitem__(self, name: str) -> Set[str]:
+        forms = set(self._overlay.get(name, ()))
+        if self._registry is not None and name in self._registry:
+            forms |= self._registry[name]
+        if not forms:
+            raise KeyError(name)
+        return forms
+
+    def __iter__(self) -> Iterator[str]:
+        if self._registry is not None:
+            yield from self._registry
+        for name in self._overlay:
+            if self._registry is None or name not in self._registry:
+                yield name
+
+    def __len__(self) -> int:
+        # The registry count comes from its header; only the small overlay is checked
+        if self._registry is None:
+            return len(self._overlay)
+        return len(self._registry) + sum(1 for name in self._overlay if name not in self._registry)
+
+
+class RegistryCatalog:
+    """
+    ConceptCatalog backed by a memory-mapped registry file shared by every
+    worker. One process, elected through a file lock, rebuilds the file from
+    Neo4j and publishes it atomically; the others remap it when it changes.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.check_interval = check_interval
+        self._registry: Optional[ConceptRegistry] = None
+        self._checked_at = 0.0
+        # Local writes not yet in the registry: (written_at ns, concept, alternative);
+        # written_at is None until the write reaches Neo4j
+        self._pending: List[Tuple[Optional[int], str, Optional[str]]] = []
+        self._lock_file = None
+        self._build_lock = asyncio.Lock()
+        self.loads = 0
+        self.builds = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._current() is not None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_file is not None
+
+    def try_lead(self) -> bool:
+        """Become the refreshing process if no other process holds the lock."""
+        if self._lock_file is None:
+            lock_file = open(self.lock_path, "a+")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+            logger.info(f"This process now refreshes the concept registry at {self.path}")
+        return True
+
+    def release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()  # closing drops the flock
+            self._lock_file = None
+
+    def _current(self) -> Optional[ConceptRegistry]:
+        now = time.monotonic()
+        if self._registry is not None and now - self._checked_at < self.check_interval:
+            return self._registry
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self._registry
+        if self._registry is None or self._registry.identity != (stat.st_ino, stat.st_mtime_ns):
+            try:
+                self._remap(ConceptRegistry(self.path))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not map concept registry {self.path}: {e}")
+        return self._registry
+
+    def _remap(self, registry: ConceptRegistry):
+        # The old mapping is released once no view refers to it any more
+        self._registry = registry
+        # Builds only see what Neo4j held when they started; writes still queued are kept
+        self._pending = [p for p in self._pending if p[0] is None or p[0] >= registry.generation]
+        self.loads += 1
+
+    def _overlay(self) -> Dict[str, Set[str]]:
+        overlay: Dict[str, Set[str]] = {}
+        for _, name, alternative in self._pending:
+            forms = overlay.setdefault(name, {name})
+            if alternative:
+                forms.add(alternative)
+        return overlay
+
+    async def build(self, loader):
+        """Rebuild the registry from `loader` and publish it."""
+        async with self._build_lock:
+            generation = time.time_ns()  # writes after this point may be missing from the build
+            concepts = await loader()
+            size = await asyncio.to_thread(write_registry, self.path, concepts, generation)
+            self.builds += 1
+            logger.info(f"Published concept registry: {len(concepts)} concepts, {size} bytes")
+            self._checked_at = 0.0
+            self._current()
+
+    async def get(self, loader) -> Mapping[str, Set[str]]:
+        registry = self._current()
+        if registry is None:
+            if self.try_lead():
+                await self.build(loader)
+                registry = self._current()
+            else:
+                # Another worker is building it; answer from the graph meanwhile
+                return await loader()
+        return RegistryView(registry, self._overlay())
+
+    def lookup(self, form: str) -> Optional[str]:
+        key = concept_form_key(form)
+        for _, name, alternative in reversed(self._pending):
+            if concept_form_key(name) == key or (alternative and concept_form_key(alternative) == key):
+                return name
+        registry = self._current()
+        return registry.lookup(form) if registry is not None else None
+
+    def add(self, name: str, alternative: Optional[str] = None, persisted: bool = True):
+        """
+        Record a local write. One not yet `persisted` (queued by write-behind) outlives
+        every rebuild until it is added again once the graph write has succeeded.
+        """
+        if persisted:
+            self._pending = [p for p in self._pending if not (p[0] is None and p[1:] == (name, alternative))]
+        self._pending.append((time.time_ns() if persisted else None, name, alternative))
+
+    def invalidate(self):
+        self._checked_at = 0.0
+
+
+async def run_registry_refresher(catalog: RegistryCatalog, loader, interval: float):
+    """Rebuild the registry every `interval` seconds while this process holds the lock."""
+    try:
+        while True:
+            # Warm-up publishes the first build, so wait before refreshing
+            await asyncio.sleep(interval)
+            if catalog.try_lead():
+                try:
+                    await catalog.build(loader)
+                except Exception as e:
+                    logger.error(f"Concept registry refresh failed: {e}")
+    finally:
+        catalog.release()
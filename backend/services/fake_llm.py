@@ -0,0 +1,131 @@
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import openai
+
+# Error kinds the fake can inject, mapped to the exception the real client raises
+INJECTABLE_ERRORS = {
+    "timeout": lambda: openai.APITimeoutError(request=None),
+    "connection": lambda: openai.APIConnectionError(request=None),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def default_responder(prompt: str) -> Dict:
+    """Produce a plausible response for the analysis, batch analysis and normalization prompts."""
+    if "New concept:" in prompt:
+        return {"is_match": False, "matched_concept": None, "confidence": 1.0, "explanation": "fake"}
+
+    if "Math Questions:" in prompt:
+        packed = re.findall(r"^\[(\d+)\] (.*)$", prompt, re.MULTILINE)
+        return {"analyses": [{"index": int(i), **fake_analysis(q)} for i, q in packed]}
+
+    match = re.search(r"Math Question:\s*(.*)", prompt)
+    return fake_analysis(match.group(1).strip() if match else prompt)
+
+
+def fake_analysis(question: str) -> Dict:
+    words = re.findall(r"[A-Za-z]+", question.lower())
+    topic = words[0] if words else "arithmetic"
+    return {
+        "concepts": [f"{topic} concept"],
+        "prerequisites": ["arithmetic"],
+        "techniques": [f"{topic} technique"],
+        "extensions": [f"advanced {topic}"],
+        "difficulty_level": min(1.0, len(question) / 200),
+        "solution_steps": [
+            {"step": 1, "description": f"Work through: {question}", "concepts_used": [f"{topic} concept"]}
+        ],
+        "domain": "Algebra",
+    }
+
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeLLMClient"):
+        self._owner = owner
+
+    def create(self, model: str, messages: List[Dict], **kwargs):
+        return self._owner._create(model, messages)
+
+
+class FakeLLMClient:
+    """
+    Local stand-in for ``openai.OpenAI`` that injects latency and errors.
+
+    Exposes ``client.chat.completions.create`` with the same response shape as the
+    real client, so it can be dropped in wherever an OpenAI client is expected.
+    ``errors`` and ``latencies`` are per-call scripts (an error kind or None for
+    success, and a delay in seconds) consumed before ``error_rate`` and
+    ``latency`` apply.
+    """
+
+    def __init__(
+        self,
+        responder: Callable[[str], Dict] = default_responder,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_kind: str = "connection",
+        errors: Optional[List[Optional[str]]] = None,
+        latencies: Optional[List[float]] = None,
+        latency_per_output_token: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.responder = responder
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_kind = error_kind
+        self.errors = list(errors or [])
+        self.latencies = list(latencies or [])
+        self.latency_per_output_token = latency_per_output_token
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.requests: List[Dict] = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+
+    def _create(self, model: str, messages: List[Dict]):
+        with self._lock:
+            self.calls += 1
+            self.requests.append({"model": model, "messages": messages})
+            if self.errors:
+                fail = self.errors.pop(0)
+            else:
+                fail = self.error_kind if self.random.random() < self.error_rate else None
+            if self.latencies:
+                delay = self.latencies.pop(0)
+            else:
+                delay = self.latency + self.random.uniform(0, self.latency_jitter)
+
+        if fail:
+            time.sleep(delay)
+            raise INJECTABLE_ERRORS[fail]()
+
+        prompt = "\n".join(m["content"] for m in messages)
+        content = json.dumps(self.responder(prompt))
+        usage = SimpleNamespace(
+            prompt_tokens=estimate_tokens(prompt),
+            completion_tokens=estimate_tokens(content),
+        )
+        # Generation time grows with the length of the answer, as with a real model
+        time.sleep(delay + usage.completion_tokens * self.latency_per_output_token)
+        with self._lock:
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=usage,
+        )
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+logger = logging.getLogger(__name__)
+
+EXPORT_QUERY = """
+MATCH (q:Question)
+OPTIONAL MATCH (q)-[:TESTS_CONCEPT]->(c:Concept)
+WITH q, collect(DISTINCT c.name) AS tested
+OPTIONAL MATCH (q)-[:REQUIRES_PREREQUISITE]->(p:Concept)
+RETURN q.domain AS domain, q.difficulty_level AS difficulty, tested, collect(DISTINCT p.name) AS prerequisites
+"""
+
+WRITE_BACK_QUERY = """
+UNWIND $rows AS row
+MATCH (c:Concept {name: row.name})
+SET c.pagerank = row.pagerank,
+    c.betweenness = row.betweenness,
+    c.primary_domain = row.domain,
+    c.domain_rank = row.domain_rank,
+    c.question_count = row.questions,
+    c.analytics_at = $computed_at
+"""
+
+# Scores from earlier runs on concepts this run did not export (no questions
+# left, or renamed away); without this they would keep their old ranks
+CLEAR_STALE_QUERY = """
+MATCH (c:Concept)
+WHERE c.analytics_at IS NOT NULL AND c.analytics_at <> $computed_at
+WITH c LIMIT $batch_size
+REMOVE c.pagerank, c.betweenness, c.primary_domain, c.domain_rank, c.question_count, c.analytics_at
+RETURN count(c) AS cleared
+"""
+
+
+@dataclass
+class ConceptGraph:
+    """Concepts with their question incidence, exported once per job."""
+    names: List[str]
+    # concepts x concepts: co-tested weight, and tested -> prerequisite weight
+    co_tested: sp.csr_matrix
+    prerequisite: sp.csr_matrix
+    domains: List[Optional[str]]
+    questions: np.ndarray
+    difficulty: np.ndarray
+    question_total: int
+
+
+@dataclass
+class AnalyticsReport:
+    concepts: int = 0
+    questions: int = 0
+    edges: int = 0
+    pagerank_seconds: float = 0.0
+    betweenness_seconds: float = 0.0
+    rows_written: int = 0
+    rows_cleared: int = 0
+    seconds: float = 0.0
+    domains: Dict[str, Dict] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+def build_concept_graph(records: List[Dict]) -> ConceptGraph:
+    """
+    Turn per-question rows into sparse concept matrices. With B the
+    questions x tested-concepts incidence and R the questions x prerequisites
+    incidence, co-testing is B'B (diagonal dropped) and prerequisite weight is B'R.
+    """
+    index: Dict[str, int] = {}
+    for record in records:
+        for name in record["tested"] + record["prerequisites"]:
+            index.setdefault(name, len(index))
+    n, m = len(index), len(records)
+
+    def incidence(key: str):
+        rows = [i for i, record in enumerate(records) for _ in record[key]]
+        cols = [index[name] for record in records for name in record[key]]
+        return sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(m, n))
+
+    tested = incidence("tested")
+    required = incidence("prerequisites")
+    co_tested = (tested.T @ tested).tolil()
+    co_tested.setdiag(0)
+    co_tested = co_tested.tocsr()
+    co_tested.eliminate_zeros()
+    prerequisite = (tested.T @ required).tolil()
+    prerequisite.setdiag(0)
+    prerequisite = prerequisite.tocsr()
+    prerequisite.eliminate_zeros()
+
+    # A concept's domain is the most common domain of the questions testing it,
+    # falling back to the questions requiring it for pure prerequisites
+    domain_votes: List[Counter] = [Counter() for _ in range(n)]
+    required_votes: List[Counter] = [Counter() for _ in range(n)]
+    difficulty_sum = np.zeros(n)
+    difficulty_count = np.zeros(n)
+    for record in records:
+        if record["domain"]:
+            for name in record["prerequisites"]:
+                required_votes[index[name]][record["domain"]] += 1
+        for name in record["tested"]:
+            i = index[name]
+            if record["domain"]:
+                domain_votes[i][record["domain"]] += 1
+            if record["difficulty"] is not None:
+                difficulty_sum[i] += record["difficulty"]
+                difficulty_count[i] += 1
+
+    return ConceptGraph(
+        names=list(index),
+        co_tested=co_tested,
+        prerequisite=prerequisite,
+        domains=[
+            (votes or fallback).most_common(1)[0][0] if votes or fallback else None
+            for votes, fallback in zip(domain_votes, required_votes)
+        ],
+        questions=np.asarray(tested.sum(axis=0)).ravel().astype(int),
+        difficulty=np.divide(difficulty_sum, difficulty_count, out=np.full(n, np.nan), where=difficulty_count > 0),
+        question_total=m,
+    )
+
+
+class GraphAnalytics:
+    """
+    Offline concept importance: exports the concept graph, computes PageRank
+    and sampled betweenness with NumPy/SciPy, and writes the scores back as
+    Concept properties in batched transactions. Read endpoints only ever see
+    the stored properties.
+
+    PageRank runs on concept -> prerequisite edges plus co-testing edges in both
+    directions, so concepts many others build on rank highest.
+    """
+
+    def __init__(
+        self,
+        neo4j_service,
+        damping: float = 0.85,
+        co_tested_weight: float = 0.5,
+        betweenness_samples: int = 256,
+        batch_size: int = 1000,
+        pause: float = 0.0,
+    ):
+        self.neo4j = neo4j_service
+        self.damping = damping
+        self.co_tested_weight = co_tested_weight
+        self.betweenness_samples = betweenness_samples
+        self.batch_size = batch_size
+        self.pause = pause
+
+    async def export(self) -> ConceptGraph:
+        records = await self.neo4j.run_read(EXPORT_QUERY)
+        return await asyncio.to_thread(build_concept_graph, records)
+
+    def compute(self, graph: ConceptGraph, report: AnalyticsReport) -> List[Dict]:
+        """Scores per concept, ready to write back."""
+        from backend.core.centrality import betweenness, pagerank
+
+        adjacency = graph.prerequisite + self.co_tested_weight * graph.co_tested
+        report.concepts = len(graph.names)
+        report.edges = int(adjacency.nnz)
+
+        started = time.monotonic()
+        ranks = pagerank(adjacency, damping=self.damping)
+        report.pagerank_seconds = round(time.monotonic() - started, 3)
+
+        started = time.monotonic()
+        between = betweenness(adjacency, samples=self.betweenness_samples)
+        report.betweenness_seconds = round(time.monotonic() - started, 3)
+
+        by_domain: Dict[str, List[int]] = {}
+        for i, domain in enumerate(graph.domains):
+            by_domain.setdefault(domain or "Unknown", []).append(i)
+
+        domain_rank = np.zeros(len(graph.names), dtype=int)
+        for domain, members in by_domain.items():
+            members = np.array(members)
+            ordered = members[np.argsort(-ranks[members], kind="stable")]
+            domain_rank[ordered] = np.arange(1, len(ordered) + 1)
+            difficulty = graph.difficulty[members]
+            report.domains[domain] = {
+                "concepts": len(members),
+                "pagerank_share": round(float(ranks[members].sum()), 6),
+                "mean_difficulty": round(float(np.nanmean(difficulty)), 4) if np.isfinite(difficulty).any() else None,
+                "top": [graph.names[i] for i in ordered[:5]],
+            }
+
+        return [
+            {
+                "name": name,
+                "pagerank": float(ranks[i]),
+                "betweenness": float(between[i]),
+                "domain": graph.domains[i],
+                "domain_rank": int(domain_rank[i]),
+                "questions": int(graph.questions[i]),
+            }
+            for i, name in enumerate(graph.names)
+        ]
+
+    async def write_back(self, rows: List[Dict], report: AnalyticsReport):
+        """Store scores in batches, then clear the scores earlier runs left on concepts not scored now."""
+        computed_at = datetime.now(timezone.utc).isoformat()
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            await self.neo4j.run_write(WRITE_BACK_QUERY, {"rows": batch, "computed_at": computed_at})
+            report.rows_written += len(batch)
+            if self.pause:
+                await asyncio.sleep(self.pause)
+        while True:
+            records = await self.neo4j.run_write(
+                CLEAR_STALE_QUERY, {"computed_at": computed_at, "batch_size": self.batch_size}
+            )
+            cleared = records[0]["cleared"] if records else 0
+            report.rows_cleared += cleared
+            if cleared < self.batch_size:
+                break
+            if self.pause:
+                await asyncio.sleep(self.pause)
+
+    async def run(self) -> AnalyticsReport:
+        report = AnalyticsReport()
+        started = time.monotonic()
+        graph = await self.export()
+        report.questions = graph.question_total
+        rows = await asyncio.to_thread(self.compute, graph, report)
+        await self.write_back(rows, report)
+        report.seconds = round(time.monotonic() - started, 3)
+        logger.info(f"Graph analytics finished: {report.as_dict()}")
+        return report
@@ -0,0 +1,282 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from backend.services.concept_normalization_service import concept_form_key
+
+logger = logging.getLogger(__name__)
+
+# Relationship types whose end node is a Concept-like node, with the properties to carry over on merge
+INCOMING_CONCEPT_RELATIONSHIPS = {
+    "TESTS_CONCEPT": ["strength"],
+    "REQUIRES_PREREQUISITE": ["order"],
+    "USES_CONCEPT": [],
+    "SOLVED_BY_TECHNIQUE": [],
+    "EXTENDS_TO": [],
+}
+
+
+def _move_incoming(rel_type: str, props: List[str], source: str, target: str) -> str:
+    """Cypher fragment re-pointing `rel_type` edges from `source` to `target`."""
+    copy = "".join(f" SET moved.{p} = coalesce(moved.{p}, r.{p})" for p in props)
+    return f"""
+        CALL {{
+            WITH {source}, {target}
+            MATCH (x)-[r:{rel_type}]->({source})
+            WHERE x <> {target}
+            MERGE (x)-[moved:{rel_type}]->({target}){copy}
+            DELETE r
+        }}"""
+
+
+@dataclass
+class MaintenanceReport:
+    orphan_steps_deleted: int = 0
+    orphan_alternatives_deleted: int = 0
+    redundant_alternatives_deleted: int = 0
+    orphan_concepts_deleted: int = 0
+    duplicate_concepts_merged: int = 0
+    parallel_nodes_merged: int = 0
+    parallel_nodes_relabeled: int = 0
+    derived_counts_updated: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class GraphMaintenance:
+    """
+    Compacts the knowledge graph in bounded batches, each in its own short
+    transaction: deletes orphans, merges duplicate and parallel nodes together
+    with their relationships, and recomputes derived counts.
+    """
+
+    def __init__(self, neo4j_service, batch_size: int = 1000, pause: float = 0.0):
+        self.neo4j = neo4j_service
+        self.batch_size = batch_size
+        self.pause = pause  # seconds between batches, to leave room for live traffic
+
+    async def run(self) -> MaintenanceReport:
+        report = MaintenanceReport()
+        started = time.monotonic()
+        # Merges first, so the nodes they strand are swept up as orphans
+        for task in (
+            self.merge_parallel_nodes,
+            self.merge_duplicate_concepts,
+            self.delete_orphan_steps,
+            self.delete_orphan_alternatives,
+            self.delete_orphan_concepts,
+            self.recompute_derived_counts,
+        ):
+            try:
+                await task(report)
+            except Exception as e:
+                logger.error(f"Maintenance task {task.__name__} failed: {e}")
+                report.errors.append(f"{task.__name__}: {e}")
+        report.seconds = time.monotonic() - started
+        logger.info(f"Graph maintenance finished: {report.as_dict()}")
+        return report
+
+    async def _delete_in_batches(self, query: str, report: MaintenanceReport, params: Optional[Dict] = None) -> int:
+        """Run a `WITH n LIMIT $limit ... RETURN count(*) AS deleted` query until it deletes nothing."""
+        total = 0
+        while True:
+            records = await self.neo4j.run_write(query, {**(params or {}), "limit": self.batch_size})
+            report.batches += 1
+            deleted = records[0]["deleted"] if records else 0
+            total += deleted
+            if deleted < self.batch_size:
+                return total
+            await asyncio.sleep(self.pause)
+
+    async def _write_in_batches(self, query: str, rows: List[Dict], report: MaintenanceReport):
+        for start in range(0, len(rows), self.batch_size):
+            await self.neo4j.run_write(query, {"rows": rows[start:start + self.batch_size]})
+            report.batches += 1
+            await asyncio.sleep(self.pause)
+
+    async def delete_orphan_steps(self, report: MaintenanceReport):
+        report.orphan_steps_deleted += await self._delete_in_batches("""
+            MATCH (s:SolutionStep)
+            WHERE NOT (s)<-[:HAS_STEP]-(:Question)
+            WITH s LIMIT $limit
+            DETACH DELETE s
+            RETURN count(*) AS deleted
+        """, report)
+
+    async def delete_orphan_alternatives(self, report: MaintenanceReport):
+        # Alternative forms whose concept is gone
+        report.orphan_alternatives_deleted += await self._delete_in_batches("""
+            MATCH (a:AlternativeForm)
+            WHERE NOT (a)<-[:ALTERNATIVE_FORM]-(:Concept)
+            WITH a LIMIT $limit
+            DETACH DELETE a
+            RETURN count(*) AS deleted
+        """, report)
+        # Alternative forms that only repeat their own concept's name
+        report.redundant_alternatives_deleted += await self._delete_in_batches("""
+            MATCH (c:Concept)-[:ALTERNATIVE_FORM]->(a:AlternativeForm)
+            WHERE toLower(trim(a.name)) = toLower(trim(c.name))
+            WITH DISTINCT a LIMIT $limit
+            DETACH DELETE a
+            RETURN count(*) AS deleted
+        """, report)
+
+    async def delete_orphan_concepts(self, report: MaintenanceReport):
+        # Techniques are referenced only from the Question.techniques property, not by an edge
+        records = await self.neo4j.run_read("""
+            MATCH (q:Question)
+            UNWIND coalesce(q.techniques, []) AS technique
+            RETURN collect(DISTINCT technique) AS techniques
+        """)
+        techniques = records[0]["techniques"] if records else []
+        # Concepts with no relationships at all, e.g. after re-analysis dropped their last edge
+        report.orphan_concepts_deleted += await self._delete_in_batches("""
+            MATCH (c:Concept)
+            WHERE NOT (c)--() AND NOT c.name IN $techniques
+            WITH c LIMIT $limit
+            DELETE c
+            RETURN count(*) AS deleted
+        """, report, {"techniques": techniques})
+
+    async def merge_parallel_nodes(self, report: MaintenanceReport):
+        """
+        Fold Prerequisite and Technique nodes written by create_question_nodes into
+        the Concept of the same name, keeping the label on the Concept so existing
+        label-based queries still find it. Those without a Concept twin become one.
+        """
+        for label in ("Prerequisite", "Technique"):
+            pairs = await self.neo4j.run_read(f"""
+                MATCH (p:{label})
+                WHERE NOT p:Concept
+                MATCH (c:Concept {{name: p.name}})
+                RETURN elementId(c) AS keep, elementId(p) AS dup
+            """)
+            await self._merge_pairs(pairs, report)
+            report.parallel_nodes_merged += len(pairs)
+
+            while True:
+                records = await self.neo4j.run_write(f"""
+                    MATCH (p:{label})
+                    WHERE NOT p:Concept
+                    WITH p LIMIT $limit
+                    SET p:Concept
+                    RETURN count(*) AS relabeled
+                """, {"limit": self.batch_size})
+                report.batches += 1
+                relabeled = records[0]["relabeled"] if records else 0
+                report.parallel_nodes_relabeled += relabeled
+                if relabeled < self.batch_size:
+                    break
+
+    async def merge_duplicate_concepts(self, report: MaintenanceReport):
+        """
+        Merge concepts whose names differ only in case or spacing, and concepts
+        that were later recorded as an alternative form of another one.
+        The most connected node survives and the others become alternative forms.
+        """
+        # Grouped here rather than in Cypher so the key is exactly the one the
+        # concept catalog matches on, which also collapses inner whitespace
+        concepts = await self.neo4j.run_read("""
+            MATCH (c:Concept)
+            WHERE c.name IS NOT NULL
+            RETURN elementId(c) AS id, c.name AS name, COUNT { (c)--() } AS degree
+            ORDER BY degree DESC
+        """)
+        groups: Dict[str, List[str]] = {}
+        for concept in concepts:
+            groups.setdefault(concept_form_key(concept["name"]), []).append(concept["id"])
+        duplicates = [{"keep": ids[0], "dup": dup} for ids in groups.values() for dup in ids[1:]]
+        await self._merge_pairs(duplicates, report)
+
+        alternatives = await self.neo4j.run_read("""
+            MATCH (keep:Concept)-[:ALTERNATIVE_FORM]->(a:AlternativeForm)
+            MATCH (dup:Concept {name: a.name})
+            WHERE dup <> keep AND NOT (dup)-[:ALTERNATIVE_FORM]->(:AlternativeForm {name: keep.name})
+            RETURN DISTINCT elementId(keep) AS keep, elementId(dup) AS dup
+        """)
+        # A node merged away in the first pass no longer exists
+        merged = {pair["dup"] for pair in duplicates}
+        alternatives = [
+            pair for pair in alternatives
+            if pair["keep"] not in merged and pair["dup"] not in merged
+        ]
+        # Each node is merged at most once per run so chains resolve over later runs
+        seen = set()
+        unique = []
+        for pair in alternatives:
+            if pair["keep"] in seen or pair["dup"] in seen:
+                continue
+            seen.update((pair["keep"], pair["dup"]))
+            unique.append(pair)
+        await self._merge_pairs(unique, report)
+        report.duplicate_concepts_merged += len(duplicates) + len(unique)
+
+    async def _merge_pairs(self, pairs: List[Dict], report: MaintenanceReport):
+        """Move every relationship of `dup` onto `keep`, record dup's name as an alternative form, delete dup."""
+        if not pairs:
+            return
+        moves = "".join(
+            _move_incoming(rel_type, props, "dup", "keep")
+            for rel_type, props in INCOMING_CONCEPT_RELATIONSHIPS.items()
+        )
+        query = f"""
+            UNWIND $rows AS row
+            MATCH (keep) WHERE elementId(keep) = row.keep
+            MATCH (dup) WHERE elementId(dup) = row.dup
+            {moves}
+            CALL {{
+                WITH dup, keep
+                MATCH (dup)-[r:ALTERNATIVE_FORM]->(a:AlternativeForm)
+                MERGE (keep)-[:ALTERNATIVE_FORM]->(a)
+                DELETE r
+            }}
+            FOREACH (_ IN CASE WHEN dup:Prerequisite THEN [1] ELSE [] END | SET keep:Prerequisite)
+            FOREACH (_ IN CASE WHEN dup:Technique THEN [1] ELSE [] END | SET keep:Technique)
+            WITH keep, dup, dup.name AS name
+            DETACH DELETE dup
+            WITH keep, name
+            WHERE name <> keep.name
+            MERGE (a:AlternativeForm {{name: name}})
+            MERGE (keep)-[:ALTERNATIVE_FORM]->(a)
+        """
+        await self._write_in_batches(query, pairs, report)
+
+    async def recompute_derived_counts(self, report: MaintenanceReport):
+        records = await self.neo4j.run_auto_commit("""
+            MATCH (c:Concept)
+            CALL {
+                WITH c
+                SET c.question_count = COUNT { (c)<-[:TESTS_CONCEPT]-(:Question) },
+                    c.prerequisite_count = COUNT { (c)<-[:REQUIRES_PREREQUISITE]-(:Question) },
+                    c.alternative_count = COUNT { (c)-[:ALTERNATIVE_FORM]->(:AlternativeForm) }
+            } IN TRANSACTIONS OF $batch_size ROWS
+            RETURN count(c) AS updated
+        """, {"batch_size": self.batch_size})
+        report.derived_counts_updated += records[0]["updated"] if records else 0
+        records = await self.neo4j.run_auto_commit("""
+            MATCH (q:Question)
+            CALL {
+                WITH q
+                SET q.step_count = COUNT { (q)-[:HAS_STEP]->(:SolutionStep) },
+                    q.concept_count = COUNT { (q)-[:TESTS_CONCEPT]->(:Concept) }
+            } IN TRANSACTIONS OF $batch_size ROWS
+            RETURN count(q) AS updated
+        """, {"batch_size": self.batch_size})
+        report.derived_counts_updated += records[0]["updated"] if records else 0
+
+
+async def run_periodically(neo4j_service, interval: float, batch_size: int = 1000, pause: float = 0.0):
+    """Run maintenance every `interval` seconds until cancelled."""
+    maintenance = GraphMaintenance(neo4j_service, batch_size=batch_size, pause=pause)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await maintenance.run()
+        except Exception as e:
+            logger.error(f"Scheduled graph maintenance failed: {e}")
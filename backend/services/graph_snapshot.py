@@ -0,0 +1,311 @@
+import csv
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Dict, Iterator, List, Optional, Tuple
+
+import msgpack
+
+logger = logging.getLogger(__name__)
+
+# A snapshot is a msgpack stream: a header, columnar chunks of nodes (grouped by
+# label set) and relationships (grouped by type), then an end marker with totals.
+# Nodes get dense integer IDs at export time and relationships refer to those,
+# so a snapshot does not depend on the database it came from.
+SNAPSHOT_FORMAT = "math-question-analyzer/graph-snapshot"
+SNAPSHOT_VERSION = 1
+
+# Labels and relationship types that make up the knowledge graph. Labels and
+# types cannot be query parameters, so only these are ever formatted into Cypher.
+SNAPSHOT_LABELS = [
+    "Question", "Concept", "AlternativeForm", "SolutionStep",
+    "Prerequisite", "Technique", "Extension",
+]
+SNAPSHOT_REL_TYPES = [
+    "TESTS_CONCEPT", "REQUIRES_PREREQUISITE", "HAS_STEP", "USES_CONCEPT",
+    "ALTERNATIVE_FORM", "SOLVED_BY_TECHNIQUE", "EXTENDS_TO", "RELATED_TO",
+    "NEAR_DUPLICATE_OF",
+]
+
+# Temporary label and property used to resolve relationship endpoints during import
+IMPORT_LABEL = "SnapshotImport"
+IMPORT_ID = "snapshot_id"
+
+
+@dataclass
+class SnapshotStats:
+    nodes: int = 0
+    relationships: int = 0
+    skipped_relationships: int = 0
+    chunks: int = 0
+
+
+@dataclass
+class ImportBatch:
+    """One UNWIND write: the query plus the rows it unwinds."""
+    kind: str  # "nodes" or "relationships"
+    query: str
+    rows: List[Dict[str, Any]]
+    labels: List[str] = field(default_factory=list)
+    rel_type: Optional[str] = None
+
+
+def _to_columns(props: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    keys = sorted({key for p in props for key in p})
+    return {key: [p.get(key) for p in props] for key in keys}
+
+
+def _from_columns(columns: Dict[str, List[Any]], count: int) -> List[Dict[str, Any]]:
+    rows = [{} for _ in range(count)]
+    for key, values in columns.items():
+        for row, value in zip(rows, values):
+            if value is not None:
+                row[key] = value
+    return rows
+
+
+def _pack_default(value: Any) -> Any:
+    # Neo4j temporal and spatial values have no msgpack equivalent
+    return str(value)
+
+
+class _ChunkWriter:
+    def __init__(self, f, packer: msgpack.Packer, chunk_size: int, stats: SnapshotStats):
+        self.f = f
+        self.packer = packer
+        self.chunk_size = chunk_size
+        self.stats = stats
+        self.pending: Dict[Tuple, Dict[str, list]] = {}
+
+    def add(self, kind: str, group: Tuple, **columns):
+        buffer = self.pending.setdefault((kind, group), {name: [] for name in columns})
+        for name, value in columns.items():
+            buffer[name].append(value)
+        if len(buffer["props"]) >= self.chunk_size:
+            self.flush(kind, group)
+
+    def flush(self, kind: str, group: Tuple):
+        buffer = self.pending.pop((kind, group), None)
+        if not buffer:
+            return
+        chunk = {"kind": kind, "count": len(buffer["props"]), "props": _to_columns(buffer.pop("props"))}
+        if kind == "nodes":
+            chunk["labels"] = list(group)
+        else:
+            chunk["type"] = group[0]
+        chunk.update(buffer)
+        self.f.write(self.packer.pack(chunk))
+        self.stats.chunks += 1
+
+    def flush_all(self):
+        for kind, group in list(self.pending):
+            self.flush(kind, group)
+
+
+async def write_snapshot(
+    path: str,
+    nodes: AsyncIterable[Tuple[str, List[str], Dict[str, Any]]],
+    relationships: AsyncIterable[Tuple[str, str, str, Dict[str, Any]]],
+    chunk_size: int = 10000
+) -> SnapshotStats:
+    """
+    Stream (element_id, labels, props) nodes and (start_id, type, end_id, props)
+    relationships into a snapshot file, written atomically.
+    """
+    stats = SnapshotStats()
+    node_ids: Dict[str, int] = {}
+    packer = msgpack.Packer(default=_pack_default)
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "wb") as f:
+        f.write(packer.pack({
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "labels": SNAPSHOT_LABELS,
+            "rel_types": SNAPSHOT_REL_TYPES,
+        }))
+        writer = _ChunkWriter(f, packer, chunk_size, stats)
+
+        async for element_id, labels, props in nodes:
+            node_id = node_ids.setdefault(element_id, len(node_ids))
+            known_labels = tuple(sorted(label for label in labels if label in SNAPSHOT_LABELS))
+            writer.add("nodes", known_labels, ids=node_id, props=props)
+            stats.nodes += 1
+        writer.flush_all()
+
+        async for start_id, rel_type, end_id, props in relationships:
+            if start_id not in node_ids or end_id not in node_ids:
+                stats.skipped_relationships += 1
+                continue
+            writer.add("relationships", (rel_type,), src=node_ids[start_id], dst=node_ids[end_id], props=props)
+            stats.relationships += 1
+        writer.flush_all()
+
+        f.write(packer.pack({"kind": "end", "nodes": stats.nodes, "relationships": stats.relationships}))
+
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote snapshot {path}: {stats}")
+    return stats
+
+
+def iter_snapshot(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the chunks of a snapshot, checking the header and end marker."""
+    with open(path, "rb") as f:
+        unpacker = msgpack.Unpacker(f, raw=False, max_buffer_size=1 << 30)
+        header = next(unpacker, None)
+        if not header or header.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not a graph snapshot")
+        if header["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {header['version']}")
+        for chunk in unpacker:
+            if chunk["kind"] == "end":
+                return
+            yield chunk
+    raise ValueError(f"{path} is truncated: no end marker")
+
+
+def _check_labels(labels: List[str]):
+    unknown = set(labels) - set(SNAPSHOT_LABELS)
+    if unknown:
+        raise ValueError(f"Unexpected labels in snapshot: {sorted(unknown)}")
+
+
+def _check_rel_type(rel_type: str):
+    if rel_type not in SNAPSHOT_REL_TYPES:
+        raise ValueError(f"Unexpected relationship type in snapshot: {rel_type}")
+
+
+def plan_import(path: str, batch_size: int = 10000) -> Iterator[ImportBatch]:
+    """Turn a snapshot into UNWIND batches; all nodes come before any relationship."""
+    for chunk in iter_snapshot(path):
+        props = _from_columns(chunk["props"], chunk["count"])
+        if chunk["kind"] == "nodes":
+            labels = chunk["labels"]
+            _check_labels(labels)
+            query = f"""
+            UNWIND $rows AS row
+            CREATE (n:{':'.join(labels + [IMPORT_LABEL])})
+            SET n = row.props, n.{IMPORT_ID} = row.id
+            """
+            rows = [{"id": i, "props": p} for i, p in zip(chunk["ids"], props)]
+            for start in range(0, len(rows), batch_size):
+                yield ImportBatch("nodes", query, rows[start:start + batch_size], labels=labels)
+        else:
+            rel_type = chunk["type"]
+            _check_rel_type(rel_type)
+            query = f"""
+            UNWIND $rows AS row
+            MATCH (a:{IMPORT_LABEL} {{{IMPORT_ID}: row.src}})
+            MATCH (b:{IMPORT_LABEL} {{{IMPORT_ID}: row.dst}})
+            CREATE (a)-[r:{rel_type}]->(b)
+            SET r = row.props
+            """
+            rows = [
+                {"src": s, "dst": d, "props": p}
+                for s, d, p in zip(chunk["src"], chunk["dst"], props)
+            ]
+            for start in range(0, len(rows), batch_size):
+                yield ImportBatch("relationships", query, rows[start:start + batch_size], rel_type=rel_type)
+
+
+async def export_graph(neo4j_service, path: str, chunk_size: int = 10000) -> SnapshotStats:
+    """Export the knowledge graph to a snapshot file, streaming from Neo4j."""
+    return await write_snapshot(
+        path,
+        neo4j_service.iter_nodes(SNAPSHOT_LABELS),
+        neo4j_service.iter_relationships(SNAPSHOT_REL_TYPES),
+        chunk_size=chunk_size
+    )
+
+
+async def import_graph(
+    neo4j_service,
+    path: str,
+    batch_size: int = 10000,
+    allow_non_empty: bool = False
+) -> SnapshotStats:
+    """
+    Load a snapshot into Neo4j in large UNWIND batches, one transaction each.
+    Meant for an empty database; nodes are created, not merged.
+    """
+    if not allow_non_empty and await neo4j_service.count_nodes() > 0:
+        raise ValueError("Target database is not empty")
+
+    stats = SnapshotStats()
+    await neo4j_service.run_write(
+        f"CREATE INDEX snapshot_import_id IF NOT EXISTS FOR (n:{IMPORT_LABEL}) ON (n.{IMPORT_ID})"
+    )
+    await neo4j_service.run_write("CALL db.awaitIndexes()")
+    try:
+        for batch in plan_import(path, batch_size):
+            await neo4j_service.run_write(batch.query, {"rows": batch.rows})
+            if batch.kind == "nodes":
+                stats.nodes += len(batch.rows)
+            else:
+                stats.relationships += len(batch.rows)
+            stats.chunks += 1
+            logger.info(f"Imported {stats.nodes} nodes, {stats.relationships} relationships")
+    finally:
+        # Strip the import bookkeeping in bounded batches
+        cleanup = f"""
+        MATCH (n:{IMPORT_LABEL})
+        WITH n LIMIT $limit
+        REMOVE n:{IMPORT_LABEL}, n.{IMPORT_ID}
+        RETURN count(n) AS updated
+        """
+        while (await neo4j_service.run_write(cleanup, {"limit": batch_size}))[0]["updated"]:
+            pass
+        await neo4j_service.run_write("DROP INDEX snapshot_import_id IF EXISTS")
+    return stats
+
+
+def _csv_type(values: List[Any]) -> str:
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        return "boolean"
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return "long"
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return "double"
+    if present and all(isinstance(v, list) for v in present):
+        return "string[]"
+    return "string"
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ";".join(str(v) for v in value)
+    return value
+
+
+def export_admin_csv(path: str, out_dir: str) -> List[str]:
+    """
+    Convert a snapshot into CSV files for `neo4j-admin database import full`,
+    one file per chunk. Returns the command-line arguments naming the files.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    args = []
+    for index, chunk in enumerate(iter_snapshot(path)):
+        columns = chunk["props"]
+        header_types = {key: _csv_type(values) for key, values in columns.items()}
+        if chunk["kind"] == "nodes":
+            _check_labels(chunk["labels"])
+            filename = os.path.join(out_dir, f"nodes_{index:05d}.csv")
+            header = ["id:ID", ":LABEL"] + [f"{k}:{t}" for k, t in header_types.items()]
+            fixed = [[i, ";".join(chunk["labels"])] for i in chunk["ids"]]
+            args.append(f"--nodes={filename}")
+        else:
+            _check_rel_type(chunk["type"])
+            filename = os.path.join(out_dir, f"relationships_{index:05d}.csv")
+            header = [":START_ID", ":END_ID", ":TYPE"] + [f"{k}:{t}" for k, t in header_types.items()]
+            fixed = [[s, d, chunk["type"]] for s, d in zip(chunk["src"], chunk["dst"])]
+            args.append(f"--relationships={filename}")
+
+        with open(filename, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for row_index, row in enumerate(fixed):
+                writer.writerow(row + [_csv_value(columns[key][row_index]) for key in header_types])
+    return args + ["--array-delimiter=;"]
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RECORD_MODES = ("replay", "record", "auto")
+
+
+@dataclass
+class Completion:
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class TransientProviderError(Exception):
+    """A provider failure worth retrying: timeouts, dropped connections, 429 and 5xx answers."""
+
+
+class CassetteMissError(Exception):
+    """Replay-only mode found no recording for a request."""
+
+
+class LLMProvider(ABC):
+    """Sends one chat completion request and returns the message text."""
+
+    name = "base"
+
+    @abstractmethod
+    async def complete(self, model: str, messages: List[Dict], json_mode: bool = True) -> Completion:
+        ...
+
+    async def close(self):
+        pass
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    Any client exposing ``chat.completions.create``. By default an
+    openai.AsyncOpenAI client, so a timeout or a cancelled hedge cancels the
+    HTTP request itself. Blocking clients (openai.OpenAI, FakeLLMClient) are
+    still accepted and run in a worker thread, which cannot be cancelled.
+    """
+
+    name = "openai"
+
+    def __init__(self, client=None, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self._owns_client = client is None
+        if client is None:
+            import openai  # deferred: slow to import
+            client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url)
+        self.client = client
+        self._is_async = inspect.iscoroutinefunction(inspect.unwrap(client.chat.completions.create))
+
+    async def complete(self, model: str, messages: List[Dict], json_mode: bool = True) -> Completion:
+        kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+        create = self.client.chat.completions.create
+        if self._is_async:
+            response = await create(model=model, messages=messages, **kwargs)
+        else:
+            response = await asyncio.to_thread(create, model=model, messages=messages, **kwargs)
+        usage = getattr(response, "usage", None)
+        return Completion(
+            content=response.choices[0].message.content,
+            prompt_tokens=(usage.prompt_tokens or 0) if usage else 0,
+            completion_tokens=(usage.completion_tokens or 0) if usage else 0,
+        )
+
+    async def close(self):
+        if self._owns_client:
+            await self.client.close()
+
+
+class LocalHTTPProvider(LLMProvider):
+    """
+    An OpenAI-compatible server (vLLM, llama.cpp, Ollama, the load-test stub)
+    spoken to directly with an async HTTP client, so no thread is held per call.
+    """
+
+    name = "local"
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout: float = 60.0, transport=None):
+        import httpx
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._httpx = httpx
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"), headers=headers, timeout=timeout, transport=transport
+        )
+
+    async def complete(self, model: str, messages: List[Dict], json_mode: bool = True) -> Completion:
+        body = {"model": model, "messages": messages}
+        if json_mode:
+            body["response_format"] = {"type": "json_object"}
+        try:
+            response = await self.client.post("/chat/completions", json=body)
+        except self._httpx.TransportError as e:
+            raise TransientProviderError(f"{type(e).__name__}: {e}") from e
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientProviderError(f"HTTP {response.status_code}: {response.text[:200]}")
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usage") or {}
+        return Completion(
+            content=data["choices"][0]["message"]["content"],
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def request_key(model: str, messages: List[Dict], json_mode: bool) -> str:
+    """Stable hash identifying a request, used as the cassette name."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "json_mode": json_mode},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecordReplayProvider(LLMProvider):
+    """
+    Stores request-hash -> response cassettes on disk.
+
+    replay: answer only from cassettes, raising CassetteMissError on a miss.
+    record: always call the inner provider and (re)write the cassette.
+    auto:   replay when a cassette exists, otherwise call and record.
+    """
+
+    name = "replay"
+
+    def __init__(self, cassette_dir: str, inner: Optional[LLMProvider] = None, mode: str = "replay"):
+        if mode not in RECORD_MODES:
+            raise ValueError(f"mode must be one of {RECORD_MODES}, not {mode!r}")
+        if mode != "replay" and inner is None:
+            raise ValueError(f"{mode} mode needs an inner provider to record from")
+        self.cassette_dir = cassette_dir
+        self.inner = inner
+        self.mode = mode
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cassette_dir, key[:2], f"{key}.json")
+
+    def _load(self, key: str) -> Optional[Completion]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return Completion(**json.load(f)["response"])
+        except FileNotFoundError:
+            return None
+
+    def _save(self, key: str, model: str, messages: List[Dict], completion: Completion):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {
+            "request": {"model": model, "messages": messages},
+            "response": asdict(completion),
+            "recorded_at": time.time(),
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".cassette-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+    async def complete(self, model: str, messages: List[Dict], json_mode: bool = True) -> Completion:
+        key = request_key(model, messages, json_mode)
+        if self.mode != "record":
+            completion = self._load(key)
+            if completion is not None:
+                self.stats["hits"] += 1
+                return completion
+            self.stats["misses"] += 1
+            if self.mode == "replay":
+                raise CassetteMissError(f"No cassette for request {key[:12]} in {self.cassette_dir}")
+
+        completion = await self.inner.complete(model, messages, json_mode)
+        self._save(key, model, messages, completion)
+        self.stats["recorded"] += 1
+        return completion
+
+    async def close(self):
+        if self.inner is not None:
+            await self.inner.close()
+
+
+def as_provider(client_or_provider) -> LLMProvider:
+    """Accept a provider, or wrap an OpenAI-style client in one."""
+    if isinstance(client_or_provider, LLMProvider):
+        return client_or_provider
+    return OpenAIProvider(client_or_provider)
+
+
+def build_provider(
+    kind: str = "openai",
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    record_mode: Optional[str] = None,
+    cassette_dir: str = "cassettes",
+    timeout: float = 60.0,
+) -> LLMProvider:
+    """Create the provider described by configuration, optionally wrapped for record/replay."""
+    inner: Optional[LLMProvider] = None
+    if record_mode != "replay":
+        if kind == "openai":
+            inner = OpenAIProvider(api_key=api_key, base_url=base_url)
+        elif kind == "local":
+            if not base_url:
+                raise ValueError("The local provider needs OPENAI_BASE_URL")
+            inner = LocalHTTPProvider(base_url, api_key=api_key, timeout=timeout)
+        else:
+            raise ValueError(f"Unknown LLM provider {kind!r}")
+    if record_mode:
+        return RecordReplayProvider(cassette_dir, inner=inner, mode=record_mode)
+    return inner
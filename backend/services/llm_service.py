@@ -0,0 +1,261 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from backend.services.llm_providers import LLMProvider, TransientProviderError, as_provider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+_retryable_errors: Optional[Tuple[type, ...]] = None
+
+
+def retryable_errors() -> Tuple[type, ...]:
+    """
+    Errors that indicate a transient provider problem worth retrying. Resolved on
+    first use so importing this module does not load the OpenAI SDK.
+    """
+    global _retryable_errors
+    if _retryable_errors is None:
+        import openai
+        _retryable_errors = (
+            openai.APITimeoutError,
+            openai.APIConnectionError,
+            openai.RateLimitError,
+            openai.InternalServerError,
+            TransientProviderError,
+            asyncio.TimeoutError,
+        )
+    return _retryable_errors
+
+
+class LLMUnavailableError(Exception):
+    """Raised when the LLM provider is failing and calls are being rejected."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated provider errors.
+
+    Closed: calls go through. Open: calls are rejected until reset_timeout has
+    passed. Half-open: a single trial call decides whether to close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and self.retry_after() == 0.0:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def release_trial(self):
+        """Give up a half-open trial slot without a verdict, e.g. on cancellation."""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"LLM circuit opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies, used to pick the hedge delay."""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(p * len(ordered)))
+        return ordered[index]
+
+
+# Provider health is shared by every service instance in the process, since
+# analyzers and normalizers are created per request
+default_breaker = CircuitBreaker()
+default_latency = LatencyTracker()
+
+
+class LLMService:
+    """
+    Resilient JSON chat completions on top of an LLM provider. A bare
+    OpenAI-style client is accepted too and wrapped in an OpenAIProvider.
+
+    Each call gets a timeout, jittered exponential backoff on retryable errors,
+    an optional hedged duplicate request once the call outlives the recent p95
+    latency, and a circuit breaker that rejects calls during provider outages.
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str = DEFAULT_MODEL,
+        timeout: float = 60.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        breaker: Optional[CircuitBreaker] = None,
+        latency: Optional[LatencyTracker] = None,
+        on_completion: Optional[Callable[[str, float, int, int], None]] = None,
+    ):
+        self.provider: LLMProvider = as_provider(client)
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or default_breaker
+        self.latency = latency or default_latency
+        # Called with (model, seconds, prompt_tokens, completion_tokens) after each successful call
+        self.on_completion = on_completion
+        self.stats = {
+            "calls": 0, "retries": 0, "hedges": 0, "failures": 0, "parse_errors": 0,
+            "prompt_tokens": 0, "completion_tokens": 0,
+        }
+
+    async def complete_json(self, prompt: str, model: Optional[str] = None) -> Dict:
+        """Send a single-message prompt and return the parsed JSON response."""
+        model = model or self.model
+        messages = [{"role": "user", "content": prompt}]
+        self.stats["calls"] += 1
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise LLMUnavailableError(
+                    "LLM provider circuit is open",
+                    retry_after=self.breaker.retry_after()
+                )
+            try:
+                content = await asyncio.wait_for(
+                    self._hedged_call(model, messages),
+                    timeout=self.timeout
+                )
+            except asyncio.CancelledError:
+                self.breaker.release_trial()
+                raise
+            except retryable_errors() as e:
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    self.stats["failures"] += 1
+                    raise LLMUnavailableError(
+                        f"LLM call failed after {attempt + 1} attempts: {e!r}",
+                        retry_after=self.breaker.retry_after()
+                    ) from e
+                delay = self._backoff(attempt)
+                self.stats["retries"] += 1
+                logger.warning(f"Retryable LLM error ({e!r}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except Exception:
+                # The provider answered, so it is reachable even though it rejected the request
+                self.breaker.record_success()
+                raise
+            else:
+                # The provider answered, so malformed JSON is retried without counting against it
+                self.breaker.record_success()
+                try:
+                    return json.loads(content)
+                except json.JSONDecodeError as e:
+                    self.stats["parse_errors"] += 1
+                    if attempt == self.max_retries:
+                        self.stats["failures"] += 1
+                        raise
+                    self.stats["retries"] += 1
+                    logger.warning(f"LLM returned malformed JSON ({e}), retrying")
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self.latency.samples) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_quantile)
+
+    async def _hedged_call(self, model: str, messages: List[Dict]) -> str:
+        """Run the request, adding one duplicate if it is slower than the hedge delay."""
+        tasks = [asyncio.ensure_future(self._timed_call(model, messages))]
+        try:
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    self.stats["hedges"] += 1
+                    logger.info(f"LLM call slower than {hedge_delay:.2f}s, sending hedged request")
+                    tasks.append(asyncio.ensure_future(self._timed_call(model, messages)))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _timed_call(self, model: str, messages: List[Dict]) -> str:
+        started = time.monotonic()
+        completion = await self.provider.complete(model, messages, json_mode=True)
+        elapsed = time.monotonic() - started
+        self.latency.record(elapsed)
+        self.stats["prompt_tokens"] += completion.prompt_tokens
+        self.stats["completion_tokens"] += completion.completion_tokens
+        if self.on_completion is not None:
+            self.on_completion(model, elapsed, completion.prompt_tokens, completion.completion_tokens)
+        return completion.content
+
+    async def close(self):
+        await self.provider.close()
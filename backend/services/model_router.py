@@ -0,0 +1,177 @@
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from backend.core.near_duplicate import mask_question_text
+
+logger = logging.getLogger(__name__)
+
+SMALL = "small"
+STRONG = "strong"
+
+# Characters that carry mathematical structure rather than prose
+_SYMBOLS = re.compile(r"[0-9=+\-*/^()\[\]{}<>|!√∫∑∏πθ∞≤≥≠±∂∇·×÷%]")
+# Wording that tends to need multi-step reasoning regardless of length
+_HARD_TERMS = re.compile(
+    r"\b(prove|proof|show that|integral|integrate|derivative|differentiate|limit|series|"
+    r"converge\w*|matrix|matrices|eigen\w*|induction|theorem|differential|vector|probability)\b",
+    re.IGNORECASE
+)
+_PARTS = re.compile(r"(?:^|\s)(?:\(?[a-h]\)|\(?[ivx]+\)|part \w+)\s", re.IGNORECASE)
+
+
+@dataclass
+class ModelTier:
+    name: str
+    model: str
+    # USD per 1k tokens, for comparing tiers; 0 when unknown
+    prompt_cost: float = 0.0
+    completion_cost: float = 0.0
+
+
+def question_complexity(question_text: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Cheap 0-1 complexity estimate from the text alone, with its components:
+    length, density of mathematical symbols, hard wording and multi-part structure.
+    """
+    text = question_text.strip()
+    length = min(1.0, len(text) / 400)
+    symbols = len(_SYMBOLS.findall(text)) / max(1, len(text))
+    density = min(1.0, symbols / 0.4)
+    terms = min(1.0, len(_HARD_TERMS.findall(text)) / 2)
+    parts = min(1.0, len(_PARTS.findall(text)) / 3)
+    components = {"length": length, "symbols": density, "terms": terms, "parts": parts}
+    score = 0.3 * length + 0.2 * density + 0.35 * terms + 0.15 * parts
+    return min(1.0, score), components
+
+
+class TierStats:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.escalations = 0
+
+
+class ModelRouter:
+    """
+    Sends simple questions and concept-match checks to a small model tier and
+    only complex questions to the strong tier.
+
+    The score comes from question_complexity, blended with the difficulty the
+    LLM assigned to earlier questions that are identical once numbers are
+    masked, so recurring templates are routed on what their analysis showed.
+    Per-tier call counts, latency, tokens and estimated cost are kept for
+    comparing the tiers.
+    """
+
+    def __init__(
+        self,
+        small: ModelTier,
+        strong: ModelTier,
+        threshold: float = 0.5,
+        history_weight: float = 0.7,
+        history_size: int = 10000,
+    ):
+        self.tiers = {SMALL: small, STRONG: strong}
+        self.threshold = threshold
+        self.history_weight = history_weight
+        self.history_size = history_size
+        self._history: "OrderedDict[str, float]" = OrderedDict()
+        self._by_model = {small.model: SMALL, strong.model: STRONG}
+        self._stats = {SMALL: TierStats(), STRONG: TierStats()}
+        self._routed = {SMALL: 0, STRONG: 0}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.tiers[SMALL].model != self.tiers[STRONG].model
+
+    def score(self, question_text: str) -> Tuple[float, Dict[str, float]]:
+        score, components = question_complexity(question_text)
+        difficulty = self._history.get(mask_question_text(question_text))
+        if difficulty is not None:
+            components["history"] = difficulty
+            score = self.history_weight * difficulty + (1 - self.history_weight) * score
+        return score, components
+
+    def tier_for_question(self, question_text: str) -> str:
+        score, components = self.score(question_text)
+        tier = STRONG if score >= self.threshold else SMALL
+        with self._lock:
+            self._routed[tier] += 1
+        logger.info(
+            f"Routed question to {tier} tier ({self.tiers[tier].model}), score {score:.2f} "
+            f"{ {k: round(v, 2) for k, v in components.items()} }"
+        )
+        return tier
+
+    def model_for_question(self, question_text: str) -> str:
+        return self.tiers[self.tier_for_question(question_text)].model
+
+    def model_for_concept_match(self) -> str:
+        with self._lock:
+            self._routed[SMALL] += 1
+        return self.tiers[SMALL].model
+
+    def strong_model(self) -> str:
+        return self.tiers[STRONG].model
+
+    def group_by_tier(self, questions: List[str]) -> Dict[str, List[int]]:
+        """Indices of questions per tier, so batches never mix tiers."""
+        groups: Dict[str, List[int]] = {SMALL: [], STRONG: []}
+        for index, question_text in enumerate(questions):
+            groups[self.tier_for_question(question_text)].append(index)
+        return groups
+
+    def observe(self, question_text: str, difficulty: float):
+        """Remember the analyzed difficulty of a question template."""
+        key = mask_question_text(question_text)
+        with self._lock:
+            self._history[key] = max(0.0, min(1.0, float(difficulty)))
+            self._history.move_to_end(key)
+            while len(self._history) > self.history_size:
+                self._history.popitem(last=False)
+
+    def record_escalation(self):
+        with self._lock:
+            self._stats[STRONG].escalations += 1
+
+    def record_usage(self, model: str, seconds: float, prompt_tokens: int, completion_tokens: int):
+        """Completion listener for LLMService: attributes each call to its tier."""
+        tier = self._by_model.get(model)
+        if tier is None:
+            return
+        with self._lock:
+            stats = self._stats[tier]
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+
+    def report(self) -> Dict:
+        tiers = {}
+        with self._lock:
+            for name, tier in self.tiers.items():
+                stats = self._stats[name]
+                cost = (stats.prompt_tokens * tier.prompt_cost + stats.completion_tokens * tier.completion_cost) / 1000
+                tiers[name] = {
+                    "model": tier.model,
+                    "routed": self._routed[name],
+                    "calls": stats.calls,
+                    "avg_latency_ms": round(stats.seconds / stats.calls * 1000, 1) if stats.calls else None,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "estimated_cost_usd": round(cost, 6),
+                    "escalations": stats.escalations,
+                }
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                "known_templates": len(self._history),
+                "tiers": tiers,
+            }
@@ -1,166 +1,503 @@
-from neo4j import AsyncGraphDatabase
-from typing import Dict, List
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncGraphDatabase
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import asyncio
+from backend.core.analysis_diff import AnalysisDiff, StoredAnalysis, diff_analysis, stored_from_graph
+
+# One query per item category, resolving every requested key in a single
+# UNWIND: related items, prerequisites, difficulty and alternative names.
+# Prerequisites may be Concept or legacy Prerequisite nodes, so they are unlabelled.
+NEIGHBORHOOD_QUERIES = {
+    "concepts": """
+    UNWIND $keys AS key
+    OPTIONAL MATCH (c:Concept {name: key})
+    CALL {
+        WITH c
+        OPTIONAL MATCH (c)<-[:TESTS_CONCEPT]-(:Question)-[:TESTS_CONCEPT]->(other:Concept)
+        WHERE other <> c
+        WITH other, count(*) AS strength
+        ORDER BY strength DESC
+        RETURN [x IN collect({name: other.name, strength: strength}) WHERE x.name IS NOT NULL] AS related
+    }
+    CALL {
+        WITH c
+        OPTIONAL MATCH (c)<-[:TESTS_CONCEPT]-(:Question)-[:REQUIRES_PREREQUISITE]->(p)
+        WITH p, count(*) AS count
+        ORDER BY count DESC
+        RETURN [x IN collect({name: p.name, count: count}) WHERE x.name IS NOT NULL] AS prerequisites
+    }
+    CALL {
+        WITH c
+        OPTIONAL MATCH (c)<-[:TESTS_CONCEPT]-(q:Question)
+        RETURN avg(q.difficulty_level) AS difficulty
+    }
+    CALL {
+        WITH c
+        OPTIONAL MATCH (c)-[:ALTERNATIVE_FORM]->(a:AlternativeForm)
+        RETURN collect(a.name) AS alternatives
+    }
+    RETURN key, c IS NOT NULL AS found, related, prerequisites, difficulty, alternatives
+    """,
+    "questions": """
+    UNWIND $keys AS key
+    OPTIONAL MATCH (q:Question {text: key})
+    CALL {
+        WITH q
+        OPTIONAL MATCH (q)-[r:RELATED_TO]->(other:Question)
+        WHERE other <> q
+        WITH other, r.weight AS strength
+        ORDER BY strength DESC
+        RETURN [x IN collect({name: other.text, strength: strength}) WHERE x.name IS NOT NULL] AS related
+    }
+    CALL {
+        WITH q
+        OPTIONAL MATCH (q)-[r:REQUIRES_PREREQUISITE]->(p)
+        WITH p, count(r) AS count
+        ORDER BY count DESC
+        RETURN [x IN collect({name: p.name, count: count}) WHERE x.name IS NOT NULL] AS prerequisites
+    }
+    CALL {
+        WITH q
+        OPTIONAL MATCH (q)-[:NEAR_DUPLICATE_OF]-(d:Question)
+        RETURN collect(DISTINCT d.text) AS alternatives
+    }
+    RETURN key, q IS NOT NULL AS found, related, prerequisites, q.difficulty_level AS difficulty, alternatives
+    """,
+    "techniques": """
+    UNWIND $keys AS key
+    OPTIONAL MATCH (t:Technique {name: key})
+    CALL {
+        WITH t
+        OPTIONAL MATCH (t)-[r:RELATED_TO]->(other:Technique)
+        WHERE other <> t
+        WITH other, count(r) AS strength
+        ORDER BY strength DESC
+        RETURN [x IN collect({name: other.name, strength: strength}) WHERE x.name IS NOT NULL] AS related
+    }
+    CALL {
+        WITH t
+        OPTIONAL MATCH (t)-[r:REQUIRES_PREREQUISITE]->(p)
+        WITH p, count(r) AS count
+        ORDER BY count DESC
+        RETURN [x IN collect({name: p.name, count: count}) WHERE x.name IS NOT NULL] AS prerequisites
+    }
+    CALL {
+        WITH t
+        OPTIONAL MATCH (q:Question)-[:SOLVED_BY_TECHNIQUE]->(t)
+        RETURN avg(q.difficulty_level) AS difficulty
+    }
+    CALL {
+        WITH t
+        OPTIONAL MATCH (t)-[:ALTERNATIVE_FORM]->(a:AlternativeForm)
+        RETURN collect(a.name) AS alternatives
+    }
+    RETURN key, t IS NOT NULL AS found, related, prerequisites, difficulty, alternatives
+    """,
+}
+
+# One hop of a subgraph: the heaviest relationships touching the frontier that
+# were not fetched in an earlier hop, and how many there are in total
+SUBGRAPH_HOP_QUERY = """
+CALL {
+    MATCH (n)-[r]-()
+    WHERE elementId(n) IN $frontier AND NOT elementId(r) IN $seen
+    RETURN count(DISTINCT r) AS total
+}
+CALL {
+    MATCH (n)-[r]-()
+    WHERE elementId(n) IN $frontier AND NOT elementId(r) IN $seen
+    WITH DISTINCT r
+    WITH r, toFloat(coalesce(r.strength, r.similarity, r.weight, 1.0)) AS weight
+    ORDER BY weight DESC, elementId(r)
+    LIMIT $limit
+    WITH r, weight, startNode(r) AS a, endNode(r) AS b
+    RETURN collect({
+        id: elementId(r), source: elementId(a), target: elementId(b), type: type(r), weight: weight,
+        source_node: {id: elementId(a), label: coalesce(a.name, a.text, a.description), labels: labels(a)},
+        target_node: {id: elementId(b), label: coalesce(b.name, b.text, b.description), labels: labels(b)}
+    }) AS edges
+}
+RETURN total, edges
+"""
+
+# Constraint name -> (label, property). MERGE on these keys relies on them to
+# not create duplicates when two writers race
+UNIQUENESS_CONSTRAINTS = {
+    "concept_name_unique": ("Concept", "name"),
+    "question_text_unique": ("Question", "text"),
+}
+
+# Lists written by create_question_nodes
+CREATE_QUESTION_LISTS = ("concepts", "prerequisites", "techniques", "extensions")
+
+# Each list is unwound inside its own subquery, so stages neither multiply each
+# other's rows nor stop the later ones when a list is empty
+CREATE_QUESTION_QUERY = """
+MERGE (q:Question {text: $text})
+CALL {
+    WITH q
+    UNWIND $concepts AS concept
+    MERGE (c:Concept {name: concept})
+    MERGE (q)-[:TESTS_CONCEPT]->(c)
+}
+CALL {
+    WITH q
+    UNWIND $prerequisites AS prereq
+    MERGE (p:Prerequisite {name: prereq})
+    MERGE (q)-[:REQUIRES_PREREQUISITE]->(p)
+}
+CALL {
+    WITH q
+    UNWIND $techniques AS technique
+    MERGE (t:Technique {name: technique})
+    MERGE (q)-[:SOLVED_BY_TECHNIQUE]->(t)
+}
+CALL {
+    WITH q
+    UNWIND $extensions AS extension
+    MERGE (e:Extension {name: extension})
+    MERGE (q)-[:EXTENDS_TO]->(e)
+}
+"""
+
+
+# The concept, prerequisite and step edges stored for a question
+STORED_ANALYSIS_QUERY = """
+MATCH (q:Question {text: $text})
+CALL {
+    WITH q
+    OPTIONAL MATCH (q)-[:TESTS_CONCEPT]->(c:Concept)
+    RETURN collect(DISTINCT c.name) AS concepts
+}
+CALL {
+    WITH q
+    OPTIONAL MATCH (q)-[r:REQUIRES_PREREQUISITE]->(p:Concept)
+    RETURN [x IN collect({name: p.name, order: r.order}) WHERE x.name IS NOT NULL] AS prerequisites
+}
+CALL {
+    WITH q
+    OPTIONAL MATCH (q)-[:HAS_STEP]->(s:SolutionStep)
+    OPTIONAL MATCH (s)-[:USES_CONCEPT]->(u:Concept)
+    WITH s, collect(u.name) AS used
+    RETURN [x IN collect({number: s.step_number, description: s.description, concepts_used: used})
+            WHERE x.number IS NOT NULL] AS steps
+}
+RETURN concepts, prerequisites, steps
+"""
+
+
+class CardinalityError(RuntimeError):
+    """A write created more nodes or relationships than its input allows; the transaction is rolled back."""
+
+
+async def _run_guarded(tx, query: str, params: Dict, max_created: int):
+    """
+    Run a write statement and fail if it created more than `max_created` nodes
+    plus relationships: the sign of rows multiplying between UNWIND stages.
+    """
+    result = await tx.run(query, params)
+    summary = await result.consume()
+    created = summary.counters.nodes_created + summary.counters.relationships_created
+    if created > max_created:
+        raise CardinalityError(f"Write created {created} nodes and relationships, at most {max_created} expected")
+    return summary
+
 
 class Neo4jService:
+    """
+    Reads run as managed read transactions on READ sessions, so a cluster routes
+    them to followers and read replicas, and writes as managed write transactions
+    on the leader. Managed transactions are retried by the driver on transient
+    errors. All sessions share one bookmark manager, so a read issued after a
+    write (e.g. the stored analysis after analyze) sees that write.
+    """
+
     def __init__(self, uri: str, user: str, password: str):
         self.driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
+        self.bookmarks = AsyncGraphDatabase.bookmark_manager()
 
     async def close(self):
         await self.driver.close()
 
+    def _session(self, access_mode: str):
+        return self.driver.session(default_access_mode=access_mode, bookmark_manager=self.bookmarks)
+
+    async def _read_one(self, query: str, params: Dict = None) -> Optional[Dict]:
+        """Run a read query and return its first record, or None."""
+        async def work(tx):
+            result = await tx.run(query, params or {})
+            record = await result.single()
+            return dict(record) if record else None
+
+        async with self._session(READ_ACCESS) as session:
+            return await session.execute_read(work)
+
     async def create_question_nodes(self, question_text: str, analysis: Dict[str, List[str]]):
-        async with self.driver.session() as session:
+        async with self._session(WRITE_ACCESS) as session:
             await session.execute_write(self._create_question_nodes, question_text, analysis)
 
     @staticmethod
     async def _create_question_nodes(tx, question_text: str, analysis: Dict[str, List[str]]):
-        # Create question node
-        query = """
-        MERGE (q:Question {text: $text})
-        
-        WITH q
-        UNWIND $concepts AS concept
-        MERGE (c:Concept {name: concept})
-        MERGE (q)-[:TESTS_CONCEPT]->(c)
-        
-        WITH q
-        UNWIND $prerequisites AS prereq
-        MERGE (p:Prerequisite {name: prereq})
-        MERGE (q)-[:REQUIRES_PREREQUISITE]->(p)
-        
-        WITH q
-        UNWIND $techniques AS technique
-        MERGE (t:Technique {name: technique})
-        MERGE (q)-[:SOLVED_BY_TECHNIQUE]->(t)
-        
-        WITH q
-        UNWIND $extensions AS extension
-        MERGE (e:Extension {name: extension})
-        MERGE (q)-[:EXTENDS_TO]->(e)
-        """
-        
-        await tx.run(query, 
-                    text=question_text,
-                    concepts=analysis["concepts"],
-                    prerequisites=analysis["prerequisites"],
-                    techniques=analysis["techniques"],
-                    extensions=analysis["extensions"])
-        
+        params = {key: list(dict.fromkeys(analysis[key])) for key in CREATE_QUESTION_LISTS}
+        await _run_guarded(tx, CREATE_QUESTION_QUERY, {"text": question_text, **params},
+                           max_created=1 + 2 * sum(len(names) for names in params.values()))
+
     async def get_all_concepts(self):
-        async with self.driver.session() as session:
-            result = await session.run(
-                """
-                MATCH (c:Concept)
-                OPTIONAL MATCH (q:Question)-[:TESTS_CONCEPT]->(c)
-                RETURN c.name as name, 
-                       count(q) as question_count
-                ORDER BY question_count DESC
-                """
-            )
-            return [dict(record) for record in await result.data()]
+        return await self.run_read(
+            """
+            MATCH (c:Concept)
+            OPTIONAL MATCH (q:Question)-[:TESTS_CONCEPT]->(c)
+            RETURN c.name as name, 
+                   count(q) as question_count
+            ORDER BY question_count DESC
+            """
+        )
 
     async def get_all_questions(self):
-        async with self.driver.session() as session:
-            result = await session.run(
-                """
-                MATCH (q:Question)
-                RETURN q.text as text
-                """
-            )
-            return [dict(record) for record in await result.data()]
+        return await self.run_read(
+            """
+            MATCH (q:Question)
+            RETURN q.text as text
+            """
+        )
 
     async def get_related_questions(self, question: str):
-        async with self.driver.session() as session:
-            result = await session.run(
-                """
-                MATCH (q1:Question {text: $question})-[r:RELATED_TO]->(q2:Question)
-                WHERE q1 <> q2
-                RETURN q2.text as text, count(*) as strength
-                ORDER BY strength DESC
-                """,
-                question=question
-            )
-            return [dict(record) for record in await result.data()]
+        return await self.run_read(
+            """
+            MATCH (q1:Question {text: $question})-[r:RELATED_TO]->(q2:Question)
+            WHERE q1 <> q2
+            RETURN q2.text as text, r.weight as strength
+            ORDER BY strength DESC
+            """,
+            {"question": question}
+        )
 
     async def get_prerequisites_question(self, question: str):
-        async with self.driver.session() as session:
-            result = await session.run(
-                """
-                MATCH (q:Question {text: $question})-[r:REQUIRES_PREREQUISITE]->(p:Prerequisite)
-                RETURN p.name as name, count(*) as count
-                ORDER BY count DESC
-                """,
-                question=question
-            )
-            return [dict(record) for record in await result.data()]
+        return await self.run_read(
+            """
+            MATCH (q:Question {text: $question})-[r:REQUIRES_PREREQUISITE]->(p)
+            RETURN p.name as name, count(*) as count
+            ORDER BY count DESC
+            """,
+            {"question": question}
+        )
 
     async def get_all_techniques(self):
-        async with self.driver.session() as session:
-            result = await session.run(
-                """
-                MATCH (t:Technique)
-                RETURN t.name as name
-                """
-            )
-            return [dict(record) for record in await result.data()]
+        return await self.run_read(
+            """
+            MATCH (t:Technique)
+            RETURN t.name as name
+            """
+        )
 
     async def get_related_techniques(self, technique: str):
-        async with self.driver.session() as session:
-            result = await session.run(
-                """
-                MATCH (t1:Technique {name: $technique})-[r:RELATED_TO]->(t2:Technique)
-                WHERE t1 <> t2
-                RETURN t2.name as name, count(*) as strength
-                ORDER BY strength DESC
-                """,
-                technique=technique
-            )
-            return [dict(record) for record in await result.data()]
+        return await self.run_read(
+            """
+            MATCH (t1:Technique {name: $technique})-[r:RELATED_TO]->(t2:Technique)
+            WHERE t1 <> t2
+            RETURN t2.name as name, count(*) as strength
+            ORDER BY strength DESC
+            """,
+            {"technique": technique}
+        )
 
     async def get_prerequisites_technique(self, technique: str):
-        async with self.driver.session() as session:
-            result = await session.run(
-                """
-                MATCH (t:Technique {name: $technique})-[r:REQUIRES_PREREQUISITE]->(p:Prerequisite)
-                RETURN p.name as name, count(*) as count
-                ORDER BY count DESC
-                """,
-                technique=technique
-            )
-            return [dict(record) for record in await result.data()]
+        return await self.run_read(
+            """
+            MATCH (t:Technique {name: $technique})-[r:REQUIRES_PREREQUISITE]->(p)
+            RETURN p.name as name, count(*) as count
+            ORDER BY count DESC
+            """,
+            {"technique": technique}
+        )
 
     async def get_related_concepts(self, concept: str):
-        async with self.driver.session() as session:
-            result = await session.run(
+        return await self.run_read(
+            """
+            MATCH (c1:Concept {name: $concept})<-[:TESTS_CONCEPT]-(q:Question)
+                  -[:TESTS_CONCEPT]->(c2:Concept)
+            WHERE c1 <> c2
+            RETURN c2.name as name, count(*) as strength
+            ORDER BY strength DESC
+            """,
+            {"concept": concept}
+        )
+
+    async def get_prerequisites(self, concept: str):
+        return await self.run_read(
+            """
+            MATCH (c:Concept {name: $concept})<-[:TESTS_CONCEPT]-(q:Question)
+                  -[:REQUIRES_PREREQUISITE]->(p)
+            RETURN p.name as name, count(*) as count
+            ORDER BY count DESC
+            """,
+            {"concept": concept}
+        )
+        
+    async def write_analysis(self, question_text: str, properties: Dict, target: StoredAnalysis) -> AnalysisDiff:
+        """
+        Set the question's properties and bring its edges in line with `target` in one
+        transaction, returning the diff that was applied. The question is written first,
+        so its lock serializes concurrent analyses of it before the stored edges are
+        read and diffed. Each change is its own statement so it runs once per changed edge.
+        """
+        async def work(tx):
+            await _run_guarded(tx, """
+            MERGE (q:Question {text: $text})
+            SET q += $properties
+            """, {"text": question_text, "properties": properties}, max_created=1)
+            result = await tx.run(STORED_ANALYSIS_QUERY, {"text": question_text})
+            record = await result.single()
+            diff = diff_analysis(stored_from_graph(dict(record)) if record else StoredAnalysis(), target)
+            for query, params in self._diff_statements(diff):
+                # Every statement unwinds at most one list, creating at most a node and
+                # a relationship per item
+                items = max([len(value) for value in params.values() if isinstance(value, list)], default=0)
+                await _run_guarded(tx, query, {"text": question_text, **params}, max_created=2 * items)
+            return diff
+
+        async with self._session(WRITE_ACCESS) as session:
+            return await session.execute_write(work)
+
+    @staticmethod
+    def _diff_statements(diff: AnalysisDiff) -> List[Tuple[str, Dict]]:
+        """The write statements applying an AnalysisDiff to a question."""
+        statements = []
+        if diff.remove_concepts:
+            statements.append(("""
+            MATCH (q:Question {text: $text})-[r:TESTS_CONCEPT]->(c:Concept)
+            WHERE c.name IN $names
+            DELETE r
+            """, {"names": diff.remove_concepts}))
+        if diff.add_concepts:
+            statements.append(("""
+            MATCH (q:Question {text: $text})
+            UNWIND $names AS name
+            MERGE (c:Concept {name: name})
+            MERGE (q)-[r:TESTS_CONCEPT]->(c)
+            SET r.strength = 1.0
+            """, {"names": diff.add_concepts}))
+        if diff.remove_prerequisites:
+            statements.append(("""
+            MATCH (q:Question {text: $text})-[r:REQUIRES_PREREQUISITE]->(p:Concept)
+            WHERE p.name IN $names
+            DELETE r
+            """, {"names": diff.remove_prerequisites}))
+        if diff.set_prerequisites:
+            statements.append(("""
+            MATCH (q:Question {text: $text})
+            UNWIND $prerequisites AS prereq
+            MERGE (p:Concept {name: prereq.name})
+            MERGE (q)-[r:REQUIRES_PREREQUISITE]->(p)
+            SET r.order = prereq.index
+            """, {"prerequisites": diff.set_prerequisites}))
+        if diff.dedupe_steps:
+            statements.append(("""
+            MATCH (q:Question {text: $text})-[:HAS_STEP]->(s:SolutionStep)
+            WITH s.step_number AS number, collect(s) AS steps
+            WHERE size(steps) > 1
+            UNWIND steps[1..] AS extra
+            DETACH DELETE extra
+            """, {}))
+        if diff.remove_steps:
+            statements.append(("""
+            MATCH (q:Question {text: $text})-[:HAS_STEP]->(s:SolutionStep)
+            WHERE s.step_number IN $numbers
+            DETACH DELETE s
+            """, {"numbers": diff.remove_steps}))
+        if diff.upsert_steps:
+            statements.append(("""
+            MATCH (q:Question {text: $text})
+            UNWIND $steps AS step
+            MERGE (q)-[:HAS_STEP]->(s:SolutionStep {step_number: step.step})
+            SET s.description = step.description
+            """, {"steps": diff.upsert_steps}))
+        if diff.remove_step_concepts:
+            statements.append(("""
+            MATCH (q:Question {text: $text})
+            UNWIND $uses AS use
+            MATCH (q)-[:HAS_STEP]->(:SolutionStep {step_number: use.step})-[r:USES_CONCEPT]->(:Concept {name: use.concept})
+            DELETE r
+            """, {"uses": diff.remove_step_concepts}))
+        if diff.add_step_concepts:
+            statements.append(("""
+            MATCH (q:Question {text: $text})
+            UNWIND $uses AS use
+            MATCH (q)-[:HAS_STEP]->(s:SolutionStep {step_number: use.step})
+            MERGE (c:Concept {name: use.concept})
+            MERGE (s)-[:USES_CONCEPT]->(c)
+            """, {"uses": diff.add_step_concepts}))
+        return statements
+
+    async def run_write(self, query: str, params: Dict = None) -> List[Dict]:
+        """Run a query in its own write transaction and return its records."""
+        async def work(tx):
+            result = await tx.run(query, params or {})
+            return await result.data()
+
+        async with self._session(WRITE_ACCESS) as session:
+            return await session.execute_write(work)
+
+    async def run_read(self, query: str, params: Dict = None) -> List[Dict]:
+        """Run a query in its own read transaction and return its records."""
+        async def work(tx):
+            result = await tx.run(query, params or {})
+            return await result.data()
+
+        async with self._session(READ_ACCESS) as session:
+            return await session.execute_read(work)
+
+    async def run_auto_commit(self, query: str, params: Dict = None) -> List[Dict]:
+        """
+        Run a write query as an implicit transaction, as CALL { ... } IN TRANSACTIONS
+        requires. Unlike managed transactions it is not retried on transient errors.
+        """
+        async with self._session(WRITE_ACCESS) as session:
+            result = await session.run(query, params or {})
+            return await result.data()
+
+    async def ensure_constraints(self):
+        for name, (label, prop) in UNIQUENESS_CONSTRAINTS.items():
+            await self.run_write(
+                f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"
+            )
+
+    async def count_nodes(self) -> int:
+        record = await self._read_one("MATCH (n) RETURN count(n) AS count")
+        return record["count"]
+
+    async def iter_nodes(self, labels: List[str]) -> AsyncIterator[Tuple[str, List[str], Dict]]:
+        """Stream (element_id, labels, properties) for nodes carrying any of the labels."""
+        # Streaming cannot happen inside a retried transaction function, so this uses
+        # an explicit read transaction: routed to a reader, but not retried
+        async with self._session(READ_ACCESS) as session, await session.begin_transaction() as tx:
+            result = await tx.run(
                 """
-                MATCH (c1:Concept {name: $concept})<-[:TESTS_CONCEPT]-(q:Question)
-                      -[:TESTS_CONCEPT]->(c2:Concept)
-                WHERE c1 <> c2
-                RETURN c2.name as name, count(*) as strength
-                ORDER BY strength DESC
+                MATCH (n)
+                WHERE any(label IN labels(n) WHERE label IN $labels)
+                RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS props
                 """,
-                concept=concept
+                labels=labels
             )
-            return [dict(record) for record in await result.data()]
+            async for record in result:
+                yield record["id"], record["labels"], record["props"]
 
-    async def get_prerequisites(self, concept: str):
-        async with self.driver.session() as session:
-            result = await session.run(
+    async def iter_relationships(self, types: List[str]) -> AsyncIterator[Tuple[str, str, str, Dict]]:
+        """Stream (start_id, type, end_id, properties) for relationships of the given types."""
+        async with self._session(READ_ACCESS) as session, await session.begin_transaction() as tx:
+            result = await tx.run(
                 """
-                MATCH (c:Concept {name: $concept})<-[:TESTS_CONCEPT]-(q:Question)
-                      -[:REQUIRES_PREREQUISITE]->(p:Prerequisite)
-                RETURN p.name as name, count(*) as count
-                ORDER BY count DESC
+                MATCH (a)-[r]->(b)
+                WHERE type(r) IN $types
+                RETURN elementId(a) AS start, type(r) AS type, elementId(b) AS end, properties(r) AS props
                 """,
-                concept=concept
+                types=types
             )
-            return [dict(record) for record in await result.data()]
-        
+            async for record in result:
+                yield record["start"], record["type"], record["end"], record["props"]
+
     async def execute_query(self, query: str, params: Dict = None):
-        """Execute a Neo4j query with parameters."""
-        async with self.driver.session() as session:
-            await session.run(query, params or {})
+        """Execute a Neo4j write query with parameters."""
+        await self.run_write(query, params)
 
     async def get_concept_alternatives(self, concept_name: str) -> List[str]:
         """Get all alternative forms of a concept."""
@@ -168,10 +505,8 @@ class Neo4jService:
         MATCH (c:Concept {name: $name})-[:ALTERNATIVE_FORM]->(a:AlternativeForm)
         RETURN collect(a.name) as alternatives
         """
-        async with self.driver.session() as session:
-            result = await session.run(query, {"name": concept_name})
-            record = await result.single()
-            return record["alternatives"] if record else []
+        record = await self._read_one(query, {"name": concept_name})
+        return record["alternatives"] if record else []
 
     async def get_concept_hierarchy(self, concept_name: str) -> Dict:
         """Get concept hierarchy showing prerequisites and extensions."""
@@ -187,10 +522,8 @@ class Neo4jService:
             usage_count: size(prereq_rels)
         } as hierarchy
         """
-        async with self.driver.session() as session:
-            result = await session.run(query, {"name": concept_name})
-            record = await result.single()
-            return record["hierarchy"] if record else {}
+        record = await self._read_one(query, {"name": concept_name})
+        return record["hierarchy"] if record else {}
 
     async def get_domain_concepts(self, domain: str) -> List[Dict]:
         """Get all concepts within a mathematical domain."""
@@ -203,9 +536,8 @@ class Neo4jService:
         } as concept
         ORDER BY usage_count DESC
         """
-        async with self.driver.session() as session:
-            result = await session.run(query, {"domain": domain})
-            return [record["concept"] async for record in result]
+        records = await self.run_read(query, {"domain": domain})
+        return [record["concept"] for record in records]
 
     async def get_concept_difficulty(self, concept_name: str) -> float:
         """Calculate concept difficulty based on questions that test it."""
@@ -213,7 +545,163 @@ class Neo4jService:
         MATCH (c:Concept {name: $name})<-[:TESTS_CONCEPT]-(q:Question)
         RETURN avg(q.difficulty_level) as avg_difficulty
         """
-        async with self.driver.session() as session:
-            result = await session.run(query, {"name": concept_name})
-            record = await result.single()
-            return record["avg_difficulty"] if record else 0.0
+        record = await self._read_one(query, {"name": concept_name})
+        return record["avg_difficulty"] if record else 0.0
+
+    async def get_central_concepts(self, domain: Optional[str] = None, limit: int = 20) -> Dict[str, List[Dict]]:
+        """Concepts ranked by their stored PageRank, top `limit` per primary domain."""
+        query = """
+        MATCH (c:Concept)
+        WHERE c.pagerank IS NOT NULL AND c.domain_rank <= $limit
+          AND ($domain IS NULL OR c.primary_domain = $domain)
+        RETURN coalesce(c.primary_domain, 'Unknown') AS domain, c.name AS name,
+               c.pagerank AS pagerank, c.betweenness AS betweenness,
+               c.domain_rank AS rank, c.question_count AS questions, c.analytics_at AS computed_at
+        ORDER BY domain, rank
+        """
+        ranked: Dict[str, List[Dict]] = {}
+        for record in await self.run_read(query, {"domain": domain, "limit": limit}):
+            ranked.setdefault(record.pop("domain"), []).append(record)
+        return ranked
+
+    async def get_question_analysis(self, question_text: str) -> Optional[Dict]:
+        """Get the stored structural analysis of a question, or None if it was never analyzed."""
+        query = """
+        MATCH (q:Question {text: $text})
+        WHERE q.analyzed_at IS NOT NULL
+        OPTIONAL MATCH (q)-[:TESTS_CONCEPT]->(c:Concept)
+        WITH q, collect(DISTINCT c.name) AS concepts
+        OPTIONAL MATCH (q)-[r:REQUIRES_PREREQUISITE]->(p:Concept)
+        WITH q, concepts, p, r
+        ORDER BY r.order
+        RETURN {
+            concepts: concepts,
+            prerequisites: [name IN collect(p.name) WHERE name IS NOT NULL],
+            techniques: coalesce(q.techniques, []),
+            extensions: coalesce(q.extensions, []),
+            difficulty_level: q.difficulty_level,
+            domain: q.domain
+        } AS analysis
+        """
+        record = await self._read_one(query, {"text": question_text})
+        return record["analysis"] if record else None
+
+    async def link_near_duplicate(self, question_text: str, original_text: str, similarity: float):
+        """Record that a question reuses the analysis of a near-identical one."""
+        query = """
+        MATCH (q:Question {text: $text}), (o:Question {text: $original})
+        MERGE (q)-[r:NEAR_DUPLICATE_OF]->(o)
+        SET r.similarity = $similarity
+        """
+        await self.run_write(query, {"text": question_text, "original": original_text, "similarity": similarity})
+
+    async def get_question_concept_sets(self) -> List[Dict]:
+        """Every question's tested concepts and stored related-question weights."""
+        query = """
+        MATCH (q:Question)
+        CALL {
+            WITH q
+            OPTIONAL MATCH (q)-[:TESTS_CONCEPT]->(c:Concept)
+            RETURN collect(c.name) AS concepts
+        }
+        CALL {
+            WITH q
+            OPTIONAL MATCH (q)-[r:RELATED_TO]->(other:Question)
+            RETURN [x IN collect({text: other.text, weight: r.weight}) WHERE x.text IS NOT NULL] AS related
+        }
+        RETURN q.text AS text, concepts, related
+        """
+        return await self.run_read(query)
+
+    async def update_related_questions(self, links: List[Tuple[str, str, float]], unlinks: List[Tuple[str, str]]):
+        """Set and remove weighted RELATED_TO edges between questions in one transaction."""
+        async def work(tx):
+            if unlinks:
+                result = await tx.run("""
+                UNWIND $pairs AS pair
+                MATCH (:Question {text: pair[0]})-[r:RELATED_TO]->(:Question {text: pair[1]})
+                DELETE r
+                """, {"pairs": [list(pair) for pair in unlinks]})
+                await result.consume()
+            if links:
+                result = await tx.run("""
+                UNWIND $links AS link
+                MATCH (q:Question {text: link.source}), (o:Question {text: link.target})
+                MERGE (q)-[r:RELATED_TO]->(o)
+                SET r.weight = link.weight
+                """, {"links": [{"source": s, "target": t, "weight": w} for s, t, w in links]})
+                await result.consume()
+
+        async with self._session(WRITE_ACCESS) as session:
+            await session.execute_write(work)
+
+    async def get_subgraph(self, label: str, key: str, value: str, hops: int = 2, edge_limit: int = 2000) -> Optional[Dict]:
+        """
+        Get the multi-hop neighbourhood of a node as deduplicated nodes and edges.
+        `label` and `key` come from a fixed allowlist, `hops` is bounded by the caller.
+
+        The neighbourhood is expanded one hop at a time from the nodes reached so
+        far, keeping the `edge_limit` heaviest new relationships per hop, so a hub
+        loses its weakest edges rather than arbitrary ones. `complete` is false
+        when a hop had more relationships than that.
+        """
+        async def work(tx):
+            result = await tx.run(
+                f"MATCH (center:{label} {{{key}: $value}}) "
+                "RETURN elementId(center) AS id, coalesce(center.name, center.text) AS label, labels(center) AS labels",
+                {"value": value}
+            )
+            center = await result.single()
+            if not center:
+                return None
+            nodes = {center["id"]: dict(center)}
+            edges: Dict[str, Dict] = {}
+            frontier = [center["id"]]
+            complete = True
+            for _ in range(int(hops)):
+                if not frontier:
+                    break
+                result = await tx.run(SUBGRAPH_HOP_QUERY, {"frontier": frontier, "seen": list(edges), "limit": edge_limit})
+                record = await result.single()
+                complete = complete and record["total"] <= edge_limit
+                frontier = []
+                for edge in record["edges"]:
+                    for node in (edge.pop("source_node"), edge.pop("target_node")):
+                        if node["id"] not in nodes:
+                            nodes[node["id"]] = node
+                            frontier.append(node["id"])
+                    edges[edge.pop("id")] = edge
+            return {"center": center["id"], "nodes": list(nodes.values()), "edges": list(edges.values()), "complete": complete}
+
+        async with self._session(READ_ACCESS) as session:
+            return await session.execute_read(work)
+
+    async def get_neighborhoods(self, category: str, keys: List[str]) -> Dict[str, Dict]:
+        """
+        Related items, prerequisites, difficulty and alternatives for many items of
+        one category ("concepts", "questions" or "techniques") in one query, keyed by item.
+        """
+        if not keys:
+            return {}
+        records = await self.run_read(NEIGHBORHOOD_QUERIES[category], {"keys": keys})
+        return {record.pop("key"): record for record in records}
+
+    async def get_concepts_with_alternatives(self) -> Dict[str, List[str]]:
+        """Every concept name with the names of its alternative forms."""
+        records = await self.run_read("""
+        MATCH (c:Concept)
+        OPTIONAL MATCH (c)-[:ALTERNATIVE_FORM]->(a:AlternativeForm)
+        RETURN c.name as name, collect(a.name) as alternatives
+        """)
+        return {record["name"]: record["alternatives"] for record in records}
+
+    async def store_concept(self, name: str):
+        await self.run_write("MERGE (c:Concept {name: $name})", {"name": name})
+
+    async def store_alternative_form(self, concept_name: str, form: str):
+        """Record `form` as another name for an existing concept."""
+        await self.run_write("""
+        MATCH (c:Concept {name: $existing_name})
+        MERGE (a:AlternativeForm {name: $new_name})
+        MERGE (c)-[:ALTERNATIVE_FORM]->(a)
+        """, {"existing_name": concept_name, "new_name": form})
@@ -0,0 +1,111 @@
+import logging
+import re
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Full-text index name -> (labels, property)
+FULLTEXT_INDEXES = {
+    "question_text": (["Question"], "text"),
+    "concept_names": (["Concept", "Technique", "AlternativeForm"], "name"),
+}
+
+SEARCH_TYPES = ("concept", "technique", "question")
+
+# Characters with special meaning in Lucene query syntax
+LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+
+def escape_lucene(term: str) -> str:
+    return LUCENE_SPECIAL.sub(r"\\\1", term)
+
+
+def build_prefix_query(text: str) -> Optional[str]:
+    """
+    Turn user input into a Lucene query where every complete word must match
+    and the last, possibly unfinished word matches as a prefix.
+    Returns None when there is nothing to search for.
+    """
+    terms = [escape_lucene(t) for t in text.lower().split()]
+    terms = [t for t in terms if t]
+    if not terms:
+        return None
+    *complete, last = terms
+    # Prefer the exact word, but accept longer words starting with it
+    clauses = [f"+{t}" for t in complete] + [f"+({last} OR {last}*)"]
+    return " ".join(clauses)
+
+
+class SearchService:
+    """Prefix autocomplete over questions, concepts and their alternative forms."""
+
+    def __init__(self, neo4j_service):
+        self.neo4j = neo4j_service
+
+    async def ensure_indexes(self):
+        for name, (labels, prop) in FULLTEXT_INDEXES.items():
+            await self.neo4j.run_write(
+                f"CREATE FULLTEXT INDEX {name} IF NOT EXISTS "
+                f"FOR (n:{'|'.join(labels)}) ON EACH [n.{prop}]"
+            )
+
+    async def autocomplete(self, text: str, types: List[str] = SEARCH_TYPES, limit: int = 10) -> Dict:
+        started = time.perf_counter()
+        query = build_prefix_query(text)
+        results: List[Dict] = []
+        if query:
+            if "concept" in types or "technique" in types:
+                results += await self._search_concepts(query, types, limit)
+            if "question" in types:
+                results += await self._search_questions(query, limit)
+        results.sort(key=lambda r: (-r["score"], len(r["value"])))
+        took_ms = (time.perf_counter() - started) * 1000
+        if took_ms > 20:
+            logger.info(f"Slow autocomplete for {text!r}: {took_ms:.1f} ms")
+        return {"results": results[:limit], "took_ms": round(took_ms, 2)}
+
+    async def _search_concepts(self, query: str, types: List[str], limit: int) -> List[Dict]:
+        # Alternative forms resolve to the concept they belong to
+        records = await self.neo4j.run_read(
+            """
+            CALL db.index.fulltext.queryNodes('concept_names', $query, {limit: $limit})
+            YIELD node, score
+            OPTIONAL MATCH (owner:Concept)-[:ALTERNATIVE_FORM]->(node:AlternativeForm)
+            WITH coalesce(owner, node) AS target, node.name AS matched, score
+            WHERE target:Concept OR target:Technique
+            RETURN target.name AS value, labels(target) AS labels, matched, max(score) AS score
+            """,
+            {"query": query, "limit": limit * 3}
+        )
+        results = []
+        for record in records:
+            kind = "technique" if "Technique" in record["labels"] else "concept"
+            if kind not in types:
+                continue
+            results.append({
+                "type": kind,
+                "value": record["value"],
+                "matched": record["matched"],
+                "score": record["score"],
+            })
+        # One entry per concept, keeping its best-scoring match
+        best: Dict[str, Dict] = {}
+        for result in results:
+            if result["value"] not in best or result["score"] > best[result["value"]]["score"]:
+                best[result["value"]] = result
+        return list(best.values())
+
+    async def _search_questions(self, query: str, limit: int) -> List[Dict]:
+        records = await self.neo4j.run_read(
+            """
+            CALL db.index.fulltext.queryNodes('question_text', $query, {limit: $limit})
+            YIELD node, score
+            RETURN node.text AS value, score
+            """,
+            {"query": query, "limit": limit}
+        )
+        return [
+            {"type": "question", "value": r["value"], "matched": r["value"], "score": r["score"]}
+            for r in records
+        ]
@@ -0,0 +1,134 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import Dict, Optional
+
+from backend.config import get_settings
+from backend.services.neo4j_service import UNIQUENESS_CONSTRAINTS, Neo4jService
+
+logger = logging.getLogger(__name__)
+
+# Modules that are slow to import and only needed once requests arrive
+DEFERRED_IMPORTS = ("openai", "pytesseract", "PIL.Image")
+
+_neo4j_service: Optional[Neo4jService] = None
+
+
+def get_neo4j_service() -> Neo4jService:
+    """The Neo4j service shared by every request for the life of the process."""
+    global _neo4j_service
+    if _neo4j_service is None:
+        settings = get_settings()
+        _neo4j_service = Neo4jService(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+    return _neo4j_service
+
+
+async def close_neo4j_service():
+    global _neo4j_service
+    if _neo4j_service is not None:
+        await _neo4j_service.close()
+        _neo4j_service = None
+
+
+class StartupState:
+    """Tracks warm-up progress for the readiness probe and cold-start reporting."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.import_seconds: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.phases: Dict[str, float] = {}
+        self.attempts = 0
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def report(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "import_seconds": self.import_seconds,
+            "cold_start_seconds": self.ready_at - self.started_at if self.ready else None,
+            "phases": dict(self.phases),
+            "attempts": self.attempts,
+            "error": self.error,
+        }
+
+
+startup_state = StartupState()
+
+
+async def _import_deferred():
+    for name in DEFERRED_IMPORTS:
+        try:
+            await asyncio.to_thread(importlib.import_module, name)
+        except ImportError as e:
+            logger.warning(f"Optional module {name} unavailable: {e}")
+
+
+async def warm_up(neo4j: Neo4jService, state: StartupState, near_duplicates=None, related_questions=None):
+    """
+    Verify Neo4j connectivity, create and check the schema (uniqueness constraints
+    and full-text indexes), preload the concept catalog used by normalization
+    and prime read caches. Heavy imports load in a worker thread
+    meanwhile so the first analysis request does not pay for them.
+    """
+    from backend.services.concept_normalization_service import ConceptNormalizerService
+    from backend.services.search_service import FULLTEXT_INDEXES, SearchService
+
+    async def phase(name: str, start):
+        started = time.monotonic()
+        result = await start()
+        state.phases[name] = round(time.monotonic() - started, 4)
+        return result
+
+    async def ensure_schema():
+        await neo4j.ensure_constraints()
+        await SearchService(neo4j).ensure_indexes()
+        for kind, names in (("CONSTRAINTS", UNIQUENESS_CONSTRAINTS), ("INDEXES", FULLTEXT_INDEXES)):
+            records = await neo4j.run_read(
+                f"SHOW {kind} YIELD name WHERE name IN $names RETURN collect(name) AS names",
+                {"names": list(names)}
+            )
+            missing = set(names) - set(records[0]["names"] if records else [])
+            if missing:
+                raise RuntimeError(f"Missing {kind.lower()}: {sorted(missing)}")
+
+    imports = asyncio.create_task(phase("imports", _import_deferred))
+    try:
+        await phase("connectivity", neo4j.driver.verify_connectivity)
+        await phase("schema", ensure_schema)
+        await phase("concepts", ConceptNormalizerService(neo4j, None).preload_concepts)
+        if near_duplicates is not None:
+            await phase("near_duplicates", lambda: near_duplicates.ensure_loaded(neo4j))
+        if related_questions is not None:
+            await phase("related_questions", lambda: related_questions.ensure_loaded(neo4j))
+        await imports
+    except BaseException:
+        imports.cancel()
+        raise
+
+
+async def run_warm_up(
+    neo4j: Neo4jService,
+    state: StartupState,
+    near_duplicates=None,
+    related_questions=None,
+    retry_interval: float = 5.0
+):
+    """Retry warm-up until it succeeds; the app stays live but not ready meanwhile."""
+    while True:
+        state.attempts += 1
+        try:
+            await warm_up(neo4j, state, near_duplicates, related_questions)
+        except Exception as e:
+            state.error = str(e)
+            logger.warning(f"Warm-up attempt {state.attempts} failed, retrying in {retry_interval}s: {e}")
+            await asyncio.sleep(retry_interval)
+            continue
+        state.error = None
+        state.ready_at = time.monotonic()
+        logger.info(f"Ready after {state.ready_at - state.started_at:.2f}s: {state.phases}")
+        return
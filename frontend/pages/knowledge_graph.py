@@ -11,172 +11,113 @@ def render_knowledge_graph_page():
         st.session_state.static_dir = os.path.join(os.getcwd(), "static")
         os.makedirs(st.session_state.static_dir, exist_ok=True)
 
-    try:
-        response = requests.get("http://localhost:8000/api/v1/knowledge-graph/concepts")
-        response.raise_for_status()
-        concepts = response.json()
-        
-        questions_response = requests.get("http://localhost:8000/api/v1/knowledge-graph/questions")
-        questions_response.raise_for_status()
-        questions = questions_response.json()
-        
-        techniques_response = requests.get("http://localhost:8000/api/v1/knowledge-graph/techniques")
-        techniques_response.raise_for_status()
-        techniques = techniques_response.json()
-
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching data: {str(e)}")
-        return []
-
     selected_item_type = st.sidebar.radio(
         "Select item type to explore",
         options=["Concept", "Question", "Technique"]
     )
+    item_type = selected_item_type.lower()
 
-    if selected_item_type == "Concept":
-        selected_item = st.sidebar.selectbox(
-            "Select a concept to explore",
-            options=[c["name"] for c in concepts],
-            index=0 if concepts else None
-        )
-        if selected_item:
-            display_item_details(selected_item, "concept")
+    # Search instead of downloading every item of the type into a selectbox
+    query = st.sidebar.text_input(f"Search for a {item_type}", key=f"search_{item_type}")
+    if not query.strip():
+        st.info(f"Type part of a {item_type} name in the sidebar to explore it.")
+        return
 
-    elif selected_item_type == "Question":
-        selected_item = st.sidebar.selectbox(
-            "Select a question to explore",
-            options=[q["text"] for q in questions],
-            index=0 if questions else None
+    try:
+        response = requests.get(
+            "http://localhost:8000/api/v1/knowledge-graph/search",
+            params={"q": query, "types": item_type, "limit": 20}
         )
-        if selected_item:
-            display_item_details(selected_item, "question")
+        response.raise_for_status()
+        results = response.json()["results"]
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching data: {str(e)}")
+        return
+
+    if not results:
+        st.sidebar.write("No matches.")
+        return
 
-    elif selected_item_type == "Technique":
-        selected_item = st.sidebar.selectbox(
-            "Select a technique to explore",
-            options=[t["name"] for t in techniques],
-            index=0 if techniques else None
+    selected_item = st.sidebar.selectbox(
+        f"Matching {item_type}s",
+        options=[r["value"] for r in results],
+        format_func=lambda value: next(
+            (f"{value} (matched: {r['matched']})" for r in results
+             if r["value"] == value and r["matched"] != value),
+            value
         )
-        if selected_item:
-            display_item_details(selected_item, "technique")
+    )
+    if selected_item:
+        display_item_details(selected_item, item_type)
 
 
 def display_item_details(item: str, item_type: str):
     try:
-        if item_type == "concept":
-            related_response = requests.get(f"http://localhost:8000/api/v1/knowledge-graph/related/{item}")
-            related_response.raise_for_status()
-            related = related_response.json()
-
-            prereqs_response = requests.get(f"http://localhost:8000/api/v1/knowledge-graph/prerequisites/{item}")
-            prereqs_response.raise_for_status()
-            prereqs = prereqs_response.json()
-        elif item_type == "question":
-            related_response = requests.get(f"http://localhost:8000/api/v1/knowledge-graph/related_question/{item}")
-            related_response.raise_for_status()
-            related = related_response.json()
-
-            prereqs_response = requests.get(f"http://localhost:8000/api/v1/knowledge-graph/prerequisites_question/{item}")
-            prereqs_response.raise_for_status()
-            prereqs = prereqs_response.json()
-        elif item_type == "technique":
-            related_response = requests.get(f"http://localhost:8000/api/v1/knowledge-graph/related_technique/{item}")
-            related_response.raise_for_status()
-            related = related_response.json()
-
-            prereqs_response = requests.get(f"http://localhost:8000/api/v1/knowledge-graph/prerequisites_technique/{item}")
-            prereqs_response.raise_for_status()
-            prereqs = prereqs_response.json()
-
+        response = requests.get(
+            "http://localhost:8000/api/v1/knowledge-graph/subgraph",
+            params={"item": item, "item_type": item_type}
+        )
+        response.raise_for_status()
+        subgraph = response.json()
     except requests.exceptions.RequestException as e:
         st.error(f"Error fetching concept details: {str(e)}")
         return
 
-    cytoscape_data = {"nodes": [], "edges": []}
-    cytoscape_data["nodes"].append({"data": {"id": item, "label": item, "type": "main"}})
+    # Positions are computed server-side, so the browser only draws them
+    cytoscape_data = {
+        "nodes": [
+            {
+                "data": {"id": node["id"], "label": node["label"], "type": node["type"]},
+                "position": {"x": node["x"], "y": node["y"]},
+                "classes": node["type"]
+            }
+            for node in subgraph["nodes"]
+        ],
+        "edges": [
+            {"data": {"source": edge["source"], "target": edge["target"],
+                      "type": edge["type"], "weight": max(1.0, min(edge["weight"], 6.0))}}
+            for edge in subgraph["edges"]
+        ]
+    }
 
-    if related:
-        for rel in related:
-            cytoscape_data["nodes"].append({"data": {"id": rel["name"], "label": rel["name"], "type": "related"}})
-            cytoscape_data["edges"].append({"data": {"source": item, "target": rel["name"], "weight": rel["strength"]}})
-
-    if prereqs:
-        for prereq in prereqs:
-            cytoscape_data["nodes"].append({"data": {"id": prereq["name"], "label": prereq["name"], "type": "prerequisite"}})
-            cytoscape_data["edges"].append({"data": {"source": item, "target": prereq["name"], "weight": prereq["count"]}})
+    if subgraph["truncated"]:
+        of = "of" if subgraph["totals_exact"] else "of at least"
+        st.caption(
+            f"Showing {len(subgraph['nodes'])} {of} {subgraph['total_nodes']} nodes and "
+            f"{len(subgraph['edges'])} {of} {subgraph['total_edges']} edges (strongest connections first)."
+        )
 
     html_content = f"""
         <!DOCTYPE html>
         <html>
         <head>
             <script src="https://cdnjs.cloudflare.com/ajax/libs/cytoscape/3.21.2/cytoscape.min.js"></script>
-            <script src="https://cdnjs.cloudflare.com/ajax/libs/cytoscape/3.21.2/cytoscape-cose-bilkent.min.js"></script>
             <style>
                 #cy {{
                     width: 100%;
                     height: 600px;
                     border: 1px solid black;
                 }}
-                .main {{
-                    background-color: red;
-                }}
-                .related {{
-                    background-color: blue;
-                }}
-                .prerequisite {{
-                    background-color: green;
-                }}
             </style>
             <script>
                 let cytoscape_data = {json.dumps(cytoscape_data)};
-                console.log("Cytoscape Data:", cytoscape_data);
                 document.addEventListener('DOMContentLoaded', function() {{
                   if (cytoscape_data.nodes.length > 0) {{
-                    let cy = cytoscape({{
+                    cytoscape({{
                         container: document.getElementById('cy'),
                         elements: cytoscape_data,
                         style: [
-                            {{
-                                selector: 'node',
-                                style: {{
-                                    'label': 'data(label)'
-                                }}
-                            }},
-                            {{
-                                selector: '.main',
-                                style: {{
-                                    'background-color': 'red'
-                                }}
-                            }},
-                            {{
-                                selector: '.related',
-                                style: {{
-                                    'background-color': 'blue'
-                                }}
-                            }},
-                            {{
-                                selector: '.prerequisite',
-                                style: {{
-                                    'background-color': 'green'
-                                }}
-                            }},
-                            {{
-                                selector: 'edge',
-                                style: {{
-                                    'width': 'data(weight)',
-                                    'line-color': '#888'
-                                }}
-                            }}
+                            {{ selector: 'node', style: {{ 'label': 'data(label)', 'font-size': 10 }} }},
+                            {{ selector: '.main', style: {{ 'background-color': 'red' }} }},
+                            {{ selector: '.concept', style: {{ 'background-color': 'blue' }} }},
+                            {{ selector: '.prerequisite', style: {{ 'background-color': 'green' }} }},
+                            {{ selector: '.technique', style: {{ 'background-color': 'orange' }} }},
+                            {{ selector: '.question', style: {{ 'background-color': 'purple' }} }},
+                            {{ selector: 'edge', style: {{ 'width': 'data(weight)', 'line-color': '#888' }} }}
                         ],
-                        layout: {{
-                            name: 'cose'
-                        }}
+                        layout: {{ name: 'preset', fit: true, padding: 20 }}
                     }});
-                    cy.on('layoutstop', function(){{
-                      console.log('Layout complete!');
-                    }})
                   }} else {{
-                    console.log("No data to display.");
                     document.getElementById('cy').innerText = "No data to display.";
                   }}
                 }});
@@ -189,16 +130,28 @@ def display_item_details(item: str, item_type: str):
     """
     st.components.v1.html(html_content, height=700)
 
-    # Display additional information
+    # The subgraph is for drawing; related items and prerequisites come from the
+    # same aggregation the per-item endpoints use
+    try:
+        response = requests.post(
+            "http://localhost:8000/api/v1/knowledge-graph/batch",
+            json={f"{item_type}s": [item]}
+        )
+        response.raise_for_status()
+        details = response.json()[f"{item_type}s"][item]
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching {item_type} details: {str(e)}")
+        return
+
     col1, col2 = st.columns(2)
     with col1:
-        st.subheader("Related Concepts")
-        for rel in related:
-            st.write(f"- {rel['name']} (Strength: {rel['strength']})")
+        st.subheader("Related")
+        for related in details["related"]:
+            st.write(f"- {related['name']} (strength: {related['strength']})")
     with col2:
         st.subheader("Prerequisites")
-        for prereq in prereqs:
-            st.write(f"- {prereq['name']} (Count: {prereq['count']})")
+        for prereq in details["prerequisites"]:
+            st.write(f"- {prereq['name']}")
 
 def display_concept_details(concept: str):
     try:
@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
-from typing import Dict, List
+import json
+from typing import Dict, Iterator, List, Tuple
 
 def render_upload_page():
     st.title("Math Question Analysis")
@@ -15,24 +16,79 @@ def render_upload_page():
         else:
             st.warning("Please enter a question to analyze.")
 
+def iter_sse_events(response: requests.Response) -> Iterator[Tuple[str, Dict]]:
+    """Parse a server-sent event stream into (event, data) pairs."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
 def analyze_question(question_text: str):
     try:
-        response = requests.post(
-            "http://localhost:8000/api/v1/questions/",
-            params={"text": question_text}
-        )
-        
-        if response.status_code == 200:
-            display_analysis_results(response.json())
-        else:
-            st.error(f"Error analyzing question: {response.text}")
+        with requests.post(
+            "http://localhost:8000/api/v1/questions/stream",
+            params={"text": question_text},
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                st.error(f"Error analyzing question: {response.text}")
+                return
+            display_streamed_results(iter_sse_events(response))
             
     except Exception as e:
         st.error(f"Error connecting to server: {str(e)}")
 
-def display_analysis_results(results: Dict[str, List[str]]):
-    st.success("Analysis completed!")
+def display_streamed_results(events: Iterator[Tuple[str, Dict]]):
+    status = st.status("Analyzing question with the LLM...", expanded=True)
+    results_placeholder = st.empty()
+    normalized_placeholder = st.empty()
+    normalized: List[Dict] = []
+
+    for event, data in events:
+        if event == "raw":
+            status.update(label="Normalizing concepts against the knowledge graph...")
+            with results_placeholder.container():
+                display_analysis_results(data)
+        elif event == "normalized":
+            normalized.append(data)
+            with normalized_placeholder.container():
+                display_normalized_terms(normalized)
+        elif event == "analysis":
+            status.update(label="Saving to the knowledge graph...")
+            with results_placeholder.container():
+                display_analysis_results(data)
+        elif event == "stored":
+            status.update(label="Analysis completed!", state="complete", expanded=False)
+        elif event == "error":
+            status.update(label="Analysis failed", state="error")
+            st.error(data["detail"])
+            return
+
+    st.divider()
     
+    # Add link to knowledge graph
+    st.markdown("""
+    ℹ️ View these concepts in the [Knowledge Graph](/?page=Knowledge+Graph) to see relationships and connections.
+    """)
+
+def display_normalized_terms(normalized: List[Dict]):
+    st.subheader("Normalized Terms")
+    for match in normalized:
+        if match["is_new"]:
+            st.write(f"• {match['input_concept']} (new)")
+        else:
+            st.write(f"• {match['input_concept']} → {match['matched_concept']} "
+                     f"(confidence: {match['confidence']:.2f})")
+
+def display_analysis_results(results: Dict[str, List[str]]):
     col1, col2 = st.columns(2)
     
     with col1:
@@ -52,10 +108,3 @@ def display_analysis_results(results: Dict[str, List[str]]):
         st.subheader("Extensions")
         for extension in results["extensions"]:
             st.write(f"• {extension}")
-    
-    st.divider()
-    
-    # Add link to knowledge graph
-    st.markdown("""
-    ℹ️ View these concepts in the [Knowledge Graph](/?page=Knowledge+Graph) to see relationships and connections.
-    """)
\ No newline at end of file
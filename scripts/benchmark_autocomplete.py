@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import json
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from backend.config import get_settings
+from backend.services.neo4j_service import Neo4jService
+from backend.services.search_service import SearchService
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def prefixes(names, count: int, seed: int):
+    """What users type while autocompleting: the first 2 to 6 characters of a known name."""
+    rng = random.Random(seed)
+    names = [n for n in names if n and len(n.strip()) >= 2] or ["alg", "lin", "fra"]
+    return [rng.choice(names)[:rng.randint(2, 6)] for _ in range(count)]
+
+
+async def run(args):
+    settings = get_settings()
+    neo4j = Neo4jService(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+    search = SearchService(neo4j)
+    try:
+        await search.ensure_indexes()
+        await neo4j.run_write("CALL db.awaitIndexes()")
+        names = [c["name"] for c in await neo4j.get_all_concepts()]
+        names += [q["text"] for q in (await neo4j.get_all_questions())[:200]]
+        inputs = prefixes(names, args.queries, args.seed)
+
+        # Warm the driver pool and the query plans before measuring
+        for text in inputs[:20]:
+            await search.autocomplete(text, limit=args.limit)
+
+        latencies = []
+        for text in inputs:
+            started = time.perf_counter()
+            await search.autocomplete(text, limit=args.limit)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        report = {
+            "queries": len(latencies),
+            "concepts_and_questions": len(names),
+            "p50_ms": round(percentile(latencies, 0.5), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "budget_ms": args.budget_ms,
+            "within_budget": round(sum(ms <= args.budget_ms for ms in latencies) / len(latencies), 3),
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        await neo4j.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure autocomplete latency against the live graph, as seen by the API."
+    )
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=20.0, help="Latency goal per keystroke")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
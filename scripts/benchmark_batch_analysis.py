@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from backend.core.question_analyzer import QuestionAnalyzer
+from backend.services.fake_llm import FakeLLMClient
+from backend.services.llm_service import CircuitBreaker, LatencyTracker, LLMService
+
+SAMPLE_QUESTIONS = [
+    "Solve the equation: 2x + 5 = 13",
+    "Find the derivative of f(x) = 3x^2 + 2x - 7",
+    "What is the area of a circle with radius 4?",
+    "Factor the quadratic x^2 - 5x + 6",
+    "Evaluate the integral of sin(x) from 0 to pi",
+    "A triangle has sides 3, 4 and 5. Is it a right triangle?",
+    "Simplify (2x^3)(4x^2)",
+    "Find the probability of rolling two sixes with two dice",
+]
+
+
+async def run(questions, batch_size: int, concurrency: int, latency: float, per_token: float):
+    client = FakeLLMClient(latency=latency, latency_per_output_token=per_token, seed=0)
+    llm = LLMService(client, breaker=CircuitBreaker(), latency=LatencyTracker())
+    analyzer = QuestionAnalyzer(api_key="unused", neo4j_service=None, llm_service=llm)
+
+    started = time.perf_counter()
+    await analyzer.get_raw_analyses(questions, batch_size=batch_size, concurrency=concurrency)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "batch_size": batch_size,
+        "requests": client.calls,
+        "seconds": elapsed,
+        "questions_per_second": len(questions) / elapsed,
+        "prompt_tokens_per_question": client.prompt_tokens / len(questions),
+        "completion_tokens_per_question": client.completion_tokens / len(questions),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare batched against one-at-a-time LLM analysis using the fake provider."
+    )
+    parser.add_argument("--questions", type=int, default=200, help="Number of questions to analyze")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM requests in flight (quota stand-in)")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fixed seconds per LLM request")
+    parser.add_argument("--per-token", type=float, default=0.0005, help="Seconds per generated token")
+    args = parser.parse_args()
+
+    questions = [
+        f"{SAMPLE_QUESTIONS[i % len(SAMPLE_QUESTIONS)]} (variant {i})"
+        for i in range(args.questions)
+    ]
+
+    print(f"{'batch':>6} {'requests':>9} {'seconds':>8} {'q/s':>8} {'prompt tok/q':>13} {'output tok/q':>13}")
+    for batch_size in args.batch_sizes:
+        r = asyncio.run(run(questions, batch_size, args.concurrency, args.latency, args.per_token))
+        print(f"{r['batch_size']:>6} {r['requests']:>9} {r['seconds']:>8.2f} "
+              f"{r['questions_per_second']:>8.1f} {r['prompt_tokens_per_question']:>13.1f} "
+              f"{r['completion_tokens_per_question']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import quote
+
+import httpx
+
+
+async def per_item(client: httpx.AsyncClient, base: str, concepts, concurrent: bool) -> int:
+    """The old way: /related and /prerequisites for each concept. Returns the request count."""
+    urls = [
+        f"{base}/{endpoint}/{quote(concept, safe='')}"
+        for concept in concepts
+        for endpoint in ("related", "prerequisites")
+    ]
+    if concurrent:
+        responses = await asyncio.gather(*[client.get(url) for url in urls])
+    else:
+        responses = [await client.get(url) for url in urls]
+    for response in responses:
+        response.raise_for_status()
+    return len(urls)
+
+
+async def batched(client: httpx.AsyncClient, base: str, concepts) -> int:
+    response = await client.post(f"{base}/batch", json={"concepts": concepts})
+    response.raise_for_status()
+    return 1
+
+
+async def timed(runs: int, call) -> dict:
+    samples, requests = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        requests = await call()
+        samples.append(time.perf_counter() - started)
+    return {
+        "requests": requests,
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+    }
+
+
+async def run(args):
+    base = args.base_url.rstrip("/") + "/api/v1/knowledge-graph"
+    async with httpx.AsyncClient(timeout=60) as client:
+        response = await client.get(f"{base}/concepts")
+        response.raise_for_status()
+        concepts = [c["name"] for c in response.json()][:args.items]
+        if len(concepts) < args.items:
+            print(f"Only {len(concepts)} concepts in the graph")
+
+        # Warm connection pools and query plans before measuring
+        await batched(client, base, concepts)
+        await per_item(client, base, concepts, concurrent=True)
+
+        report = {
+            "items": len(concepts),
+            "per_item_sequential": await timed(args.runs, lambda: per_item(client, base, concepts, False)),
+            "per_item_concurrent": await timed(args.runs, lambda: per_item(client, base, concepts, True)),
+            "batch": await timed(args.runs, lambda: batched(client, base, concepts)),
+        }
+        batch_ms = report["batch"]["median_ms"]
+        for mode in ("sequential", "concurrent"):
+            per_item_ms = report[f"per_item_{mode}"]["median_ms"]
+            report[f"speedup_vs_{mode}"] = round(per_item_ms / batch_ms, 1) if batch_ms else None
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare POST /knowledge-graph/batch with per-item /related and /prerequisites calls."
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import json
+import pathlib
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from neo4j import WRITE_ACCESS
+
+from backend.config import get_settings
+from backend.services.neo4j_service import Neo4jService
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def read_load(neo4j: Neo4jService, seconds: float, concurrency: int, seed: int):
+    """Closed-loop read mix for `seconds`; returns (reads, latencies)."""
+    concepts = [c["name"] for c in await neo4j.get_all_concepts()][:200] or ["algebra"]
+    questions = [q["text"] for q in await neo4j.get_all_questions()][:200] or ["What is 2 + 2?"]
+    rng = random.Random(seed)
+    reads = [
+        lambda: neo4j.get_related_concepts(rng.choice(concepts)),
+        lambda: neo4j.get_prerequisites(rng.choice(concepts)),
+        lambda: neo4j.get_question_analysis(rng.choice(questions)),
+        lambda: neo4j.get_concept_difficulty(rng.choice(concepts)),
+    ]
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await rng.choice(reads)()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return len(latencies), latencies
+
+
+async def read_your_writes(neo4j: Neo4jService, rounds: int) -> int:
+    """Write a marker then read it straight back; returns how many reads missed their own write."""
+    stale = 0
+    for _ in range(rounds):
+        marker = uuid.uuid4().hex
+        await neo4j.run_write(
+            "MERGE (q:Question {text: $text}) SET q.benchmark_marker = $marker, q.analyzed_at = 'benchmark'",
+            {"text": "__read_routing_benchmark__", "marker": marker}
+        )
+        record = await neo4j._read_one(
+            "MATCH (q:Question {text: $text}) RETURN q.benchmark_marker AS marker",
+            {"text": "__read_routing_benchmark__"}
+        )
+        stale += record is None or record["marker"] != marker
+    await neo4j.run_write("MATCH (q:Question {text: $text}) DETACH DELETE q", {"text": "__read_routing_benchmark__"})
+    return stale
+
+
+async def measure(uri: str, args, pin_to_leader: bool) -> dict:
+    settings = get_settings()
+    neo4j = Neo4jService(uri, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+    if pin_to_leader:
+        # What every read did before routing: a default (write) session on the leader
+        routed_session = neo4j._session
+        neo4j._session = lambda access_mode: routed_session(WRITE_ACCESS)
+    try:
+        await neo4j.driver.verify_connectivity()
+        reads, latencies = await read_load(neo4j, args.seconds, args.concurrency, args.seed)
+        report = {
+            "uri": uri,
+            "mode": "leader" if pin_to_leader else "routed",
+            "concurrency": args.concurrency,
+            "reads_per_second": round(reads / args.seconds, 1),
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        }
+        if args.consistency_rounds:
+            report["stale_reads"] = await read_your_writes(neo4j, args.consistency_rounds)
+        return report
+    finally:
+        await neo4j.close()
+
+
+async def run(args):
+    uri = args.uri or get_settings().NEO4J_URI
+    # Same seed and duration for both modes, so the runs differ only in routing
+    modes = [False, True] if args.compare else [args.pin_to_leader]
+    reports = [await measure(uri, args, pin_to_leader) for pin_to_leader in modes]
+    if args.compare:
+        routed, leader = reports
+        print(json.dumps({
+            "routed": routed,
+            "leader": leader,
+            "throughput_ratio": round(routed["reads_per_second"] / leader["reads_per_second"], 2)
+            if leader["reads_per_second"] else None,
+        }, indent=2))
+    else:
+        print(json.dumps(reports[0], indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure read throughput with reads routed to readers versus pinned to the leader. "
+                    "Run against a cluster with neo4j:// and compare the two modes as replicas are added."
+    )
+    parser.add_argument("--uri", help="Default: NEO4J_URI. Use neo4j:// for cluster routing")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pin-to-leader", action="store_true", help="Send reads to the leader, as before routing")
+    parser.add_argument("--compare", action="store_true", help="Run routed, then pinned to the leader, and compare")
+    parser.add_argument("--consistency-rounds", type=int, default=100,
+                        help="Write-then-read rounds checking read-your-writes; 0 skips")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
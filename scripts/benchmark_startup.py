@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# Run in a fresh interpreter so nothing is already imported
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_seconds": elapsed,
+    "deferred_loaded": [m for m in ("openai", "pytesseract", "PIL") if m in sys.modules],
+}))
+"""
+
+
+def measure_import(runs: int):
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    times = [s["import_seconds"] for s in samples]
+    return {
+        "runs": runs,
+        "import_median_seconds": statistics.median(times),
+        "import_min_seconds": min(times),
+        "deferred_loaded_at_import": samples[0]["deferred_loaded"],
+    }
+
+
+def measure_serve(port: int, timeout: float):
+    """Start uvicorn and time until /healthz and /readyz answer. Needs a reachable Neo4j."""
+    import httpx
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    live = ready = None
+    report = None
+    try:
+        while time.perf_counter() - started < timeout and ready is None:
+            try:
+                if live is None and httpx.get(f"http://127.0.0.1:{port}/healthz").status_code == 200:
+                    live = time.perf_counter() - started
+                response = httpx.get(f"http://127.0.0.1:{port}/readyz")
+                if response.status_code == 200:
+                    ready = time.perf_counter() - started
+                    report = response.json()
+            except httpx.TransportError:
+                pass
+            time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait()
+    return {"live_seconds": live, "ready_seconds": ready, "startup_report": report}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the API.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time the app import in")
+    parser.add_argument("--serve", action="store_true", help="Also time a real uvicorn start until ready")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    result = measure_import(args.runs)
+    if args.serve:
+        result.update(measure_serve(args.port, args.timeout))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import json
+import pathlib
+import sys
+import time
+import uuid
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from neo4j import WRITE_ACCESS
+
+from backend.config import get_settings
+from backend.services.neo4j_service import CREATE_QUESTION_LISTS, CREATE_QUESTION_QUERY, Neo4jService
+
+# create_question_nodes before the stages were split into subqueries: each
+# UNWIND runs once per row of the one before it, and an empty list ends the query
+LEGACY_QUERY = """
+MERGE (q:Question {text: $text})
+WITH q
+UNWIND $concepts AS concept
+MERGE (c:Concept {name: concept})
+MERGE (q)-[:TESTS_CONCEPT]->(c)
+WITH q
+UNWIND $prerequisites AS prereq
+MERGE (p:Prerequisite {name: prereq})
+MERGE (q)-[:REQUIRES_PREREQUISITE]->(p)
+WITH q
+UNWIND $techniques AS technique
+MERGE (t:Technique {name: technique})
+MERGE (q)-[:SOLVED_BY_TECHNIQUE]->(t)
+WITH q
+UNWIND $extensions AS extension
+MERGE (e:Extension {name: extension})
+MERGE (q)-[:EXTENDS_TO]->(e)
+"""
+
+QUERIES = {"legacy": LEGACY_QUERY, "subqueries": CREATE_QUESTION_QUERY}
+
+
+def sample_analysis(size: int, marker: str):
+    return {key: [f"{key} {i} {marker}" for i in range(size)] for key in CREATE_QUESTION_LISTS}
+
+
+async def write(neo4j: Neo4jService, query: str, params):
+    async def work(tx):
+        result = await tx.run(query, params)
+        return await result.consume()
+
+    async with neo4j._session(WRITE_ACCESS) as session:
+        started = time.perf_counter()
+        summary = await session.execute_write(work)
+        return time.perf_counter() - started, summary.counters
+
+
+async def measure(neo4j: Neo4jService, name: str, size: int, rounds: int):
+    """Write `rounds` fresh questions of `size` items per list, then rewrite them (the idempotent path)."""
+    marker = f"__write_path_benchmark__ {uuid.uuid4().hex[:8]}"
+    analysis = sample_analysis(size, marker)
+    texts = [f"{marker} question {i}" for i in range(rounds)]
+    first, again = [], []
+    counters = None
+    try:
+        for text in texts:
+            seconds, counters = await write(neo4j, QUERIES[name], {"text": text, **analysis})
+            first.append(seconds)
+        for text in texts:
+            seconds, _ = await write(neo4j, QUERIES[name], {"text": text, **analysis})
+            again.append(seconds)
+        edges = await neo4j.run_read(
+            "MATCH (q:Question {text: $text})-->() RETURN count(*) AS edges", {"text": texts[-1]}
+        )
+    finally:
+        await neo4j.run_write(
+            "MATCH (n) WHERE n.text STARTS WITH $marker OR n.name ENDS WITH $marker DETACH DELETE n",
+            {"marker": marker}
+        )
+    return {
+        "query": name,
+        "items_per_list": size,
+        "first_write_ms": round(sum(first) / len(first) * 1000, 2),
+        "rewrite_ms": round(sum(again) / len(again) * 1000, 2),
+        "relationships_created_last": counters.relationships_created,
+        "edges_per_question": edges[0]["edges"],
+        "expected_edges": size * len(CREATE_QUESTION_LISTS),
+    }
+
+
+async def run(args):
+    settings = get_settings()
+    neo4j = Neo4jService(args.uri or settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+    try:
+        await neo4j.driver.verify_connectivity()
+        results = []
+        for size in args.sizes:
+            for name in QUERIES:
+                results.append(await measure(neo4j, name, size, args.rounds))
+        print(json.dumps(results, indent=2))
+    finally:
+        await neo4j.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare create_question_nodes written as chained UNWINDs with the per-list subqueries. "
+                    "The chained form does size^4 MERGE rows per question, so keep sizes modest."
+    )
+    parser.add_argument("--uri", help="Default: NEO4J_URI")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 8, 15])
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,303 @@
+import argparse
+import hashlib
+import json
 import os
 import pathlib
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
 
-def collect_project_files(project_path: str, output_file: str = "project_contents.txt") -> None:
+# File extensions to collect
+USEFUL_EXTENSIONS = {'.py', '.json', '.yaml', '.yml', '.md', '.env.example'}
+
+# Directory names to skip wherever they appear
+SKIP_DIRS = {
+    '__pycache__',
+    'venv',
+    '.git',
+    '.pytest_cache',
+    'node_modules',
+    'dist',
+    'build'
+}
+
+MANIFEST_VERSION = 2
+
+
+def _glob_to_regex(pattern: str) -> str:
+    regex, i = "", 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            regex += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+class GitIgnore:
+    """
+    The subset of .gitignore semantics that matters for collecting files:
+    comments, negation, directory-only patterns, anchoring and `**`, with
+    nested .gitignore files applying below their own directory. The last
+    matching pattern wins.
+    """
+
+    def __init__(self):
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []  # (regex, negate, dir_only)
+
+    def add_file(self, path: str, base: str):
+        """Add the patterns of a .gitignore located in `base` (relative, '' for the root)."""
+        prefix = re.escape(base + "/") if base else ""
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\n").rstrip()
+                if not line or line.startswith("#"):
+                    continue
+                negate = line.startswith("!")
+                if negate:
+                    line = line[1:]
+                dir_only = line.endswith("/")
+                line = line[:-1] if dir_only else line
+                if "/" in line:
+                    regex = "^" + prefix + _glob_to_regex(line.lstrip("/")) + "$"
+                else:
+                    regex = "^" + prefix + "(?:.*/)?" + _glob_to_regex(line) + "$"
+                self.rules.append((re.compile(regex), negate, dir_only))
+
+    def ignored(self, relative_path: str, is_dir: bool) -> bool:
+        result = False
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative_path):
+                result = not negate
+        return result
+
+
+def iter_project_files(project_path: str, use_gitignore: bool = True) -> Iterator[str]:
+    """Relative paths of the files to collect, in sorted order so output is stable."""
+    gitignore = GitIgnore()
+    for root, dirs, files in os.walk(project_path):
+        base = os.path.relpath(root, project_path).replace(os.sep, "/")
+        base = "" if base == "." else base
+        if use_gitignore and ".gitignore" in files:
+            gitignore.add_file(os.path.join(root, ".gitignore"), base)
+
+        def relative(name: str) -> str:
+            return f"{base}/{name}" if base else name
+
+        # Directory names are compared exactly, so e.g. "builder/" is not skipped for containing "build"
+        dirs[:] = sorted(
+            d for d in dirs
+            if d not in SKIP_DIRS and not (use_gitignore and gitignore.ignored(relative(d), True))
+        )
+        for name in sorted(files):
+            if pathlib.Path(name).suffix not in USEFUL_EXTENSIONS and not name.endswith(".env.example"):
+                continue
+            if use_gitignore and gitignore.ignored(relative(name), False):
+                continue
+            yield relative(name)
+
+
+def _section_header(relative_path: str) -> str:
+    return f"\n{'='*80}\nFile: {relative_path}\n{'='*80}\n\n"
+
+
+def _read_section(project_path: str, relative_path: str, max_file_size: int) -> Tuple[bytes, Optional[str]]:
+    """The output section for one file, and the hash of its contents (None when not read)."""
+    filepath = os.path.join(project_path, relative_path)
+    header = _section_header(relative_path)
+    try:
+        size = os.path.getsize(filepath)
+        if size > max_file_size:
+            return (header + f"Skipped: {size} bytes exceeds the {max_file_size} byte limit\n").encode("utf-8"), None
+        with open(filepath, "rb") as f:
+            data = f.read()
+        text = data.decode("utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        return (header + f"Error reading file {filepath}: {str(e)}\n").encode("utf-8"), None
+    return (header + text + "\n").encode("utf-8"), hashlib.sha256(data).hexdigest()
+
+
+def _load_manifest(manifest_path: str, output_file: str, max_file_size: int) -> Dict[str, Dict]:
+    """
+    Previous file entries, usable only if the output they point into is unchanged
+    and was written with the same size limit.
+    """
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        stat = os.stat(output_file)
+    except (OSError, ValueError):
+        return {}
+    if (
+        manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("output") != [stat.st_size, stat.st_mtime_ns]
+        or manifest.get("max_file_size") != max_file_size
+    ):
+        return {}
+    return manifest.get("files", {})
+
+
+def collect_project_files(
+    project_path: str,
+    output_file: str = "project_contents.txt",
+    incremental: bool = False,
+    workers: int = 8,
+    max_file_size: int = 1_000_000,
+    use_gitignore: bool = True,
+) -> Dict[str, int]:
     """
     Collects content from useful project files and combines them into a single file.
-    
+
+    Sections are streamed to a temporary file and published atomically, so memory
+    use is bounded by the read-ahead window rather than the size of the tree. With
+    `incremental`, a manifest of path -> (mtime, size, hash) kept next to the output
+    lets unchanged files be copied from the previous output instead of being re-read.
+
     Args:
         project_path: Path to the project root directory
         output_file: Name of the output file
+        incremental: Reuse the previous output for files whose mtime and size are unchanged
+            and that were read successfully
+        workers: Threads reading changed files in parallel
+        max_file_size: Files larger than this many bytes are listed but not included
+        use_gitignore: Skip paths matched by .gitignore files
+
+    Returns:
+        Counts of files copied from the previous output, read, and in total
     """
-    # File extensions to collect
-    useful_extensions = {'.py', '.json', '.yaml', '.yml', '.md', '.env.example'}
-    
-    # Directories to skip
-    skip_dirs = {
-        '__pycache__', 
-        'venv', 
-        '.git', 
-        '.pytest_cache', 
-        'node_modules',
-        'dist',
-        'build'
-    }
-    
-    collected_contents = []
-    
-    def should_process_file(filepath: str) -> bool:
-        """Check if the file should be processed based on extension and path."""
-        file_ext = pathlib.Path(filepath).suffix
-        return (file_ext in useful_extensions and 
-                not any(skip_dir in filepath for skip_dir in skip_dirs))
-    
-    # Add header with timestamp
-    collected_contents.append(f"# Project Code Collection\n")
-    collected_contents.append(f"# Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-    
-    # Walk through project directory
-    for root, dirs, files in os.walk(project_path):
-        # Remove unwanted directories
-        dirs[:] = [d for d in dirs if d not in skip_dirs]
-        
-        for file in files:
-            filepath = os.path.join(root, file)
-            if should_process_file(filepath):
-                try:
-                    # Add file header
-                    relative_path = os.path.relpath(filepath, project_path)
-                    collected_contents.append(f"\n{'='*80}\n")
-                    collected_contents.append(f"File: {relative_path}\n")
-                    collected_contents.append(f"{'='*80}\n\n")
-                    
-                    # Read and add file contents
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        collected_contents.append(f.read())
-                    
-                    collected_contents.append("\n")
-                except Exception as e:
-                    collected_contents.append(f"Error reading file {filepath}: {str(e)}\n")
-    
-    # Write everything to output file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("".join(collected_contents))
-    
-    print(f"Project contents have been collected in {output_file}")
+    manifest_path = output_file + ".manifest.json"
+    previous = _load_manifest(manifest_path, output_file, max_file_size) if incremental else {}
+    previous_output = open(output_file, "rb") if previous else None
+    stats = {"files": 0, "reused": 0, "read": 0}
+    entries: Dict[str, Dict] = {}
 
-if __name__ == "__main__":
+    def plan(relative_path: str):
+        """Reuse the previous section when the file looks unchanged, otherwise schedule a read."""
+        stat = os.stat(os.path.join(project_path, relative_path))
+        identity = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        entry = previous.get(relative_path)
+        # Skipped and unreadable files have no hash and are retried every run
+        if (
+            entry is not None and entry["sha256"] is not None
+            and all(entry[k] == v for k, v in identity.items())
+        ):
+            return identity, entry, None
+        return identity, None, executor.submit(_read_section, project_path, relative_path, max_file_size)
+
+    directory = os.path.dirname(os.path.abspath(output_file))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".collect-")
+    try:
+        with os.fdopen(fd, "wb") as out, ThreadPoolExecutor(max_workers=workers) as executor:
+            # Add header with timestamp
+            out.write(b"# Project Code Collection\n")
+            out.write(f"# Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n".encode("utf-8"))
+
+            # Keep a bounded window of reads in flight, written in path order as they finish
+            window = deque()
+            own_files = {os.path.abspath(output_file), os.path.abspath(manifest_path)}
+            paths = (
+                p for p in iter_project_files(project_path, use_gitignore)
+                if os.path.abspath(os.path.join(project_path, p)) not in own_files
+            )
+            while True:
+                while len(window) < workers * 4:
+                    relative_path = next(paths, None)
+                    if relative_path is None:
+                        break
+                    try:
+                        window.append((relative_path, *plan(relative_path)))
+                    except OSError:
+                        continue  # vanished since the walk
+                if not window:
+                    break
+                relative_path, identity, entry, future = window.popleft()
+                if future is None:
+                    previous_output.seek(entry["offset"])
+                    section = previous_output.read(entry["length"])
+                    digest = entry["sha256"]
+                    stats["reused"] += 1
+                else:
+                    section, digest = future.result()
+                    stats["read"] += 1
+                entries[relative_path] = {
+                    **identity, "sha256": digest, "offset": out.tell(), "length": len(section)
+                }
+                out.write(section)
+                stats["files"] += 1
+        # mkstemp creates the file private; give it the usual permissions
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    finally:
+        if previous_output is not None:
+            previous_output.close()
+
+    if incremental:
+        stat = os.stat(output_file)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "output": [stat.st_size, stat.st_mtime_ns],
+                "max_file_size": max_file_size,
+                "files": entries,
+            }, f)
+
+    print(
+        f"Project contents have been collected in {output_file} "
+        f"({stats['files']} files, {stats['read']} read, {stats['reused']} unchanged)"
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Combine the project's source files into one text file.")
     # Get the current working directory as default project path
-    default_project_path = os.getcwd()
-    
-    print(f"Using project path: {default_project_path}")
-    collect_project_files(default_project_path)
\ No newline at end of file
+    parser.add_argument("project_path", nargs="?", default=os.getcwd())
+    parser.add_argument("-o", "--output", default="project_contents.txt")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep a manifest next to the output and re-read only changed files")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-file-size", type=int, default=1_000_000, help="Per-file limit in bytes")
+    parser.add_argument("--no-gitignore", action="store_true", help="Also collect files matched by .gitignore")
+    args = parser.parse_args()
+
+    print(f"Using project path: {args.project_path}")
+    collect_project_files(
+        args.project_path,
+        args.output,
+        incremental=args.incremental,
+        workers=args.workers,
+        max_file_size=args.max_file_size,
+        use_gitignore=not args.no_gitignore,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import asyncio
+import json
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from backend.config import get_settings
+from backend.services.graph_analytics import GraphAnalytics
+from backend.services.neo4j_service import Neo4jService
+
+
+async def run(args):
+    settings = get_settings()
+    neo4j = Neo4jService(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+    try:
+        analytics = GraphAnalytics(
+            neo4j,
+            damping=args.damping,
+            co_tested_weight=args.co_tested_weight,
+            betweenness_samples=args.samples,
+            batch_size=args.batch_size or settings.MAINTENANCE_BATCH_SIZE,
+            pause=args.pause,
+        )
+        report = await analytics.run()
+        print(json.dumps(report.as_dict(), indent=2))
+    finally:
+        await neo4j.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute concept PageRank, betweenness and per-domain statistics, and store them on Concept nodes."
+    )
+    parser.add_argument("--damping", type=float, default=0.85)
+    parser.add_argument("--co-tested-weight", type=float, default=0.5,
+                        help="Edge weight of concepts tested by the same question, relative to prerequisites")
+    parser.add_argument("--samples", type=int, default=256, help="Betweenness pivots; more is slower but more exact")
+    parser.add_argument("--batch-size", type=int,
+                        help="Concepts per write transaction (default: MAINTENANCE_BATCH_SIZE)")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import asyncio
+import json
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from backend.config import get_settings
+from backend.services.graph_maintenance import GraphMaintenance
+from backend.services.neo4j_service import Neo4jService
+
+
+async def run(args):
+    settings = get_settings()
+    neo4j = Neo4jService(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+    try:
+        report = await GraphMaintenance(
+            neo4j, batch_size=args.batch_size or settings.MAINTENANCE_BATCH_SIZE, pause=args.pause
+        ).run()
+        print(json.dumps(report.as_dict(), indent=2))
+        return 1 if report.errors else 0
+    finally:
+        await neo4j.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the knowledge graph: remove orphans, merge duplicates, recompute counts.")
+    parser.add_argument("--batch-size", type=int,
+                        help="Nodes or merges per write transaction (default: MAINTENANCE_BATCH_SIZE)")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
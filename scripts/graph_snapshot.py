@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from backend.config import get_settings
+from backend.services.graph_snapshot import export_admin_csv, export_graph, import_graph
+from backend.services.neo4j_service import Neo4jService
+
+
+async def run(args):
+    settings = get_settings()
+    neo4j = Neo4jService(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+    try:
+        started = time.perf_counter()
+        if args.command == "export":
+            stats = await export_graph(neo4j, args.path, chunk_size=args.batch_size)
+        else:
+            stats = await import_graph(neo4j, args.path, batch_size=args.batch_size, allow_non_empty=args.force)
+        elapsed = time.perf_counter() - started
+        print(f"{args.command}: {stats.nodes} nodes, {stats.relationships} relationships in {elapsed:.1f}s")
+    finally:
+        await neo4j.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import knowledge graph snapshots.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Dump the graph to a snapshot file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--batch-size", type=int, default=10000, help="Rows per snapshot chunk")
+
+    import_parser = subparsers.add_parser("import", help="Load a snapshot into an empty database")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--batch-size", type=int, default=10000, help="Rows per UNWIND transaction")
+    import_parser.add_argument("--force", action="store_true", help="Import even if the database has nodes")
+
+    csv_parser = subparsers.add_parser("admin-csv", help="Convert a snapshot to neo4j-admin import CSV")
+    csv_parser.add_argument("path")
+    csv_parser.add_argument("out_dir")
+
+    args = parser.parse_args()
+    if args.command == "admin-csv":
+        files = export_admin_csv(args.path, args.out_dir)
+        print("neo4j-admin database import full " + " ".join(files) + " neo4j")
+    else:
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
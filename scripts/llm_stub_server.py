@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import json
+import pathlib
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from backend.services.fake_llm import default_responder, estimate_tokens
+
+
+def create_app(latency: float, jitter: float, per_token: float, error_rate: float, error_status: int, seed: int):
+    """An OpenAI-compatible chat completions endpoint answering with canned analyses."""
+    app = FastAPI(title="LLM stub")
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        delay = latency + rng.uniform(0, jitter)
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(delay)
+            return JSONResponse(
+                {"error": {"message": "injected stub error", "type": "server_error"}},
+                status_code=error_status
+            )
+
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        content = json.dumps(default_responder(prompt))
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(content)
+        await asyncio.sleep(delay + completion_tokens * per_token)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve an offline OpenAI-compatible stub. Start the API with "
+                    "OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 to use it."
+    )
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.8, help="Base seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.4, help="Extra uniform random seconds")
+    parser.add_argument("--per-token", type=float, default=0.0, help="Seconds per completion token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of injected failures (429, 500...)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.jitter, args.per_token, args.error_rate, args.error_status, args.seed)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+QUESTION_TEMPLATES = [
+    "Solve the equation: {a}x + {b} = {c}",
+    "Find the derivative of f(x) = {a}x^2 + {b}x - {c}",
+    "What is the area of a circle with radius {a}?",
+    "Factor the quadratic x^2 - {b}x + {c}",
+    "Evaluate the integral of {a}x from 0 to {b}",
+    "A triangle has sides {a}, {b} and {c}. Is it a right triangle?",
+]
+
+SEARCH_PREFIXES = ["lin", "quad", "deriv", "circ", "integ", "trian", "prob", "frac"]
+CONCEPTS = ["linear equations", "derivatives", "quadratic equations", "integration", "area"]
+
+
+class Scenario:
+    """One kind of request in the traffic mix."""
+
+    def __init__(self, name: str, method: str, path: str):
+        self.name = name
+        self.method = method
+        self.path = path
+
+    def request(self, rng: random.Random, unique: bool) -> Dict:
+        return {}
+
+
+class AnalyzeScenario(Scenario):
+    def request(self, rng, unique):
+        values = {k: rng.randint(2, 99) for k in "abc"}
+        text = rng.choice(QUESTION_TEMPLATES).format(**values)
+        if unique:
+            # Defeat coalescing and near-duplicate reuse so every request reaches the LLM
+            text += f" (variant {rng.getrandbits(48):x})"
+        return {"params": {"text": text}}
+
+
+class SearchScenario(Scenario):
+    def request(self, rng, unique):
+        return {"params": {"q": rng.choice(SEARCH_PREFIXES), "limit": 10}}
+
+
+class SubgraphScenario(Scenario):
+    def request(self, rng, unique):
+        return {"params": {"item": rng.choice(CONCEPTS), "item_type": "concept"}}
+
+
+class LLMScenario(Scenario):
+    """Calls an OpenAI-compatible server directly, to calibrate the stub."""
+
+    def request(self, rng, unique):
+        question = rng.choice(QUESTION_TEMPLATES).format(a=3, b=4, c=5)
+        return {"json": {"model": "stub", "messages": [{"role": "user", "content": f"Math Question: {question}"}]}}
+
+
+SCENARIOS = {
+    "analyze": AnalyzeScenario("analyze", "POST", "/api/v1/questions/"),
+    "concepts": Scenario("concepts", "GET", "/api/v1/knowledge-graph/concepts"),
+    "search": SearchScenario("search", "GET", "/api/v1/knowledge-graph/search"),
+    "subgraph": SubgraphScenario("subgraph", "GET", "/api/v1/knowledge-graph/subgraph"),
+    "stats": Scenario("stats", "GET", "/api/v1/questions/stats"),
+    "llm": LLMScenario("llm", "POST", "/v1/chat/completions"),
+}
+
+
+def parse_mix(text: str) -> List[Tuple[str, float]]:
+    """'analyze=1,search=5' -> [('analyze', 1.0), ('search', 5.0)]"""
+    mix = []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; choose from {sorted(SCENARIOS)}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def parse_profile(text: str) -> List[Tuple[float, float]]:
+    """'5:30,20:60' -> stages of (target requests/second, seconds)."""
+    stages = []
+    for part in text.split(","):
+        rate, _, seconds = part.partition(":")
+        stages.append((float(rate), float(seconds)))
+    return stages
+
+
+def rate_at(stages: List[Tuple[float, float]], t: float, ramp: bool) -> Optional[float]:
+    """Arrival rate at time t, or None once the profile is over. With ramp, rates interpolate linearly."""
+    start = 0.0
+    previous = stages[0][0]
+    for rate, seconds in stages:
+        if t < start + seconds:
+            if ramp and seconds > 0:
+                return previous + (rate - previous) * (t - start) / seconds
+            return rate
+        start += seconds
+        previous = rate
+    return None
+
+
+def arrival_schedule(stages, ramp: bool, rng: random.Random) -> List[float]:
+    """
+    Open-loop Poisson arrival times, fixed in advance so slow responses never
+    delay later requests. Uses thinning against the peak rate for ramps.
+    """
+    peak = max(rate for rate, _ in stages)
+    if peak <= 0:
+        return []
+    times, t = [], 0.0
+    while True:
+        t += rng.expovariate(peak)
+        rate = rate_at(stages, t, ramp)
+        if rate is None:
+            return times
+        if rng.random() < rate / peak:
+            times.append(t)
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    # Nearest-rank definition
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.sent: Dict[str, int] = defaultdict(int)
+        self.dropped = 0
+
+    def record(self, name: str, latency: float, error: Optional[str]):
+        if error:
+            self.errors[name][error] += 1
+        else:
+            self.latencies[name].append(latency)
+
+    def summary(self, duration: float) -> Dict:
+        report = {}
+        for name in sorted(self.sent):
+            values = sorted(self.latencies[name])
+            errors = sum(self.errors[name].values())
+            report[name] = {
+                "sent": self.sent[name],
+                "ok": len(values),
+                "errors": dict(self.errors[name]),
+                "error_rate": errors / self.sent[name] if self.sent[name] else 0.0,
+                "throughput_rps": len(values) / duration if duration else 0.0,
+                "p50_ms": _ms(percentile(values, 50)),
+                "p95_ms": _ms(percentile(values, 95)),
+                "p99_ms": _ms(percentile(values, 99)),
+                "max_ms": _ms(values[-1] if values else None),
+            }
+        return report
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+async def fire(client: httpx.AsyncClient, scenario: Scenario, base_url: str, scheduled: float,
+               recorder: Recorder, rng: random.Random, unique: bool, timeout: float):
+    request = scenario.request(rng, unique)
+    try:
+        response = await client.request(scenario.method, base_url + scenario.path, timeout=timeout, **request)
+        error = None if response.status_code < 400 else f"http_{response.status_code}"
+    except httpx.TimeoutException:
+        error = "timeout"
+    except httpx.TransportError as e:
+        error = type(e).__name__
+    # Measured from the scheduled send time, so client-side queueing counts against latency
+    recorder.record(scenario.name, time.perf_counter() - scheduled, error)
+
+
+async def run(args) -> Dict:
+    rng = random.Random(args.seed)
+    stages = parse_profile(args.profile)
+    schedule = arrival_schedule(stages, args.ramp, rng)
+    names, weights = zip(*args.mix)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    in_flight = set()
+
+    async with httpx.AsyncClient(limits=limits) as client:
+        started = time.perf_counter()
+        for offset in schedule:
+            scheduled = started + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = rng.choices(names, weights)[0]
+            recorder.sent[name] += 1
+            if len(in_flight) >= args.max_in_flight:
+                # The target is saturated; count it instead of letting the client queue grow unbounded
+                recorder.dropped += 1
+                recorder.record(name, 0.0, "client_overload")
+                continue
+            base_url = args.llm_url if name == "llm" else args.base_url
+            task = asyncio.create_task(fire(
+                client, SCENARIOS[name], base_url, scheduled, recorder, rng, args.unique, args.timeout
+            ))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.wait(in_flight)
+        duration = time.perf_counter() - started
+        admission = await fetch_admission_stats(client, args.base_url)
+
+    return {
+        "duration_s": round(duration, 2),
+        "offered_requests": len(schedule),
+        "dropped": recorder.dropped,
+        "endpoints": recorder.summary(duration),
+        "admission": admission,
+    }
+
+
+async def fetch_admission_stats(client: httpx.AsyncClient, base_url: str) -> Optional[Dict]:
+    """Server-side queue depth and wait times, when the API has admission control enabled."""
+    try:
+        response = await client.get(base_url + "/debug/admission", timeout=10)
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200 or not response.json().get("enabled"):
+        return None
+    return response.json()
+
+
+def print_report(result: Dict):
+    print(f"duration {result['duration_s']}s, offered {result['offered_requests']}, dropped {result['dropped']}")
+    header = f"{'endpoint':<10} {'sent':>6} {'ok':>6} {'err%':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in result["endpoints"].items():
+        print(
+            f"{name:<10} {row['sent']:>6} {row['ok']:>6} {row['error_rate'] * 100:>5.1f}% "
+            f"{row['throughput_rps']:>7.1f} {row['p50_ms'] or 0:>7.0f}ms {row['p95_ms'] or 0:>7.0f}ms "
+            f"{row['p99_ms'] or 0:>7.0f}ms"
+        )
+        if row["errors"]:
+            print(f"{'':<10} errors: {row['errors']}")
+    if result.get("admission"):
+        print()
+        header = f"{'class':<10} {'admitted':>8} {'shed':>6} {'maxq':>6} {'wait p50':>9} {'wait p99':>9}"
+        print(header)
+        print("-" * len(header))
+        for name, row in result["admission"]["classes"].items():
+            shed = row["rate_limited"] + row["queue_full"] + row["deadline"]
+            print(
+                f"{name:<10} {row['admitted']:>8} {shed:>6} {row['max_queue_depth']:>6} "
+                f"{row['wait_p50_ms'] or 0:>7.0f}ms {row['wait_p99_ms'] or 0:>7.0f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Open-loop load generator for the API. For offline runs start "
+                    "scripts/llm_stub_server.py and point the API at it with OPENAI_BASE_URL."
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--llm-url", default="http://127.0.0.1:8900", help="Target of the 'llm' scenario")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("analyze=1,search=4,subgraph=1,concepts=1"),
+                        help="Weighted scenarios, e.g. analyze=1,search=5")
+    parser.add_argument("--profile", default="5:30",
+                        help="Stages of rate:seconds, e.g. 2:30,10:60,20:30")
+    parser.add_argument("--ramp", action="store_true", help="Interpolate linearly between stage rates")
+    parser.add_argument("--unique", action="store_true", help="Make every analysis question distinct")
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
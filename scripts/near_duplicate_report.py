@@ -0,0 +1,78 @@
+import argparse
+import pathlib
+import random
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from backend.core.near_duplicate import NearDuplicateIndex
+
+# Templates in the style of a worksheet question bank: the same question
+# repeated with different numbers and spacing
+TEMPLATES = [
+    "Solve {a}x+{b}={c}",
+    "Solve the equation: {a}x + {b} = {c}",
+    "What is the area of a circle with radius {a}?",
+    "Find the derivative of f(x) = {a}x^2 + {b}x - {c}",
+    "A train travels {a} km in {b} hours. What is its average speed?",
+    "Simplify ({a}x^{b})({c}x^{a})",
+    "Find {a}% of {b}",
+    "What is the probability of rolling a {a} on a fair six-sided die?",
+]
+
+UNIQUE = [
+    "Prove that the square root of 2 is irrational",
+    "Explain why the sum of the angles in a triangle is 180 degrees",
+    "Show that there are infinitely many prime numbers",
+    "Describe the difference between a permutation and a combination",
+    "What is the geometric meaning of the derivative?",
+    "When is a function continuous?",
+]
+
+
+def sample_corpus(size: int, seed: int = 0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        if rng.random() < 0.1:
+            corpus.append(rng.choice(UNIQUE))
+            continue
+        text = rng.choice(TEMPLATES).format(a=rng.randint(1, 20), b=rng.randint(1, 20), c=rng.randint(1, 50))
+        if rng.random() < 0.3:
+            text = text.replace(" ", "  ")
+        corpus.append(text)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the near-duplicate rate of a question corpus.")
+    parser.add_argument("--file", help="Corpus with one question per line (default: generated sample)")
+    parser.add_argument("--size", type=int, default=1000, help="Size of the generated sample corpus")
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            corpus = [line.strip() for line in f if line.strip()]
+    else:
+        corpus = sample_corpus(args.size)
+
+    # Mirrors the ingest path: a question never matches itself, so an exact
+    # repeat is only reused when some other indexed question is close enough
+    index = NearDuplicateIndex(threshold=args.threshold)
+    exact = near = 0
+    for text in corpus:
+        exact += text in index.lsh
+        if index.find(text) is not None:
+            near += 1
+        index.add(text)
+
+    total = len(corpus)
+    analyses = total - near
+    print(f"questions:              {total}")
+    print(f"exact repeats:          {exact} (re-analyzed unless a near-duplicate matches)")
+    print(f"near-duplicates reused: {near} ({near / total:.1%})")
+    print(f"LLM analyses needed:    {analyses} ({analyses / total:.1%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.core.admission import (
+    ANALYSIS, READ, AdmissionController, AdmissionMiddleware, Rejected, TokenBucket, TrafficClass, client_id
+)
+
+
+def controller(max_concurrency=1, analysis_deadline=5.0, analysis_queue=10, read_rate=0.0):
+    admission = AdmissionController()
+    admission.enable(max_concurrency, [
+        TrafficClass(READ, max_concurrency=10, max_queue=10, deadline=5.0, rate=read_rate, burst=2),
+        TrafficClass(ANALYSIS, max_concurrency=1, max_queue=analysis_queue, deadline=analysis_deadline, rate=0, burst=0),
+    ])
+    return admission
+
+
+@pytest.mark.asyncio
+async def test_queued_reads_are_admitted_before_queued_analyses():
+    admission = controller()
+    await admission.acquire(ANALYSIS, "a")
+    order = []
+
+    async def request(name):
+        await admission.acquire(name, "a")
+        order.append(name)
+        admission.release(name, 0.01)
+
+    waiting = [asyncio.create_task(request(ANALYSIS))]
+    await asyncio.sleep(0)
+    waiting.append(asyncio.create_task(request(READ)))
+    await asyncio.sleep(0)
+    assert admission.report()["classes"][ANALYSIS]["queue_depth"] == 1
+
+    admission.release(ANALYSIS, 0.5)
+    await asyncio.gather(*waiting)
+    assert order == [READ, ANALYSIS]
+    assert admission.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_sheds_on_deadline_full_queue_and_rate_limit():
+    admission = controller(analysis_deadline=0.05, analysis_queue=1, read_rate=1.0)
+    await admission.acquire(ANALYSIS, "a")
+    queued = asyncio.create_task(admission.acquire(ANALYSIS, "b"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(Rejected) as full:
+        await admission.acquire(ANALYSIS, "c")
+    assert full.value.reason == "queue_full" and full.value.retry_after >= 1
+    with pytest.raises(Rejected) as late:
+        await queued
+    assert late.value.reason == "deadline"
+
+    admission.release(ANALYSIS, 0.1)
+    await admission.acquire(READ, "reader")
+    admission.release(READ, 0.01)
+    await admission.acquire(READ, "reader")
+    admission.release(READ, 0.01)
+    with pytest.raises(Rejected) as limited:
+        await admission.acquire(READ, "reader")
+    assert limited.value.reason == "rate_limited" and 0 < limited.value.retry_after <= 1
+    # Buckets are per client
+    await admission.acquire(READ, "someone else")
+
+    stats = admission.report()["classes"]
+    assert (stats[ANALYSIS]["queue_full"], stats[ANALYSIS]["deadline"], stats[READ]["rate_limited"]) == (1, 1, 1)
+
+
+def test_token_bucket_refills_at_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate=2.0, burst=1, clock=lambda: now[0])
+    assert bucket.take() == 0.0
+    assert bucket.take() == pytest.approx(0.5)
+    now[0] = 0.5
+    assert bucket.take() == 0.0
+
+
+def test_client_is_the_peer_unless_a_trusted_header_is_configured():
+    scope = {"client": ("10.0.0.7", 51234), "headers": [(b"x-client-id", b"rotating-1"), (b"x-api-key", b"k")]}
+
+    assert client_id(scope) == "10.0.0.7"
+    assert client_id(scope, b"x-client-id") == "rotating-1"
+    assert client_id({"client": ("10.0.0.7", 1), "headers": []}, b"x-client-id") == "10.0.0.7"
+
+    admission = AdmissionController()
+    admission.enable(1, [], client_header="X-Client-Id")
+    assert admission.client_header == b"x-client-id"
+
+
+def test_middleware_returns_429_with_retry_after():
+    admission = controller(read_rate=0.1)
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
+    @app.get("/api/v1/knowledge-graph/concepts")
+    async def concepts():
+        return []
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok"}
+
+    client = TestClient(app)
+    statuses = [client.get("/api/v1/knowledge-graph/concepts").status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    # A made-up identity header does not buy a fresh bucket
+    response = client.get("/api/v1/knowledge-graph/concepts", headers={"X-Client-Id": "someone-new"})
+    assert response.status_code == 429
+    response = client.get("/api/v1/knowledge-graph/concepts")
+    assert response.status_code == 429 and int(response.headers["retry-after"]) >= 1
+    assert client.get("/healthz").status_code == 200
+    assert admission.in_flight == 0
@@ -0,0 +1,93 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+from backend.core.analysis_diff import (
+    AnalysisDiff, StoredAnalysis, diff_analysis, stored_from_analysis, stored_from_graph
+)
+from backend.core.question_analyzer import AnalysisResult, QuestionAnalyzer
+from backend.services.neo4j_service import Neo4jService
+
+STEPS = [
+    {"step": 1, "description": "Subtract 5 from both sides", "concepts_used": ["inverse operations"]},
+    {"step": 2, "description": "Divide both sides by 2", "concepts_used": ["inverse operations", "division"]},
+]
+
+def analysis(concepts=("linear equations",), prerequisites=("arithmetic", "division"), steps=STEPS):
+    return stored_from_analysis(list(concepts), list(prerequisites), list(steps))
+
+def test_first_write_adds_everything_and_rewrite_adds_nothing():
+    diff = diff_analysis(StoredAnalysis(), analysis())
+
+    assert diff.add_concepts == ["linear equations"]
+    assert diff.set_prerequisites == [{"name": "arithmetic", "index": 0}, {"name": "division", "index": 1}]
+    assert [step["step"] for step in diff.upsert_steps] == [1, 2]
+    assert len(diff.add_step_concepts) == 3
+    assert diff_analysis(analysis(), analysis()).is_empty()
+
+def test_changed_analysis_touches_only_changed_edges():
+    stored = analysis()
+    new_steps = [STEPS[0], {**STEPS[1], "description": "Divide by 2", "concepts_used": ["division"]}]
+
+    diff = diff_analysis(stored, analysis(concepts=("linear equations", "equality"),
+                                          prerequisites=("division", "arithmetic"),
+                                          steps=new_steps))
+
+    assert diff.add_concepts == ["equality"]
+    assert diff.remove_concepts == []
+    assert diff.set_prerequisites == [{"name": "arithmetic", "index": 1}, {"name": "division", "index": 0}]
+    assert diff.upsert_steps == [{"step": 2, "description": "Divide by 2"}]
+    assert diff.remove_step_concepts == [{"step": 2, "concept": "inverse operations"}]
+    assert diff.add_step_concepts == []
+    assert diff.remove_steps == []
+
+def test_removed_steps_and_concepts_are_deleted():
+    diff = diff_analysis(analysis(), analysis(concepts=(), prerequisites=(), steps=STEPS[:1]))
+
+    assert diff.remove_concepts == ["linear equations"]
+    assert diff.remove_prerequisites == ["arithmetic", "division"]
+    assert diff.remove_steps == [2]
+    assert diff.upsert_steps == [] and diff.remove_step_concepts == []
+
+def test_duplicate_steps_from_earlier_writes_are_collapsed():
+    record = {
+        "concepts": ["linear equations"],
+        "prerequisites": [{"name": "arithmetic", "order": 0}, {"name": "division", "order": 1}],
+        "steps": [
+            {"number": 1, "description": "Subtract 5 from both sides", "concepts_used": ["inverse operations"]},
+            {"number": 1, "description": "Subtract 5 from both sides", "concepts_used": []},
+            {"number": 2, "description": "Divide both sides by 2",
+             "concepts_used": ["inverse operations", "division"]},
+        ]
+    }
+    stored = stored_from_graph(record)
+
+    diff = diff_analysis(stored, analysis())
+
+    assert stored.duplicate_steps == 1
+    assert diff.dedupe_steps
+    # The surviving copy is unknown, so every step is rewritten in full
+    assert [step["step"] for step in diff.upsert_steps] == [1, 2]
+    assert len(diff.add_step_concepts) == 3
+
+@pytest.mark.asyncio
+async def test_store_writes_no_edges_when_analysis_is_unchanged():
+    record = {
+        "concepts": ["linear equations"],
+        "prerequisites": [{"name": "arithmetic", "order": 0}, {"name": "division", "order": 1}],
+        "steps": [{"number": s["step"], "description": s["description"], "concepts_used": s["concepts_used"]}
+                  for s in STEPS]
+    }
+    neo4j = Mock(spec=Neo4jService)
+    neo4j.write_analysis = AsyncMock(return_value=AnalysisDiff())
+    analyzer = QuestionAnalyzer("fake-api-key", neo4j)
+    result = AnalysisResult(
+        concepts=["linear equations"], prerequisites=["arithmetic", "division"],
+        techniques=["inverse operations"], extensions=[], difficulty_level=0.3,
+        solution_steps=STEPS, domain="Algebra", timestamp=datetime.now()
+    )
+
+    await analyzer._store_enhanced_analysis("Solve 2x + 5 = 13", result)
+
+    _, properties, target = neo4j.write_analysis.await_args.args
+    assert diff_analysis(stored_from_graph(record), target).is_empty()
+    assert properties["domain"] == "Algebra"
@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from fastapi.testclient import TestClient
+from backend.api.v1.endpoints import knowledge_graph
+from backend.main import app
+from backend.services.neo4j_service import NEIGHBORHOOD_QUERIES, Neo4jService
+
+
+def test_batch_runs_one_query_per_category():
+    neo4j = Mock(spec=Neo4jService)
+    neo4j.run_read = AsyncMock(return_value=[
+        {"key": "algebra", "found": True, "related": [{"name": "equations", "strength": 3}],
+         "prerequisites": [], "difficulty": 0.4, "alternatives": ["Algebra"]},
+        {"key": "topology", "found": False, "related": [], "prerequisites": [],
+         "difficulty": None, "alternatives": []},
+    ])
+    neo4j.get_neighborhoods = lambda category, keys: Neo4jService.get_neighborhoods(neo4j, category, keys)
+    app.dependency_overrides[knowledge_graph.get_neo4j_service] = lambda: neo4j
+    try:
+        response = TestClient(app).post(
+            "/api/v1/knowledge-graph/batch",
+            json={"concepts": ["algebra", "topology", "algebra"]}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["questions"] == {} and body["techniques"] == {}
+    assert body["concepts"]["algebra"]["related"] == [{"name": "equations", "strength": 3}]
+    assert body["concepts"]["topology"]["found"] is False
+    # Empty categories skip the database; duplicates are sent once
+    neo4j.run_read.assert_awaited_once_with(NEIGHBORHOOD_QUERIES["concepts"], {"keys": ["algebra", "topology"]})
+
+
+@pytest.mark.asyncio
+async def test_per_item_and_batch_prerequisites_match_the_same_nodes():
+    neo4j = Mock(spec=Neo4jService)
+    neo4j.run_read = AsyncMock(return_value=[])
+    for method in (Neo4jService.get_prerequisites, Neo4jService.get_prerequisites_question,
+                   Neo4jService.get_prerequisites_technique):
+        await method(neo4j, "algebra")
+    queries = [call.args[0] for call in neo4j.run_read.await_args_list] + list(NEIGHBORHOOD_QUERIES.values())
+
+    # Prerequisites are stored as Concept nodes by newer writes and Prerequisite nodes by older ones
+    for query in queries:
+        assert "REQUIRES_PREREQUISITE]->(p)" in query, query
@@ -0,0 +1,68 @@
+import json
+import os
+from scripts.collect_project_code import GitIgnore, collect_project_files, iter_project_files
+
+
+def write(path, text=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_gitignore_rules(tmp_path):
+    write(str(tmp_path / ".gitignore"), "\n".join([
+        "# comment",
+        "*.log",
+        "!keep.log",
+        "/build_output",
+        "data/",
+        "docs/**/draft.md",
+    ]))
+    gitignore = GitIgnore()
+    gitignore.add_file(str(tmp_path / ".gitignore"), "")
+
+    assert gitignore.ignored("debug.log", False) and gitignore.ignored("a/b/debug.log", False)
+    assert not gitignore.ignored("keep.log", False)
+    # Anchored to the root
+    assert gitignore.ignored("build_output", True) and not gitignore.ignored("src/build_output", True)
+    # Directory-only
+    assert gitignore.ignored("src/data", True) and not gitignore.ignored("src/data", False)
+    assert gitignore.ignored("docs/draft.md", False) and gitignore.ignored("docs/a/b/draft.md", False)
+    assert not gitignore.ignored("# comment", False)
+
+
+def test_nested_gitignore_applies_below_its_directory(tmp_path):
+    write(str(tmp_path / "pkg" / ".gitignore"), "generated.py\n")
+    write(str(tmp_path / "pkg" / "generated.py"))
+    write(str(tmp_path / "pkg" / "module.py"))
+    write(str(tmp_path / "generated.py"))
+    write(str(tmp_path / "builder" / "tool.py"))
+    write(str(tmp_path / "build" / "out.py"))
+
+    files = list(iter_project_files(str(tmp_path)))
+
+    assert files == ["generated.py", "builder/tool.py", "pkg/module.py"]
+    assert "pkg/generated.py" in iter_project_files(str(tmp_path), use_gitignore=False)
+
+
+def test_incremental_run_reuses_only_files_that_were_read(tmp_path):
+    project, output = tmp_path / "project", str(tmp_path / "out.txt")
+    write(str(project / "small.py"), "x = 1\n")
+    write(str(project / "large.py"), "y = 2\n" * 10)
+
+    first = collect_project_files(str(project), output, incremental=True, max_file_size=20)
+    assert first == {"files": 2, "read": 2, "reused": 0}
+    with open(output + ".manifest.json", encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["max_file_size"] == 20
+    assert manifest["files"]["large.py"]["sha256"] is None
+
+    # The skipped file is retried rather than reused
+    second = collect_project_files(str(project), output, incremental=True, max_file_size=20)
+    assert second == {"files": 2, "read": 1, "reused": 1}
+
+    # A new size limit invalidates every entry, so the large file is now included
+    third = collect_project_files(str(project), output, incremental=True, max_file_size=1000)
+    assert third == {"files": 2, "read": 2, "reused": 0}
+    with open(output, encoding="utf-8") as f:
+        assert "y = 2" in f.read()
@@ -0,0 +1,96 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from backend.core.concept_registry import ConceptRegistry, write_registry
+from backend.services.concept_normalization_service import ConceptNormalizerService
+from backend.services.concept_registry_service import RegistryCatalog, RegistryView
+
+CONCEPTS = {
+    "linear equations": {"linear equations", "linear equation", "first-degree equations"},
+    "Pythagorean theorem": {"Pythagorean theorem", "théorème de Pythagore"},
+    "limits": {"limits"},
+}
+
+
+def test_registry_round_trip_and_case_insensitive_lookup(tmp_path):
+    path = str(tmp_path / "concepts.registry")
+    write_registry(path, CONCEPTS, generation=1)
+
+    registry = ConceptRegistry(path)
+
+    assert registry.to_dict() == CONCEPTS
+    assert registry.lookup("  Linear   Equation ") == "linear equations"
+    assert registry.lookup("THÉORÈME DE PYTHAGORE") == "Pythagorean theorem"
+    assert registry.lookup("derivatives") is None
+    assert "limits" in registry and "limit" not in registry
+
+
+def test_view_length_reads_the_header_count(tmp_path):
+    path = str(tmp_path / "concepts.registry")
+    write_registry(path, CONCEPTS, generation=1)
+    registry = ConceptRegistry(path)
+    registry._string = Mock(side_effect=AssertionError("decoded a string"))
+
+    view = RegistryView(registry, {"derivatives": {"derivatives"}})
+
+    assert len(view) == 4 and view
+
+@pytest.mark.asyncio
+async def test_one_leader_builds_and_followers_pick_up_new_versions(tmp_path):
+    path = str(tmp_path / "concepts.registry")
+    leader, follower = RegistryCatalog(path, check_interval=0), RegistryCatalog(path, check_interval=0)
+    loader = AsyncMock(return_value=CONCEPTS)
+
+    await leader.get(loader)
+    assert leader.is_leader and not follower.try_lead()
+    assert dict(await follower.get(loader)) == CONCEPTS
+    assert loader.await_count == 1
+
+    # A local write is visible before the next build includes it
+    follower.add("derivatives")
+    assert follower.lookup("Derivatives") == "derivatives"
+    assert "derivatives" in await follower.get(loader)
+
+    loader.return_value = {**CONCEPTS, "derivatives": {"derivatives", "derivative"}}
+    await leader.build(loader)
+    assert follower.lookup("derivative") == "derivatives"
+    assert follower._pending == []
+
+    leader.release()
+    assert follower.try_lead()
+
+
+@pytest.mark.asyncio
+async def test_queued_writes_survive_rebuilds_until_persisted(tmp_path):
+    path = str(tmp_path / "concepts.registry")
+    catalog = RegistryCatalog(path, check_interval=0)
+    loader = AsyncMock(return_value=CONCEPTS)
+    await catalog.get(loader)
+
+    # Write-behind has not stored it yet, so a later build cannot contain it
+    catalog.add("derivatives", persisted=False)
+    await catalog.build(loader)
+    assert catalog.lookup("derivatives") == "derivatives"
+
+    # Once stored, the entry is stamped and the next build takes over
+    catalog.add("derivatives")
+    assert len(catalog._pending) == 1
+    loader.return_value = {**CONCEPTS, "derivatives": {"derivatives"}}
+    await catalog.build(loader)
+    assert catalog._pending == [] and catalog.lookup("derivatives") == "derivatives"
+    catalog.release()
+
+
+@pytest.mark.asyncio
+async def test_known_forms_skip_the_llm(tmp_path):
+    path = str(tmp_path / "concepts.registry")
+    catalog = RegistryCatalog(path)
+    llm = Mock()
+    llm.complete_json = AsyncMock()
+    normalizer = ConceptNormalizerService(Mock(), llm, catalog=catalog)
+    normalizer.load_existing_concepts = AsyncMock(return_value=CONCEPTS)
+
+    existing = await normalizer._get_existing_concepts()
+    match = await normalizer._normalize_concept("Linear Equation", existing)
+
+    assert match.matched_concept == "linear equations" and not match.is_new
+    llm.complete_json.assert_not_awaited()
@@ -0,0 +1,49 @@
+import io
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from backend.core.document_ingest import DocumentReport, extract_document_questions, split_questions
+
+
+def test_split_questions_on_sequential_numbering():
+    text = """Algebra Worksheet 3     Name: ______
+
+1. Solve for x:
+   2x + 5 = 13
+2) Factor x^2 - 5x + 6.
+   1) Find two numbers that multiply to 6
+Q3 Expand (x + 1)^2
+(4) Simplify 3.5 + 2.25
+Question 5: If f(x) = x^2, what is f(3)?
+"""
+    assert split_questions(text) == [
+        (1, "Solve for x: 2x + 5 = 13"),
+        (2, "Factor x^2 - 5x + 6. 1) Find two numbers that multiply to 6"),
+        (3, "Expand (x + 1)^2"),
+        (4, "Simplify 3.5 + 2.25"),
+        (5, "If f(x) = x^2, what is f(3)?"),
+    ]
+    assert split_questions("What is 2 + 2?\n") == [(1, "What is 2 + 2?")]
+    assert split_questions("   \n") == []
+
+
+def fake_ocr(page):
+    # Each test page is a solid grey whose level encodes its page number
+    mode, size, data = page
+    number = data[0] // 10
+    return f"{number}. Question on page {number}\n"
+
+
+@pytest.mark.asyncio
+async def test_pages_are_ocrd_in_order_and_split_across_the_document():
+    frames = [Image.new("L", (40, 20), color=10 * (i + 1)) for i in range(7)]
+    tiff = io.BytesIO()
+    frames[0].save(tiff, format="TIFF", save_all=True, append_images=frames[1:])
+    tiff.seek(0)
+
+    report = DocumentReport()
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        questions = await extract_document_questions(tiff, executor, report, max_pages=6, window=2, ocr=fake_ocr)
+
+    assert questions == [(i, f"Question on page {i}") for i in range(1, 7)]
+    assert (report.pages, report.questions) == (6, 6)
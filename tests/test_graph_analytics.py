@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from unittest.mock import AsyncMock, Mock
+from backend.core.centrality import betweenness, pagerank
+from backend.services.graph_analytics import CLEAR_STALE_QUERY, WRITE_BACK_QUERY, GraphAnalytics
+
+
+def undirected(n, edges):
+    rows, cols = zip(*edges)
+    return sp.csr_matrix((np.ones(len(edges)), (rows, cols)), shape=(n, n))
+
+
+def test_betweenness_matches_hand_counts():
+    # Path a-b-c: only b sits on a shortest path (a, c)
+    assert betweenness(undirected(3, [(0, 1), (1, 2)])).tolist() == [0.0, 1.0, 0.0]
+    # Star with 5 leaves: the centre is on every leaf pair, C(5, 2) = 10
+    star = betweenness(undirected(6, [(0, i) for i in range(1, 6)]))
+    assert star.tolist() == [10.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    # Square with a diagonal-free cycle: each pair of opposite nodes has two paths
+    assert betweenness(undirected(4, [(0, 1), (1, 2), (2, 3), (3, 0)])).tolist() == [0.5] * 4
+    # Sampling every node is exact
+    assert star.tolist() == betweenness(undirected(6, [(0, i) for i in range(1, 6)]), samples=6).tolist()
+
+
+def test_pagerank_is_normalized_and_favours_hubs():
+    cycle = pagerank(undirected(4, [(0, 1), (1, 2), (2, 3), (3, 0)]))
+    assert np.allclose(cycle, 0.25)
+    # Leaves all point at the centre, which has no out-edges (dangling)
+    star = pagerank(undirected(5, [(i, 0) for i in range(1, 5)]))
+    assert star.sum() == pytest.approx(1.0)
+    assert star[0] > star[1] and np.allclose(star[1:], star[1])
+
+
+class FakeConceptStore:
+    """Applies the write-back and stale-score queries to Concept properties kept in memory."""
+
+    def __init__(self, records):
+        self.records = records
+        self.concepts = {}
+        self.writes = []
+
+    async def run_read(self, query, params=None):
+        return self.records
+
+    async def run_write(self, query, params):
+        self.writes.append((query, params))
+        if query == WRITE_BACK_QUERY:
+            for row in params["rows"]:
+                self.concepts[row["name"]] = {**row, "analytics_at": params["computed_at"]}
+            return []
+        assert query == CLEAR_STALE_QUERY
+        stale = [name for name, props in self.concepts.items() if props["analytics_at"] != params["computed_at"]]
+        for name in stale[:params["batch_size"]]:
+            del self.concepts[name]
+        return [{"cleared": len(stale[:params["batch_size"]])}]
+
+
+ALGEBRA = [
+    {"domain": "Algebra", "difficulty": 0.2, "tested": ["equations", "variables"], "prerequisites": ["arithmetic"]},
+    {"domain": "Algebra", "difficulty": 0.6, "tested": ["quadratics"], "prerequisites": ["equations", "arithmetic"]},
+]
+GEOMETRY = [{"domain": "Geometry", "difficulty": 0.4, "tested": ["triangles"], "prerequisites": ["arithmetic"]}]
+
+
+@pytest.mark.asyncio
+async def test_job_writes_scores_in_batches():
+    neo4j = FakeConceptStore(ALGEBRA + GEOMETRY)
+
+    report = await GraphAnalytics(neo4j, batch_size=2).run()
+
+    assert (report.questions, report.concepts, report.rows_written, report.rows_cleared) == (3, 5, 5, 0)
+    write_backs = [params for query, params in neo4j.writes if query == WRITE_BACK_QUERY]
+    assert len(write_backs) == 3
+    rows = [row for params in write_backs for row in params["rows"]]
+    by_name = {row["name"]: row for row in rows}
+    # Everything builds on arithmetic
+    assert max(rows, key=lambda row: row["pagerank"])["name"] == "arithmetic"
+    assert by_name["arithmetic"]["domain"] == "Algebra" and by_name["arithmetic"]["domain_rank"] == 1
+    assert by_name["triangles"]["domain"] == "Geometry" and by_name["triangles"]["domain_rank"] == 1
+    assert report.domains["Algebra"]["concepts"] == 4
+    assert report.domains["Algebra"]["mean_difficulty"] == pytest.approx((0.2 + 0.2 + 0.6) / 3, abs=1e-4)
+
+
+@pytest.mark.asyncio
+async def test_rerun_clears_scores_of_concepts_no_longer_exported():
+    neo4j = FakeConceptStore(ALGEBRA + GEOMETRY + [
+        {"domain": "Geometry", "difficulty": 0.5, "tested": ["circles", "angles", "polygons"], "prerequisites": []},
+    ])
+    await GraphAnalytics(neo4j, batch_size=2).run()
+
+    # The geometry questions are gone by the next run
+    neo4j.records = ALGEBRA
+    report = await GraphAnalytics(neo4j, batch_size=2).run()
+
+    assert report.rows_cleared == 4
+    assert set(neo4j.concepts) == {"arithmetic", "equations", "variables", "quadratics"}
+    ranks = sorted(props["domain_rank"] for props in neo4j.concepts.values())
+    assert ranks == [1, 2, 3, 4]
@@ -0,0 +1,58 @@
+import numpy as np
+from backend.core.graph_layout import LayoutCache, build_subgraph_view, prune_subgraph
+
+
+def star_with_chains(spokes=50, depth=3):
+    """A center with `spokes` chains of length `depth`; spoke i has weight i."""
+    nodes = {"c": {"label": "center", "labels": ["Concept"]}}
+    edges = []
+    for i in range(spokes):
+        previous = "c"
+        for d in range(depth):
+            node_id = f"n{i}_{d}"
+            nodes[node_id] = {"label": node_id, "labels": ["Concept"]}
+            edges.append((previous, node_id, "TESTS_CONCEPT", float(i + 1)))
+            previous = node_id
+    return nodes, edges
+
+
+def test_pruning_is_bounded_connected_and_keeps_heaviest_edges():
+    _, edges = star_with_chains()
+
+    kept = prune_subgraph("c", edges, max_nodes=10, max_edges=20)
+
+    nodes = {n for s, t, _, _ in kept for n in (s, t)}
+    assert len(nodes) <= 10
+    # Every kept node is reachable from the center through kept edges
+    reached, frontier = {"c"}, ["c"]
+    while frontier:
+        current = frontier.pop()
+        for s, t, _, _ in kept:
+            for a, b in ((s, t), (t, s)):
+                if a == current and b not in reached:
+                    reached.add(b)
+                    frontier.append(b)
+    assert reached == nodes
+    assert min(w for _, _, _, w in kept) >= 48
+
+
+def test_subgraph_view_dedupes_and_reuses_cached_layout():
+    nodes, edges = star_with_chains(spokes=5, depth=2)
+    # The same relationship seen through several paths, plus a self loop
+    duplicated = edges + edges[:3] + [("c", "c", "RELATED_TO", 1.0)]
+    cache = LayoutCache()
+
+    first = build_subgraph_view("c", nodes, duplicated, cache=cache)
+    second = build_subgraph_view("c", nodes, duplicated, cache=cache)
+
+    assert len(first["nodes"]) == len({n["id"] for n in first["nodes"]}) == 11
+    assert len(first["edges"]) == 10
+    assert first["nodes"][0] == {"id": "c", "label": "center", "type": "main", "x": 0.0, "y": 0.0}
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+    assert first == second
+
+    changed = build_subgraph_view("c", nodes, edges[:-1], cache=cache)
+    assert changed["generation"] != first["generation"]
+    positions = np.array([(n["x"], n["y"]) for n in first["nodes"]])
+    assert np.isfinite(positions).all()
+    assert len({(n["x"], n["y"]) for n in first["nodes"]}) == 11
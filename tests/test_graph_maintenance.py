@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from backend.services.graph_maintenance import GraphMaintenance
+from backend.services.neo4j_service import Neo4jService
+
+
+def fake_neo4j(orphan_steps=0, parallel_pairs=(), concepts=(), techniques=()):
+    """A Neo4jService mock that hands out orphan steps one LIMIT batch at a time."""
+    neo4j = Mock(spec=Neo4jService)
+    remaining = {"steps": orphan_steps}
+
+    async def run_write(query, params=None):
+        params = params or {}
+        if "SolutionStep" in query and "DETACH DELETE" in query:
+            deleted = min(params["limit"], remaining["steps"])
+            remaining["steps"] -= deleted
+            return [{"deleted": deleted}]
+        if "RETURN count(*) AS deleted" in query:
+            return [{"deleted": 0}]
+        if "AS relabeled" in query:
+            return [{"relabeled": 0}]
+        return []
+
+    async def run_read(query, params=None):
+        if "p:Concept" in query:
+            return list(parallel_pairs) if "Prerequisite" in query else []
+        if "AS degree" in query:
+            return list(concepts)
+        if "AS techniques" in query:
+            return [{"techniques": list(techniques)}]
+        return []
+
+    neo4j.run_write = AsyncMock(side_effect=run_write)
+    neo4j.run_read = AsyncMock(side_effect=run_read)
+    neo4j.run_auto_commit = AsyncMock(return_value=[{"updated": 3}])
+    return neo4j, remaining
+
+
+@pytest.mark.asyncio
+async def test_orphans_are_deleted_in_bounded_batches():
+    neo4j, remaining = fake_neo4j(orphan_steps=25)
+
+    report = await GraphMaintenance(neo4j, batch_size=10).run()
+
+    assert remaining["steps"] == 0
+    assert report.orphan_steps_deleted == 25
+    step_batches = [c for c in neo4j.run_write.await_args_list if "SolutionStep" in c.args[0]]
+    assert len(step_batches) == 3
+    assert all(c.args[1]["limit"] == 10 for c in step_batches)
+    assert report.derived_counts_updated == 6
+    assert report.errors == []
+
+
+@pytest.mark.asyncio
+async def test_merges_are_split_into_batches_and_reported():
+    pairs = [{"keep": f"c{i}", "dup": f"p{i}"} for i in range(5)]
+    # Most connected first, as the query orders them
+    concepts = [
+        {"id": "c0", "name": "Linear Equations", "degree": 4},
+        {"id": "c5", "name": "fractions", "degree": 2},
+        {"id": "c9", "name": " linear  equations", "degree": 1},
+    ]
+    neo4j, _ = fake_neo4j(parallel_pairs=pairs, concepts=concepts)
+
+    report = await GraphMaintenance(neo4j, batch_size=2).run()
+
+    merge_calls = [c for c in neo4j.run_write.await_args_list if "UNWIND $rows" in c.args[0]]
+    assert [len(c.args[1]["rows"]) for c in merge_calls] == [2, 2, 1, 1]
+    assert merge_calls[-1].args[1]["rows"] == [{"keep": "c0", "dup": "c9"}]
+    assert report.parallel_nodes_merged == 5
+    assert report.duplicate_concepts_merged == 1
+
+
+@pytest.mark.asyncio
+async def test_orphan_concepts_spare_techniques():
+    neo4j, _ = fake_neo4j(techniques=["completing the square"])
+
+    await GraphMaintenance(neo4j).run()
+
+    [call] = [c for c in neo4j.run_write.await_args_list if "DELETE c" in c.args[0]]
+    assert "NOT c.name IN $techniques" in call.args[0]
+    assert call.args[1]["techniques"] == ["completing the square"]
+
+
+@pytest.mark.asyncio
+async def test_failing_task_does_not_stop_the_run():
+    neo4j, _ = fake_neo4j()
+    neo4j.run_auto_commit = AsyncMock(side_effect=RuntimeError("boom"))
+
+    report = await GraphMaintenance(neo4j).run()
+
+    assert report.errors == ["recompute_derived_counts: boom"]
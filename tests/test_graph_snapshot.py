@@ -0,0 +1,152 @@
+import csv
+import os
+import time
+import pytest
+from collections import Counter
+from datetime import datetime
+from backend.core.question_analyzer import AnalysisResult, QuestionAnalyzer
+from backend.services.graph_snapshot import (
+    export_admin_csv, export_graph, import_graph, iter_snapshot, plan_import, write_snapshot
+)
+from backend.services.neo4j_service import Neo4jService
+
+NODES = [
+    ("n1", ["Question"], {"text": "Solve 2x + 5 = 13", "difficulty_level": 0.3, "domain": "Algebra",
+                          "techniques": ["inverse operations"], "analyzed_at": "2025-01-18T10:00:00"}),
+    ("n2", ["Concept"], {"name": "linear equations", "question_count": 1}),
+    ("n3", ["Concept", "Prerequisite"], {"name": "arithmetic"}),
+    ("n4", ["AlternativeForm"], {"name": "linear equation"}),
+    ("n5", ["SolutionStep"], {"step_number": 1, "description": "Subtract 5"}),
+    ("n6", ["Question"], {"text": "Solve 3x + 4 = 19"}),
+]
+
+RELATIONSHIPS = [
+    ("n1", "TESTS_CONCEPT", "n2", {"strength": 1.0}),
+    ("n1", "REQUIRES_PREREQUISITE", "n3", {"order": 0}),
+    ("n2", "ALTERNATIVE_FORM", "n4", {}),
+    ("n1", "HAS_STEP", "n5", {}),
+    ("n5", "USES_CONCEPT", "n3", {}),
+    ("n6", "NEAR_DUPLICATE_OF", "n1", {"similarity": 1.0}),
+    ("n1", "TESTS_CONCEPT", "missing", {}),
+]
+
+async def aiter(items):
+    for item in items:
+        yield item
+
+def freeze(props):
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in props.items()))
+
+def graph_signature(nodes, relationships):
+    """Describe a graph independently of its node IDs."""
+    by_id = {node_id: (tuple(sorted(labels)), freeze(props)) for node_id, labels, props in nodes}
+    return (
+        Counter(by_id.values()),
+        Counter(
+            (by_id[src], rel_type, by_id[dst], freeze(props))
+            for src, rel_type, dst, props in relationships
+            if src in by_id and dst in by_id
+        )
+    )
+
+def replay(path, batch_size=10000):
+    """Replay the import plan the way Neo4j would execute it."""
+    imported_nodes, imported_rels = [], []
+    for batch in plan_import(path, batch_size=batch_size):
+        if batch.kind == "nodes":
+            assert "SnapshotImport" in batch.query
+            imported_nodes += [(row["id"], batch.labels, row["props"]) for row in batch.rows]
+        else:
+            assert not imported_rels or imported_nodes, "relationships must follow nodes"
+            imported_rels += [(row["src"], batch.rel_type, row["dst"], row["props"]) for row in batch.rows]
+    return imported_nodes, imported_rels
+
+@pytest.mark.asyncio
+async def test_snapshot_round_trip_is_faithful(tmp_path):
+    path = str(tmp_path / "graph.snapshot")
+
+    stats = await write_snapshot(path, aiter(NODES), aiter(RELATIONSHIPS), chunk_size=2)
+
+    assert stats.nodes == 6
+    assert stats.relationships == 6
+    assert stats.skipped_relationships == 1
+
+    imported_nodes, imported_rels = replay(path, batch_size=1)
+
+    assert graph_signature(imported_nodes, imported_rels) == graph_signature(NODES, RELATIONSHIPS)
+    assert sorted(node_id for node_id, _, _ in imported_nodes) == list(range(6))
+
+@pytest.mark.asyncio
+async def test_truncated_snapshot_is_rejected(tmp_path):
+    path = str(tmp_path / "graph.snapshot")
+    await write_snapshot(path, aiter(NODES), aiter(RELATIONSHIPS))
+    with open(path, "rb+") as f:
+        f.truncate(os.path.getsize(path) - 5)
+
+    with pytest.raises(ValueError):
+        list(iter_snapshot(path))
+
+@pytest.mark.asyncio
+async def test_admin_csv_export(tmp_path):
+    path = str(tmp_path / "graph.snapshot")
+    await write_snapshot(path, aiter(NODES), aiter(RELATIONSHIPS))
+
+    args = export_admin_csv(path, str(tmp_path / "csv"))
+
+    node_files = [a.split("=", 1)[1] for a in args if a.startswith("--nodes=")]
+    rows = []
+    for filename in node_files:
+        with open(filename, newline="", encoding="utf-8") as f:
+            rows += list(csv.DictReader(f))
+    assert len(rows) == len(NODES)
+    question = next(r for r in rows if r.get("techniques:string[]"))
+    assert question["techniques:string[]"] == "inverse operations"
+    assert "--array-delimiter=;" in args
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.environ.get("NEO4J_TEST_URI"), reason="NEO4J_TEST_URI not set")
+async def test_export_import_export_round_trip(tmp_path):
+    """
+    Export a seeded graph, reload it into the emptied database and export it again.
+    Needs an empty, disposable database; prints the import time (run with -s).
+    """
+    service = Neo4jService(
+        os.environ["NEO4J_TEST_URI"],
+        os.environ.get("NEO4J_TEST_USER", "neo4j"),
+        os.environ.get("NEO4J_TEST_PASSWORD", "password")
+    )
+    try:
+        if await service.count_nodes() > 0:
+            pytest.skip("test database is not empty")
+
+        analyzer = QuestionAnalyzer("unused", service)
+        for i in range(int(os.environ.get("SNAPSHOT_TEST_QUESTIONS", "200"))):
+            concepts = [f"concept {i % 50}", f"concept {(i + 1) % 50}"]
+            await analyzer._store_enhanced_analysis(f"Question {i}", AnalysisResult(
+                concepts=concepts,
+                prerequisites=[f"prerequisite {i % 20}"],
+                techniques=[f"technique {i % 10}"],
+                extensions=[f"extension {i % 5}"],
+                difficulty_level=(i % 10) / 10,
+                solution_steps=[{"step": 1, "description": f"Step for {i}", "concepts_used": concepts[:1]}],
+                domain="Algebra",
+                timestamp=datetime(2025, 1, 18)
+            ))
+        await service.store_alternative_form("concept 0", "concept zero")
+        await service.link_near_duplicate("Question 1", "Question 0", 0.95)
+
+        first, second = str(tmp_path / "first.snapshot"), str(tmp_path / "second.snapshot")
+        exported = await export_graph(service, first)
+        await service.run_write("MATCH (n) DETACH DELETE n")
+
+        started = time.perf_counter()
+        imported = await import_graph(service, first)
+        elapsed = time.perf_counter() - started
+        print(f"imported {imported.nodes} nodes, {imported.relationships} relationships in {elapsed:.2f}s")
+
+        await export_graph(service, second)
+        assert (imported.nodes, imported.relationships) == (exported.nodes, exported.relationships)
+        assert graph_signature(*replay(second)) == graph_signature(*replay(first))
+    finally:
+        await service.run_write("MATCH (n) DETACH DELETE n")
+        await service.close()
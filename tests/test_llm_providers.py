@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+import pytest
+from backend.services.fake_llm import FakeLLMClient
+from backend.services.llm_providers import (
+    CassetteMissError, LocalHTTPProvider, OpenAIProvider, RecordReplayProvider, TransientProviderError
+)
+from backend.services.llm_service import CircuitBreaker, LatencyTracker, LLMService, LLMUnavailableError
+
+MESSAGES = [{"role": "user", "content": "Math Question: Solve 2x + 5 = 13"}]
+
+@pytest.mark.asyncio
+async def test_record_then_replay_without_calling_provider(tmp_path):
+    client = FakeLLMClient()
+    recorder = RecordReplayProvider(str(tmp_path), inner=OpenAIProvider(client), mode="record")
+    recorded = await recorder.complete("gpt-4o-mini", MESSAGES)
+
+    replayer = RecordReplayProvider(str(tmp_path), mode="replay")
+    replayed = await replayer.complete("gpt-4o-mini", MESSAGES)
+
+    assert replayed == recorded
+    assert client.calls == 1
+    assert replayer.stats["hits"] == 1
+    with pytest.raises(CassetteMissError):
+        await replayer.complete("gpt-4o", MESSAGES)
+
+@pytest.mark.asyncio
+async def test_llm_service_replays_through_provider(tmp_path):
+    client = FakeLLMClient()
+    auto = RecordReplayProvider(str(tmp_path), inner=OpenAIProvider(client), mode="auto")
+    service = LLMService(auto, breaker=CircuitBreaker(), latency=LatencyTracker())
+
+    first = await service.complete_json("Math Question: 2 + 2")
+    second = await service.complete_json("Math Question: 2 + 2")
+
+    assert first == second
+    assert client.calls == 1
+    assert auto.stats == {"hits": 1, "misses": 1, "recorded": 1}
+
+@pytest.mark.asyncio
+async def test_local_provider_parses_response_and_flags_overload():
+    responses = iter([
+        httpx.Response(200, json={
+            "choices": [{"message": {"content": "{\"ok\": true}"}}],
+            "usage": {"prompt_tokens": 7, "completion_tokens": 3},
+        }),
+        httpx.Response(503, text="overloaded"),
+    ])
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return next(responses)
+
+    provider = LocalHTTPProvider("http://llm.local/v1", transport=httpx.MockTransport(handler))
+    completion = await provider.complete("local-model", MESSAGES)
+
+    assert completion.content == "{\"ok\": true}"
+    assert completion.prompt_tokens == 7
+    assert requests[0].url.path == "/v1/chat/completions"
+    with pytest.raises(TransientProviderError):
+        await provider.complete("local-model", MESSAGES)
+    await provider.close()
+
+@pytest.mark.asyncio
+async def test_timeouts_cancel_async_client_requests():
+    cancelled = []
+
+    async def create(model, messages, **kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    service = LLMService(OpenAIProvider(client), timeout=0.01, max_retries=1, backoff_base=0.001,
+                         breaker=CircuitBreaker(), latency=LatencyTracker())
+
+    with pytest.raises(LLMUnavailableError):
+        await service.complete_json("Math Question: 2 + 2")
+    # Both attempts were stopped, rather than left running in a thread
+    assert cancelled == ["gpt-4o-mini", "gpt-4o-mini"]
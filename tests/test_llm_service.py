@@ -0,0 +1,116 @@
+import asyncio
+import json
+import pytest
+from backend.services.fake_llm import FakeLLMClient
+from backend.services.llm_service import (
+    CircuitBreaker, LatencyTracker, LLMService, LLMUnavailableError
+)
+
+def make_service(client, **kwargs):
+    kwargs.setdefault("backoff_base", 0.001)
+    return LLMService(client, breaker=kwargs.pop("breaker", CircuitBreaker()),
+                      latency=kwargs.pop("latency", LatencyTracker()), **kwargs)
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors():
+    client = FakeLLMClient(errors=["connection", "timeout", None])
+    service = make_service(client)
+
+    result = await service.complete_json("Math Question: Solve 2x + 5 = 13")
+
+    assert "concepts" in result
+    assert client.calls == 3
+    assert service.stats["retries"] == 2
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    client = FakeLLMClient(error_rate=1.0)
+    service = make_service(client, max_retries=2)
+
+    with pytest.raises(LLMUnavailableError):
+        await service.complete_json("Math Question: 2 + 2")
+
+    assert client.calls == 3
+
+@pytest.mark.asyncio
+async def test_timeout_is_retried():
+    client = FakeLLMClient(latencies=[0.5])
+    service = make_service(client, timeout=0.05)
+
+    result = await service.complete_json("Math Question: 2 + 2")
+
+    assert "concepts" in result
+    assert service.stats["retries"] == 1
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_propagate():
+    def responder(prompt):
+        raise ValueError("rejected by provider")
+
+    service = make_service(FakeLLMClient(responder=responder))
+
+    with pytest.raises(ValueError):
+        await service.complete_json("Math Question: 2 + 2")
+    assert service.stats["retries"] == 0
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_fails_fast():
+    client = FakeLLMClient(error_rate=1.0)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    service = make_service(client, max_retries=5, breaker=breaker)
+
+    with pytest.raises(LLMUnavailableError):
+        await service.complete_json("Math Question: 2 + 2")
+    calls_before = client.calls
+
+    with pytest.raises(LLMUnavailableError) as excinfo:
+        await service.complete_json("Math Question: 2 + 2")
+
+    assert calls_before == 2
+    assert client.calls == calls_before
+    assert breaker.state == CircuitBreaker.OPEN
+    assert excinfo.value.retry_after > 0
+
+@pytest.mark.asyncio
+async def test_half_open_trial_closes_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    service = make_service(FakeLLMClient(errors=["connection"]), max_retries=0, breaker=breaker)
+
+    with pytest.raises(LLMUnavailableError):
+        await service.complete_json("Math Question: 2 + 2")
+    await asyncio.sleep(0.02)
+    await service.complete_json("Math Question: 2 + 2")
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_hedged_request_beats_stuck_call():
+    latency = LatencyTracker()
+    for _ in range(20):
+        latency.record(0.01)
+    client = FakeLLMClient(latencies=[1.0, 0.01])
+    service = make_service(client, hedge=True, latency=latency)
+
+    started = asyncio.get_running_loop().time()
+    await service.complete_json("Math Question: 2 + 2")
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert service.stats["hedges"] == 1
+    assert client.calls == 2
+    assert elapsed < 0.5
+
+@pytest.mark.asyncio
+async def test_malformed_json_is_retried_without_opening_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    service = make_service(FakeLLMClient(), max_retries=3, breaker=breaker)
+    responses = iter(["{not json", "{also not json", '{"concepts": []}'])
+    service._hedged_call = lambda model, messages: asyncio.sleep(0, next(responses))
+
+    assert await service.complete_json("Math Question: 2 + 2") == {"concepts": []}
+    assert service.stats["parse_errors"] == 2
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    service._hedged_call = lambda model, messages: asyncio.sleep(0, "{not json")
+    with pytest.raises(json.JSONDecodeError):
+        await service.complete_json("Math Question: 2 + 2")
+    assert breaker.state == CircuitBreaker.CLOSED
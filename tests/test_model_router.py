@@ -0,0 +1,40 @@
+import pytest
+from unittest.mock import Mock
+from backend.core.question_analyzer import QuestionAnalyzer
+from backend.services.fake_llm import FakeLLMClient
+from backend.services.llm_service import CircuitBreaker, LatencyTracker, LLMService
+from backend.services.model_router import SMALL, STRONG, ModelRouter, ModelTier
+
+HARD = (
+    "Prove by induction that the series sum of 1/(k(k+1)) for k = 1..n converges to n/(n+1), "
+    "then (a) find the limit as n -> infinity and (b) differentiate f(x) = x^2 sin(x) and integrate it."
+)
+
+def make_router(**kwargs):
+    return ModelRouter(ModelTier(SMALL, "mini", 0.1, 0.4), ModelTier(STRONG, "large", 2.5, 10.0), **kwargs)
+
+def test_routes_by_complexity_and_known_difficulty():
+    router = make_router()
+
+    assert router.tier_for_question("What is 2 + 2?") == SMALL
+    assert router.tier_for_question(HARD) == STRONG
+
+    # A template the LLM rated hard is routed strong even though its text looks simple
+    router.observe("Solve 2x + 5 = 13", 0.95)
+    assert router.tier_for_question("Solve 7x + 1 = 50") == STRONG
+
+@pytest.mark.asyncio
+async def test_batches_stay_within_tier_and_usage_is_attributed():
+    router = make_router()
+    client = FakeLLMClient()
+    llm = LLMService(client, breaker=CircuitBreaker(), latency=LatencyTracker(), on_completion=router.record_usage)
+    analyzer = QuestionAnalyzer("fake-api-key", Mock(), llm_service=llm, router=router)
+    questions = ["What is 2 + 2?", HARD, "What is 3 + 5?"]
+
+    raw_analyses = await analyzer.get_raw_analyses(questions, batch_size=10)
+
+    assert len(raw_analyses) == 3
+    assert sorted(request["model"] for request in client.requests) == ["large", "mini"]
+    report = router.report()["tiers"]
+    assert report[SMALL]["calls"] == 1 and report[STRONG]["calls"] == 1
+    assert report[STRONG]["estimated_cost_usd"] > 0
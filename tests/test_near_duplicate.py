@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import AsyncMock
+from backend.core.minhash import LSHIndex, MinHasher, char_shingles
+from backend.core.near_duplicate import NearDuplicateIndex, mask_question_text
+
+def test_mask_question_text():
+    assert mask_question_text("Solve 2x+5=13") == mask_question_text("Solve  3x + 4 = 19")
+    assert mask_question_text("Area of radius 2.5") == "areaofradius#"
+
+def test_minhash_estimates_jaccard():
+    hasher = MinHasher(num_perm=256)
+    a = char_shingles("the quick brown fox jumps over the lazy dog")
+    b = char_shingles("the quick brown fox jumps over the lazy cat")
+    exact = len(a & b) / len(a | b)
+
+    estimate = MinHasher.similarity(hasher.signature(a), hasher.signature(b))
+
+    assert abs(estimate - exact) < 0.1
+
+def test_lsh_index_add_remove():
+    hasher = MinHasher()
+    index = LSHIndex()
+    signature = hasher.signature(char_shingles("find the area of a circle"))
+    index.add("q1", signature)
+
+    assert index.candidates(signature) == {"q1"}
+    index.remove("q1")
+    assert index.candidates(signature) == set()
+
+def test_finds_numeric_variants_but_not_itself():
+    index = NearDuplicateIndex(threshold=0.9)
+    index.add("Solve 2x+5=13")
+
+    assert index.find("Solve 3x + 4 = 19") == ("Solve 2x+5=13", 1.0)
+    assert index.find("Solve 2x+5=13") is None
+    assert index.find("Prove that the square root of 2 is irrational") is None
+
+@pytest.mark.asyncio
+async def test_loads_from_graph_once():
+    neo4j = AsyncMock()
+    neo4j.get_all_questions.return_value = [{"text": "What is 2 + 2?"}]
+    index = NearDuplicateIndex()
+
+    await index.ensure_loaded(neo4j)
+    await index.ensure_loaded(neo4j)
+
+    assert neo4j.get_all_questions.await_count == 1
+    assert index.find("What is 3 + 4?")[0] == "What is 2 + 2?"
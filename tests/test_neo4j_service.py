@@ -1,5 +1,9 @@
 import pytest
-from backend.services.neo4j_service import Neo4jService
+from neo4j import READ_ACCESS, WRITE_ACCESS
+from backend.core.analysis_diff import stored_from_analysis
+from backend.services.neo4j_service import (
+    CREATE_QUESTION_QUERY, STORED_ANALYSIS_QUERY, CardinalityError, Neo4jService
+)
 from unittest.mock import AsyncMock, MagicMock
 
 @pytest.fixture
@@ -10,7 +14,7 @@ def mock_neo4j_driver():
     return driver
 
 @pytest.mark.asyncio
-async def test_create_question_nodes():
+async def test_create_question_nodes(mock_neo4j_driver):
     # Test data
     question = "What is 2 + 2?"
     analysis = {
@@ -43,4 +47,177 @@ async def test_get_related_concepts():
 @pytest.mark.asyncio
 async def test_get_prerequisites():
     # Test implementation
-    pass
\ No newline at end of file
+    pass
+
+
+@pytest.mark.asyncio
+async def test_reads_and_writes_use_routed_managed_transactions():
+    service = Neo4jService("bolt://localhost:7687", "neo4j", "password")
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    session.execute_read.return_value = [{"name": "algebra", "question_count": 2}]
+    service.driver = MagicMock()
+    service.driver.session.return_value = session
+
+    assert await service.get_all_concepts() == [{"name": "algebra", "question_count": 2}]
+    await service.store_concept("algebra")
+
+    modes = [call.kwargs["default_access_mode"] for call in service.driver.session.call_args_list]
+    assert modes == [READ_ACCESS, WRITE_ACCESS]
+    assert all(call.kwargs["bookmark_manager"] is service.bookmarks for call in service.driver.session.call_args_list)
+    session.execute_read.assert_awaited_once()
+    session.execute_write.assert_awaited_once()
+    session.run.assert_not_called()
+
+
+class FakeTransaction:
+    """Records statements and reports the given counts of created nodes and relationships."""
+
+    def __init__(self, nodes_created=0, relationships_created=0, record=None):
+        self.statements = []
+        self.counters = MagicMock(nodes_created=nodes_created, relationships_created=relationships_created)
+        self.record = record
+
+    async def run(self, query, params):
+        self.statements.append((query, params))
+        result = AsyncMock()
+        result.consume.return_value = MagicMock(counters=self.counters)
+        result.single.return_value = self.record
+        return result
+
+
+@pytest.mark.asyncio
+async def test_create_question_nodes_runs_each_list_in_its_own_subquery():
+    analysis = {
+        "concepts": ["addition", "addition", "place value"],
+        "prerequisites": [],
+        "techniques": ["mental_math"],
+        "extensions": ["algebra"]
+    }
+    tx = FakeTransaction(nodes_created=5, relationships_created=4)
+
+    await Neo4jService._create_question_nodes(tx, "What is 2 + 2?", analysis)
+
+    [(query, params)] = tx.statements
+    assert query == CREATE_QUESTION_QUERY
+    assert query.count("UNWIND") == query.count("CALL {") == 4
+    assert params["concepts"] == ["addition", "place value"] and params["prerequisites"] == []
+
+
+@pytest.mark.asyncio
+async def test_multiplied_writes_are_rejected():
+    # 2 concepts and 2 prerequisites allow at most 1 + 2 * 4 created entities
+    analysis = {"concepts": ["a", "b"], "prerequisites": ["c", "d"], "techniques": [], "extensions": []}
+    with pytest.raises(CardinalityError):
+        await Neo4jService._create_question_nodes(FakeTransaction(nodes_created=5, relationships_created=5), "q", analysis)
+    await Neo4jService._create_question_nodes(FakeTransaction(nodes_created=5, relationships_created=4), "q", analysis)
+
+
+def service_with_transaction(tx):
+    """A service whose write sessions run their transaction functions against `tx`."""
+    async def execute_write(work, *args):
+        return await work(tx, *args)
+
+    service = Neo4jService("bolt://localhost:7687", "neo4j", "password")
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    session.execute_write.side_effect = execute_write
+    service.driver = MagicMock()
+    service.driver.session.return_value = session
+    return service
+
+
+def stored_record(concepts=(), prerequisites=(), steps=()):
+    """A STORED_ANALYSIS_QUERY record for the given edges."""
+    return {
+        "concepts": list(concepts),
+        "prerequisites": [{"name": name, "order": order} for order, name in enumerate(prerequisites)],
+        "steps": [{"number": s["step"], "description": s["description"], "concepts_used": s.get("concepts_used", [])}
+                  for s in steps]
+    }
+
+
+@pytest.mark.asyncio
+async def test_write_analysis_sends_one_statement_per_change():
+    tx = FakeTransaction(record=stored_record(
+        ["linear equations", "fractions"], ["arithmetic"],
+        [{"step": 1, "description": "Subtract 5", "concepts_used": ["arithmetic"]},
+         {"step": 2, "description": "Divide by 2", "concepts_used": []}]
+    ))
+    target = stored_from_analysis(
+        ["linear equations", "equality"], ["arithmetic"],
+        [{"step": 1, "description": "Subtract 5 from both sides", "concepts_used": ["inverse operations"]}]
+    )
+
+    diff = await service_with_transaction(tx).write_analysis("Solve 2x + 5 = 13", {"domain": "Algebra"}, target)
+
+    assert diff.add_concepts == ["equality"] and diff.remove_concepts == ["fractions"]
+    assert all(params["text"] == "Solve 2x + 5 = 13" for _, params in tx.statements)
+    # The question is locked by its write before the stored edges are read and diffed
+    queries = [query for query, _ in tx.statements]
+    assert "SET q += $properties" in queries[0] and queries[1] == STORED_ANALYSIS_QUERY
+    changes = [{key: value for key, value in params.items() if key != "text"} for _, params in tx.statements]
+    assert changes == [
+        {"properties": {"domain": "Algebra"}},
+        {},
+        {"names": ["fractions"]},
+        {"names": ["equality"]},
+        {"numbers": [2]},
+        {"steps": [{"step": 1, "description": "Subtract 5 from both sides"}]},
+        {"uses": [{"step": 1, "concept": "arithmetic"}]},
+        {"uses": [{"step": 1, "concept": "inverse operations"}]},
+    ]
+    assert "DELETE r" in queries[2] and "MERGE (q)-[r:TESTS_CONCEPT]->(c)" in queries[3]
+    assert "DETACH DELETE s" in queries[4]
+    assert "DELETE r" in queries[6] and "MERGE (s)-[:USES_CONCEPT]->(c)" in queries[7]
+
+
+@pytest.mark.asyncio
+async def test_write_analysis_of_unchanged_analysis_only_sets_properties():
+    steps = [{"step": 1, "description": "Subtract 5"}]
+    analysis = stored_from_analysis(["linear equations"], ["arithmetic"], steps)
+    tx = FakeTransaction(record=stored_record(["linear equations"], ["arithmetic"], steps))
+
+    diff = await service_with_transaction(tx).write_analysis("q", {"domain": "Algebra"}, analysis)
+    assert diff.is_empty()
+    assert [query for query, _ in tx.statements][1:] == [STORED_ANALYSIS_QUERY]
+
+    tx = FakeTransaction(record=stored_record())
+    await service_with_transaction(tx).write_analysis("q", {}, analysis)
+    assert len(tx.statements) == 5
+
+
+@pytest.mark.asyncio
+async def test_subgraph_expands_by_hop_keeping_heaviest_edges():
+    def node(name):
+        return {"id": name, "label": name, "labels": ["Concept"]}
+
+    def edge(rel, a, b, weight):
+        return {"id": rel, "source": a, "target": b, "type": "RELATED_TO", "weight": weight,
+                "source_node": node(a), "target_node": node(b)}
+
+    records = iter([
+        node("c"),
+        # The hub has three relationships; only the two heaviest come back
+        {"total": 3, "edges": [edge("r1", "c", "a", 5.0), edge("r2", "c", "b", 4.0)]},
+        {"total": 1, "edges": [edge("r3", "a", "d", 1.0)]},
+    ])
+    tx = MagicMock()
+    tx.run = AsyncMock(side_effect=lambda query, params: MagicMock(single=AsyncMock(return_value=next(records))))
+    async def execute_read(work):
+        return await work(tx)
+
+    service = Neo4jService("bolt://localhost:7687", "neo4j", "password")
+    session = AsyncMock()
+    session.__aenter__.return_value = session
+    session.execute_read.side_effect = execute_read
+    service.driver = MagicMock()
+    service.driver.session.return_value = session
+
+    subgraph = await service.get_subgraph("Concept", "name", "c", hops=2, edge_limit=2)
+
+    second_hop = tx.run.await_args_list[2].args[1]
+    assert second_hop["frontier"] == ["a", "b"] and second_hop["seen"] == ["r1", "r2"]
+    assert [n["id"] for n in subgraph["nodes"]] == ["c", "a", "b", "d"]
+    assert [(e["source"], e["target"]) for e in subgraph["edges"]] == [("c", "a"), ("c", "b"), ("a", "d")]
+    assert subgraph["complete"] is False
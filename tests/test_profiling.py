@@ -0,0 +1,47 @@
+import asyncio
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.core.profiling import ProfileStore, ProfilingConfig, ProfilingMiddleware
+
+
+def make_app(config: ProfilingConfig) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, config=config)
+
+    @app.get("/slow")
+    async def slow_endpoint():
+        await asyncio.sleep(0.05)
+        time.sleep(0.05)  # blocks the event loop, as a sync client call would
+        return {"ok": True}
+
+    return app
+
+
+def test_header_triggers_profile_with_stacks_and_await_timings(tmp_path):
+    config = ProfilingConfig()
+    config.enable(ProfileStore(str(tmp_path)), interval=0.002)
+    client = TestClient(make_app(config))
+
+    assert "x-profile-id" not in client.get("/slow").headers
+    response = client.get("/slow", headers={"X-Profile": "1"})
+
+    profile_id = response.headers["x-profile-id"]
+    assert [p["id"] for p in config.store.list()] == [profile_id]
+    profile = config.store.get(profile_id)
+    assert profile["status"] == 200
+    assert profile["awaiting_ms"] >= 40
+    assert profile["loop_run_ms"] >= 40
+    assert any("slow_endpoint" in a["at"] and a["wait_ms"] >= 40 for a in profile["awaits"])
+    assert "slow_endpoint" in config.store.collapsed(profile_id)
+
+
+def test_disabled_profiling_passes_through(tmp_path):
+    config = ProfilingConfig()
+    client = TestClient(make_app(config))
+
+    response = client.get("/slow", headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert config.store is None
@@ -1,5 +1,8 @@
 import pytest
+from backend.core.near_duplicate import NearDuplicateIndex
 from backend.core.question_analyzer import QuestionAnalyzer
+from backend.services.fake_llm import FakeLLMClient, default_responder
+from backend.services.llm_service import CircuitBreaker, LatencyTracker, LLMService
 from backend.services.neo4j_service import Neo4jService
 from unittest.mock import Mock, AsyncMock
 
@@ -32,4 +35,143 @@ async def test_analyze_question(analyzer):
     assert all(isinstance(x, str) for x in result["concepts"])
     assert all(isinstance(x, str) for x in result["prerequisites"])
     assert all(isinstance(x, str) for x in result["techniques"])
-    assert all(isinstance(x, str) for x in result["extensions"])
\ No newline at end of file
+    assert all(isinstance(x, str) for x in result["extensions"])
+
+@pytest.mark.asyncio
+async def test_analyze_question_stream_emits_stages_in_order(analyzer):
+    raw = {
+        "concepts": ["linear equations"],
+        "prerequisites": ["arithmetic"],
+        "techniques": ["inverse operations"],
+        "extensions": ["systems of equations"],
+        "difficulty_level": 0.3,
+        "solution_steps": [{"step": 1, "description": "Subtract 5", "concepts_used": ["arithmetic"]}],
+        "domain": "Algebra"
+    }
+    analyzer._get_llm_analysis = AsyncMock(return_value=raw)
+    analyzer._store_enhanced_analysis = AsyncMock()
+    analyzer.concept_normalizer._get_existing_concepts = AsyncMock(return_value={})
+    analyzer.concept_normalizer.store_new_concept = AsyncMock()
+
+    events = [event async for event in analyzer.analyze_question_stream("Solve 2x + 5 = 13")]
+    names = [name for name, _ in events]
+
+    assert names[0] == "raw"
+    assert names.count("normalized") == 3
+    assert names[-2:] == ["analysis", "stored"]
+    result = events[-2][1]
+    assert result.concepts == ["linear equations"]
+    assert result.prerequisites == ["arithmetic"]
+    assert isinstance(events[1][1]["is_new"], bool)
+
+@pytest.mark.asyncio
+async def test_batched_analysis_resubmits_only_invalid_items(mock_neo4j_service):
+    def responder(prompt):
+        response = default_responder(prompt)
+        if "analyses" in response:
+            # Drop one item and corrupt another
+            response["analyses"] = response["analyses"][1:]
+            del response["analyses"][0]["domain"]
+        return response
+
+    client = FakeLLMClient(responder=responder)
+    llm = LLMService(client, breaker=CircuitBreaker(), latency=LatencyTracker())
+    analyzer = QuestionAnalyzer("fake-api-key", mock_neo4j_service, llm_service=llm)
+    questions = [f"Solve {i}x + 1 = {i}" for i in range(4)]
+
+    raw_analyses = await analyzer.get_raw_analyses(questions, batch_size=4)
+
+    assert len(raw_analyses) == 4
+    assert all(analyzer._is_valid_analysis(raw) for raw in raw_analyses)
+    # One batch request plus individual requests for items 0 and 1
+    assert client.calls == 3
+
+@pytest.mark.asyncio
+async def test_batched_analysis_falls_back_when_batch_response_is_unusable(mock_neo4j_service):
+    def responder(prompt):
+        response = default_responder(prompt)
+        if "analyses" in response:
+            # A bare array instead of {"analyses": [...]}
+            return response["analyses"]
+        return response
+
+    client = FakeLLMClient(responder=responder)
+    llm = LLMService(client, breaker=CircuitBreaker(), latency=LatencyTracker())
+    analyzer = QuestionAnalyzer("fake-api-key", mock_neo4j_service, llm_service=llm)
+    questions = [f"Solve {i}x + 1 = {i}" for i in range(4)]
+
+    raw_analyses = await analyzer.get_raw_analyses(questions, batch_size=2)
+
+    assert len(raw_analyses) == 4
+    assert all(analyzer._is_valid_analysis(raw) for raw in raw_analyses)
+    # Two batch requests, then every question individually
+    assert client.calls == 6
+
+@pytest.mark.asyncio
+async def test_batched_analysis_falls_back_when_batch_request_fails(mock_neo4j_service):
+    client = FakeLLMClient()
+    llm = LLMService(client, breaker=CircuitBreaker(), latency=LatencyTracker())
+    analyzer = QuestionAnalyzer("fake-api-key", mock_neo4j_service, llm_service=llm)
+    analyzer._get_llm_batch_analysis = AsyncMock(side_effect=ValueError("malformed JSON"))
+    questions = [f"Solve {i}x + 1 = {i}" for i in range(3)]
+
+    raw_analyses = await analyzer.get_raw_analyses(questions, batch_size=3)
+
+    assert len(raw_analyses) == 3
+    assert all(analyzer._is_valid_analysis(raw) for raw in raw_analyses)
+    assert client.calls == 3
+
+@pytest.mark.asyncio
+async def test_near_duplicate_reuses_stored_analysis(mock_neo4j_service):
+    index = NearDuplicateIndex()
+    index.loaded = True
+    index.add("Solve 2x + 5 = 13")
+    stored = {
+        "concepts": ["linear equations"],
+        "prerequisites": ["arithmetic"],
+        "techniques": ["inverse operations"],
+        "extensions": [],
+        "difficulty_level": 0.3,
+        "domain": "Algebra"
+    }
+    mock_neo4j_service.get_question_analysis = AsyncMock(
+        side_effect=lambda text: stored if text == "Solve 2x + 5 = 13" else None
+    )
+    mock_neo4j_service.link_near_duplicate = AsyncMock()
+    analyzer = QuestionAnalyzer("fake-api-key", mock_neo4j_service, near_duplicates=index)
+    analyzer._get_llm_analysis = AsyncMock()
+    analyzer._store_enhanced_analysis = AsyncMock()
+
+    result = await analyzer.analyze_question("Solve 3x + 4 = 19")
+
+    analyzer._get_llm_analysis.assert_not_awaited()
+    assert result.concepts == ["linear equations"]
+    mock_neo4j_service.link_near_duplicate.assert_awaited_once_with(
+        "Solve 3x + 4 = 19", "Solve 2x + 5 = 13", 1.0
+    )
+    assert "Solve 3x + 4 = 19" in index.lsh
+
+@pytest.mark.asyncio
+async def test_resubmitted_original_is_reanalyzed(mock_neo4j_service):
+    index = NearDuplicateIndex()
+    index.loaded = True
+    # The original and a question that reused its analysis
+    index.add("Solve 2x + 5 = 13")
+    index.add("Solve 3x + 4 = 19")
+    mock_neo4j_service.get_question_analysis = AsyncMock(return_value={"concepts": ["linear equations"]})
+    analyzer = QuestionAnalyzer("fake-api-key", mock_neo4j_service, near_duplicates=index)
+
+    assert await analyzer._find_near_duplicate("Solve 2x + 5 = 13") is None
+    mock_neo4j_service.get_question_analysis.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_question_stored_elsewhere_is_not_reused(mock_neo4j_service):
+    index = NearDuplicateIndex()
+    index.loaded = True
+    index.add("Solve 2x + 5 = 13")
+    # Already analyzed by another process, so not in this index
+    mock_neo4j_service.get_question_analysis = AsyncMock(return_value={"concepts": ["linear equations"]})
+    analyzer = QuestionAnalyzer("fake-api-key", mock_neo4j_service, near_duplicates=index)
+
+    assert await analyzer._find_near_duplicate("Solve 3x + 4 = 19") is None
+    mock_neo4j_service.get_question_analysis.assert_awaited_once_with("Solve 3x + 4 = 19")
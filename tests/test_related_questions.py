@@ -0,0 +1,88 @@
+import random
+import pytest
+from unittest.mock import AsyncMock, Mock
+from backend.core.question_analyzer import QuestionAnalyzer
+from backend.core.related_questions import RelatedQuestionIndex
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def test_incremental_top_k_matches_full_recompute():
+    rng = random.Random(3)
+    vocabulary = [f"concept{i}" for i in range(30)]
+    questions = {f"q{i}": set(rng.sample(vocabulary, rng.randint(2, 6))) for i in range(200)}
+    index = RelatedQuestionIndex(top_k=5, min_similarity=0.3, max_posting=10_000)
+    edges = {}
+    for text, concepts in questions.items():
+        changes = index.add(text, concepts)
+        for source, target in changes.unlinks:
+            del edges[(source, target)]
+        for source, target, weight in changes.links:
+            edges[(source, target)] = weight
+
+    # The edges written match the in-memory lists, which hold each question's best neighbours
+    assert edges == {(q, other): w for q, best in index.neighbours.items() for other, w in best.items()}
+    for text, concepts in questions.items():
+        scores = {other: round(jaccard(concepts, c), 4) for other, c in questions.items() if other != text}
+        expected = sorted(((o, w) for o, w in scores.items() if w >= 0.3), key=lambda item: (-item[1], item[0]))
+        assert index.related(text) == expected[:5]
+
+
+def test_new_question_enters_existing_lists_and_reanalysis_drops_stale_edges():
+    index = RelatedQuestionIndex(top_k=1, min_similarity=0.2)
+    index.add("a", ["limits", "derivatives", "chain rule"])
+    index.add("b", ["matrices", "determinants"])
+    changes = index.add("c", ["limits", "derivatives", "chain rule", "integrals"])
+    assert {(s, t) for s, t, _ in changes.links} == {("c", "a"), ("a", "c")}
+
+    # "c" is re-analyzed as linear algebra: "a" loses it and "b" gains it
+    changes = index.add("c", ["matrices", "determinants", "eigenvalues"])
+    assert set(changes.unlinks) == {("c", "a"), ("a", "c")}
+    assert {(s, t) for s, t, _ in changes.links} == {("c", "b"), ("b", "c")}
+    assert index.related("a") == []
+    assert index.add("c", ["matrices", "determinants", "eigenvalues"]).is_empty()
+
+
+@pytest.mark.asyncio
+async def test_load_backfills_questions_without_edges():
+    neo4j = Mock()
+    neo4j.get_question_concept_sets = AsyncMock(return_value=[
+        {"text": "a", "concepts": ["Limits", "Derivatives"], "related": [{"text": "b", "weight": 1.0}]},
+        {"text": "b", "concepts": ["limits", "derivatives"], "related": [{"text": "a", "weight": 1.0}]},
+        {"text": "c", "concepts": ["limits", "derivatives"], "related": []},
+        {"text": "d", "concepts": [], "related": []},
+    ])
+    neo4j.update_related_questions = AsyncMock()
+    index = RelatedQuestionIndex(top_k=2)
+    await index.ensure_loaded(neo4j)
+    await index.ensure_loaded(neo4j)
+
+    neo4j.get_question_concept_sets.assert_awaited_once()
+    links, unlinks = neo4j.update_related_questions.await_args.args
+    assert sorted(links) == [("c", "a", 1.0), ("c", "b", 1.0)] and unlinks == []
+    assert index.related("a") == [("b", 1.0)]
+
+
+@pytest.mark.asyncio
+async def test_failed_edge_write_rebuilds_index_from_graph():
+    neo4j = Mock()
+    neo4j.get_question_concept_sets = AsyncMock(return_value=[
+        {"text": "a", "concepts": ["limits", "derivatives"], "related": []},
+    ])
+    neo4j.update_related_questions = AsyncMock(side_effect=[ConnectionError("lost"), None])
+    index = RelatedQuestionIndex(top_k=2)
+    index.loaded = True
+    index.add("a", ["limits", "derivatives"])
+    analyzer = QuestionAnalyzer("fake-api-key", neo4j, related_questions=index)
+
+    with pytest.raises(ConnectionError):
+        await analyzer._update_related_questions("b", ["limits", "derivatives"])
+
+    # "b" never reached the graph, so the index must not keep it either
+    assert not index.loaded and index.related("a") == []
+    await analyzer._update_related_questions("c", ["limits", "derivatives"])
+    neo4j.get_question_concept_sets.assert_awaited_once()
+    assert "b" not in index.concepts
+    assert index.related("c") == [("a", 1.0)]
@@ -0,0 +1,39 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from backend.services.neo4j_service import Neo4jService
+from backend.services.search_service import SearchService, build_prefix_query
+
+
+def test_prefix_query_escapes_lucene_syntax():
+    assert build_prefix_query("  ") is None
+    assert build_prefix_query("Linear equ") == "+linear +(equ OR equ*)"
+    assert build_prefix_query("f(x) + 2") == r"+f\(x\) +\+ +(2 OR 2*)"
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_ranks_and_resolves_alternative_forms():
+    neo4j = Mock(spec=Neo4jService)
+
+    async def run_read(query, params):
+        if "concept_names" in query:
+            return [
+                {"value": "linear equations", "labels": ["Concept"], "matched": "linear equation", "score": 2.0},
+                {"value": "linear equations", "labels": ["Concept"], "matched": "linear equations", "score": 3.0},
+                {"value": "inverse operations", "labels": ["Concept", "Technique"],
+                 "matched": "inverse operations", "score": 1.0},
+            ]
+        return [{"value": "Solve the linear equation 2x + 5 = 13", "score": 2.5}]
+
+    neo4j.run_read = AsyncMock(side_effect=run_read)
+
+    response = await SearchService(neo4j).autocomplete("line", limit=10)
+
+    assert [(r["type"], r["value"]) for r in response["results"]] == [
+        ("concept", "linear equations"),
+        ("question", "Solve the linear equation 2x + 5 = 13"),
+        ("technique", "inverse operations"),
+    ]
+    assert response["results"][0]["matched"] == "linear equations"
+
+    only_techniques = await SearchService(neo4j).autocomplete("inv", types=["technique"])
+    assert [r["value"] for r in only_techniques["results"]] == ["inverse operations"]
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from unittest.mock import Mock
+from backend.core.singleflight import SingleFlight, normalize_question_text
+from backend.services.concept_normalization_service import ConceptCatalog, ConceptMatch, ConceptNormalizerService
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    executions = 0
+
+    async def work():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*[flight.do("key", work) for _ in range(10)])
+
+    assert results == ["result"] * 10
+    assert executions == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 9, "in_flight": 0}
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_waiters():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *[flight.do("key", work) for _ in range(3)],
+        return_exceptions=True
+    )
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.calls == 1
+
+@pytest.mark.asyncio
+async def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight("test")
+
+    async def work():
+        return 1
+
+    await flight.do("key", work)
+    await flight.do("key", work)
+
+    assert flight.calls == 2
+    assert flight.coalesced == 0
+
+def test_normalize_question_text():
+    assert normalize_question_text("  Solve  2x + 5\n= 13 ") == "Solve 2x + 5 = 13"
+
+@pytest.mark.asyncio
+async def test_spacing_and_case_variants_share_one_normalization():
+    normalizer = ConceptNormalizerService(Mock(), Mock(), catalog=ConceptCatalog())
+    calls = 0
+
+    async def find(concept, existing):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ConceptMatch(input_concept=concept, matched_concept=None, confidence=1.0, is_new=True)
+
+    normalizer._find_matching_concept = find
+    await asyncio.gather(
+        normalizer._normalize_concept("Linear  Equations", {}),
+        normalizer._normalize_concept("linear equations", {})
+    )
+
+    assert calls == 1
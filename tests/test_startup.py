@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from fastapi.testclient import TestClient
+from backend.services.concept_normalization_service import ConceptCatalog
+from backend.services.neo4j_service import Neo4jService
+from backend.startup import StartupState, run_warm_up, warm_up
+
+
+def fake_neo4j():
+    neo4j = Mock(spec=Neo4jService)
+    neo4j.driver = Mock()
+    neo4j.driver.verify_connectivity = AsyncMock(side_effect=[ConnectionError("refused"), None])
+    neo4j.run_write = AsyncMock(return_value=[])
+
+    async def run_read(query, params):
+        # Every requested constraint and index exists
+        return [{"names": params["names"]}]
+
+    neo4j.run_read = AsyncMock(side_effect=run_read)
+    return neo4j
+
+
+@pytest.mark.asyncio
+async def test_warm_up_retries_until_ready(monkeypatch):
+    loads = []
+
+    async def load(self):
+        loads.append(1)
+        return {"linear equations": {"linear equations"}}
+
+    monkeypatch.setattr(
+        "backend.services.concept_normalization_service.ConceptNormalizerService.load_existing_concepts", load
+    )
+    monkeypatch.setattr("backend.services.concept_normalization_service.concept_catalog", ConceptCatalog())
+    near_duplicates = Mock()
+    near_duplicates.ensure_loaded = AsyncMock()
+    state = StartupState()
+
+    await run_warm_up(fake_neo4j(), state, near_duplicates=near_duplicates, retry_interval=0)
+
+    report = state.report()
+    assert report["ready"] and report["attempts"] == 2 and report["error"] is None
+    assert set(report["phases"]) == {"imports", "connectivity", "schema", "concepts", "near_duplicates"}
+    assert loads == [1]
+    near_duplicates.ensure_loaded.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_creates_and_checks_uniqueness_constraints():
+    neo4j = fake_neo4j()
+    neo4j.driver.verify_connectivity = AsyncMock()
+    neo4j.ensure_constraints = AsyncMock()
+    neo4j.run_read = AsyncMock(return_value=[{"names": []}])
+    state = StartupState()
+
+    with pytest.raises(RuntimeError, match="concept_name_unique"):
+        await warm_up(neo4j, state)
+
+    neo4j.ensure_constraints.assert_awaited_once()
+    assert "SHOW CONSTRAINTS" in neo4j.run_read.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_concept_catalog_is_loaded_once_and_updated_in_place():
+    catalog = ConceptCatalog(ttl=60)
+    loader = AsyncMock(return_value={"limits": {"limits"}})
+
+    await catalog.get(loader)
+    catalog.add("limits", "limit")
+    catalog.add("derivatives")
+    concepts = await catalog.get(loader)
+
+    assert loader.await_count == 1
+    assert concepts == {"limits": {"limits", "limit"}, "derivatives": {"derivatives"}}
+
+
+@pytest.mark.asyncio
+async def test_concept_catalog_keeps_queued_writes_across_reloads():
+    catalog = ConceptCatalog(ttl=0)
+    loader = AsyncMock(side_effect=lambda: {"limits": {"limits"}})
+
+    catalog.add("derivatives", persisted=False)
+    await catalog.get(loader)
+    assert catalog.lookup("derivatives") == "derivatives"
+
+    catalog.add("derivatives")
+    await catalog.get(loader)
+    assert catalog.lookup("derivatives") is None
+
+
+def test_probes_without_environment():
+    from backend.main import app
+
+    # Not entering the client context skips the lifespan, so warm-up never ran
+    client = TestClient(app)
+    assert client.get("/healthz").json() == {"status": "ok"}
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, Mock
+from backend.core.question_analyzer import QuestionAnalyzer
+from backend.core.write_behind import WriteBehind, WriteJournal
+from backend.services.neo4j_service import Neo4jService
+
+
+@pytest.mark.asyncio
+async def test_writes_apply_in_order_per_key_after_failures(tmp_path):
+    applied, failures = [], {"a1": 1}
+
+    async def apply(entry):
+        name = entry["payload"]["name"]
+        if failures.get(name):
+            failures[name] -= 1
+            raise RuntimeError("neo4j unavailable")
+        applied.append(name)
+
+    journal = WriteJournal(str(tmp_path / "journal.jsonl"))
+    write_behind = WriteBehind(journal, interval=0.01, retry_seconds=0.01)
+    await write_behind.start(apply)
+    await write_behind.submit_many([("a", "analysis", {"name": n}) for n in ("a1", "a2")])
+    await write_behind.submit("b", "analysis", {"name": "b1"})
+    await asyncio.wait_for(write_behind.drain(), 5)
+
+    # b1 is not held up by a's failure; a2 waits for a1's retry
+    assert applied == ["b1", "a1", "a2"]
+    report = write_behind.report()
+    assert (report["pending"], report["failed"], report["applied"]) == (0, 1, 3)
+    assert report["journal_bytes"] == 0
+    await write_behind.stop()
+
+
+@pytest.mark.asyncio
+async def test_unapplied_writes_are_replayed_on_startup(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    crashed = WriteBehind(WriteJournal(path), interval=60, retry_seconds=60)
+    await crashed.start(AsyncMock(side_effect=RuntimeError("down")))
+    await crashed.submit_many([("q", "concept", {"name": "c"}), ("q", "analysis", {"name": "q"})])
+    await crashed.stop(drain_seconds=0.05)
+
+    applied = []
+
+    async def apply(entry):
+        applied.append(entry["kind"])
+
+    restarted = WriteBehind(WriteJournal(path), interval=0.01)
+    await restarted.start(apply)
+    await asyncio.wait_for(restarted.drain(), 5)
+    assert applied == ["concept", "analysis"]
+    assert restarted.stats["replayed"] == 2
+    await restarted.submit("q2", "analysis", {})
+    await asyncio.wait_for(restarted.drain(), 5)
+    assert restarted.applied_seq == 3
+    await restarted.stop()
+
+
+@pytest.mark.asyncio
+async def test_entries_that_keep_failing_are_dead_lettered(tmp_path):
+    applied = []
+
+    async def apply(entry):
+        if entry["kind"] == "unknown":
+            raise ValueError("Unknown journaled write")
+        applied.append(entry["payload"]["name"])
+
+    journal = WriteJournal(str(tmp_path / "journal.jsonl"))
+    write_behind = WriteBehind(journal, interval=0.01, retry_seconds=0.01, max_attempts=3)
+    await write_behind.start(apply)
+    await write_behind.submit_many([("q", "unknown", {"name": "bad"}), ("q", "analysis", {"name": "good"})])
+    await asyncio.wait_for(write_behind.drain(), 5)
+
+    # The later entry for the key is no longer held back, and the journal can be truncated
+    assert applied == ["good"]
+    report = write_behind.report()
+    assert (report["pending"], report["failed"], report["dead_lettered"], report["applied"]) == (0, 3, 1, 1)
+    assert report["journal_bytes"] == 0
+    with open(journal.dead_letter_path) as f:
+        [dead] = [json.loads(line) for line in f]
+    assert dead["kind"] == "unknown" and "Unknown journaled write" in dead["error"]
+    await write_behind.stop()
+
+@pytest.mark.asyncio
+async def test_analysis_returns_before_graph_writes(tmp_path):
+    neo4j = Mock(spec=Neo4jService)
+    write_behind = WriteBehind(WriteJournal(str(tmp_path / "journal.jsonl")), interval=60)
+    analyzer = QuestionAnalyzer("fake-api-key", neo4j, write_behind=write_behind)
+    analyzer._get_llm_analysis = AsyncMock(return_value={
+        "concepts": ["linear equations"], "prerequisites": [], "techniques": [], "extensions": [],
+        "difficulty_level": 0.3, "solution_steps": [], "domain": "Algebra"
+    })
+    analyzer.concept_normalizer._get_existing_concepts = AsyncMock(return_value={})
+    analyzer._store_enhanced_analysis = AsyncMock()
+    analyzer.concept_normalizer.persist_concept = AsyncMock()
+    await write_behind.start(analyzer.apply_write)
+
+    result = await analyzer.analyze_question("Solve 2x + 5 = 13")
+
+    assert result.concepts == ["linear equations"]
+    analyzer._store_enhanced_analysis.assert_not_awaited()
+    assert [e["kind"] for e in write_behind.pending.values()] == ["concept", "analysis"]
+
+    await write_behind.stop()
+    analyzer.concept_normalizer.persist_concept.assert_awaited_once()
+    stored_text, stored = analyzer._store_enhanced_analysis.await_args.args
+    assert stored_text == "Solve 2x + 5 = 13" and stored == result
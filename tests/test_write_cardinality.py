@@ -0,0 +1,114 @@
+"""
+Exact node and relationship counts for the write path, against a real Neo4j.
+Set NEO4J_TEST_URI (plus NEO4J_TEST_USER / NEO4J_TEST_PASSWORD) to run them;
+they only touch nodes whose names carry a random suffix and remove them afterwards.
+"""
+import os
+import uuid
+from datetime import datetime
+import pytest
+import pytest_asyncio
+from backend.core.question_analyzer import AnalysisResult, QuestionAnalyzer
+from backend.services.neo4j_service import Neo4jService
+
+pytestmark = pytest.mark.skipif(not os.environ.get("NEO4J_TEST_URI"), reason="NEO4J_TEST_URI not set")
+
+COUNTS_QUERY = """
+MATCH (q:Question {text: $text})
+RETURN
+    COUNT { (q)-[:TESTS_CONCEPT]->() } AS tests_concept,
+    COUNT { (q)-[:REQUIRES_PREREQUISITE]->() } AS requires_prerequisite,
+    COUNT { (q)-[:SOLVED_BY_TECHNIQUE]->() } AS solved_by_technique,
+    COUNT { (q)-[:EXTENDS_TO]->() } AS extends_to,
+    COUNT { (q)-[:HAS_STEP]->(:SolutionStep) } AS steps,
+    COUNT { (q)-[:HAS_STEP]->()-[:USES_CONCEPT]->() } AS step_concepts
+"""
+
+
+@pytest_asyncio.fixture
+async def neo4j():
+    service = Neo4jService(
+        os.environ["NEO4J_TEST_URI"],
+        os.environ.get("NEO4J_TEST_USER", "neo4j"),
+        os.environ.get("NEO4J_TEST_PASSWORD", "password")
+    )
+    suffix = uuid.uuid4().hex[:8]
+    yield service, suffix
+    await service.run_write(
+        "MATCH (n) WHERE n.text ENDS WITH $suffix OR n.name ENDS WITH $suffix "
+        "OPTIONAL MATCH (n)-[:HAS_STEP]->(s) DETACH DELETE s, n",
+        {"suffix": suffix}
+    )
+    await service.close()
+
+
+async def counts(service: Neo4jService, text: str):
+    return (await service.run_read(COUNTS_QUERY, {"text": text}))[0]
+
+
+@pytest.mark.asyncio
+async def test_create_question_nodes_writes_each_item_once(neo4j):
+    service, suffix = neo4j
+    text = f"Cardinality question {suffix}"
+    analysis = {
+        "concepts": [f"concept {i} {suffix}" for i in range(5)],
+        "prerequisites": [f"prerequisite {i} {suffix}" for i in range(5)],
+        "techniques": [f"technique {i} {suffix}" for i in range(3)],
+        "extensions": [f"extension {i} {suffix}" for i in range(2)],
+    }
+    expected = {"tests_concept": 5, "requires_prerequisite": 5, "solved_by_technique": 3,
+                "extends_to": 2, "steps": 0, "step_concepts": 0}
+
+    await service.create_question_nodes(text, analysis)
+    assert await counts(service, text) == expected
+    await service.create_question_nodes(text, analysis)
+    assert await counts(service, text) == expected
+
+    # An empty list no longer drops the stages after it
+    empty_text = f"No concepts {suffix}"
+    await service.create_question_nodes(empty_text, {**analysis, "concepts": []})
+    assert await counts(service, empty_text) == {**expected, "tests_concept": 0}
+
+
+@pytest.mark.asyncio
+async def test_stored_analysis_writes_each_step_once(neo4j):
+    service, suffix = neo4j
+    text = f"Stored analysis {suffix}"
+    concepts = [f"concept {i} {suffix}" for i in range(5)]
+    analysis = AnalysisResult(
+        concepts=concepts,
+        prerequisites=[f"prerequisite {i} {suffix}" for i in range(5)],
+        techniques=[],
+        extensions=[],
+        difficulty_level=0.5,
+        solution_steps=[
+            {"step": i + 1, "description": f"Step {i + 1}", "concepts_used": concepts[i:i + 2]}
+            for i in range(4)
+        ],
+        domain="Algebra",
+        timestamp=datetime.now()
+    )
+    expected = {"tests_concept": 5, "requires_prerequisite": 5, "solved_by_technique": 0,
+                "extends_to": 0, "steps": 4, "step_concepts": 8}
+    analyzer = QuestionAnalyzer("unused", service)
+
+    await analyzer._store_enhanced_analysis(text, analysis)
+    assert await counts(service, text) == expected
+    await analyzer._store_enhanced_analysis(text, analysis)
+    assert await counts(service, text) == expected
+
+    # A changed analysis replaces exactly the edges that changed
+    changed = analysis.model_copy(update={
+        "concepts": concepts[:3],
+        "solution_steps": analysis.solution_steps[:2],
+    })
+    await analyzer._store_enhanced_analysis(text, changed)
+    assert await counts(service, text) == {**expected, "tests_concept": 3, "steps": 2, "step_concepts": 4}
+
+    # Duplicate steps left by older writes are collapsed
+    await service.run_write(
+        "MATCH (q:Question {text: $text}) CREATE (q)-[:HAS_STEP]->(:SolutionStep {step_number: 1})",
+        {"text": text}
+    )
+    await analyzer._store_enhanced_analysis(text, changed)
+    assert await counts(service, text) == {**expected, "tests_concept": 3, "steps": 2, "step_concepts": 4}